@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+DeepSeek Dev Agent - Mode batch non interactif
+Exécute un fichier JSONL de tâches sur un pool de processus DeepSeekAgent
+avec un limiteur de débit partagé, et écrit les résultats en JSONL
+
+Format d'une tâche (une par ligne):
+    {"id": "repo-a", "prompt": "...", "cwd": "/chemin/repo", "max_iterations": 25,
+     "timeout": 600, "max_input_tokens": 500000}
+"""
+
+import os
+import sys
+import json
+import time
+import contextlib
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+class SharedRateLimiter:
+    """
+    Limiteur de débit partagé entre processus (requêtes espacées régulièrement)
+
+    Chaque acquire() réserve le prochain créneau libre sous verrou, puis dort
+    hors verrou jusqu'à ce créneau.
+    """
+
+    def __init__(self, requests_per_minute: float, ctx=None):
+        ctx = ctx or multiprocessing
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = ctx.Value('d', 0.0, lock=False)
+        self._lock = ctx.Lock()
+
+    def acquire(self) -> float:
+        """
+        Attend le prochain créneau disponible
+
+        Returns:
+            Temps d'attente en secondes
+        """
+        if self.interval <= 0:
+            return 0.0
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# État du processus worker (initialisé par _init_worker)
+_worker_limiter: Optional[SharedRateLimiter] = None
+_worker_log_dir: Optional[str] = None
+
+
+def _init_worker(limiter: SharedRateLimiter, log_dir: Optional[str]):
+    """Initialise un processus worker (limiteur partagé, répertoire de logs)"""
+    global _worker_limiter, _worker_log_dir
+    _worker_limiter = limiter
+    _worker_log_dir = log_dir
+
+
+def load_tasks(tasks_file: str) -> List[Dict]:
+    """
+    Charge et valide les tâches d'un fichier JSONL
+
+    Args:
+        tasks_file: Chemin du fichier de tâches
+
+    Returns:
+        Liste des tâches (id attribué si absent)
+    """
+    tasks = []
+    with open(tasks_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                task = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Ligne {line_number}: JSON invalide ({e})")
+            if not task.get('prompt'):
+                raise ValueError(f"Ligne {line_number}: champ 'prompt' manquant")
+            task.setdefault('id', f"task-{line_number}")
+            tasks.append(task)
+    return tasks
+
+
+def run_task(task: Dict) -> Dict:
+    """
+    Exécute une tâche dans le processus worker courant
+
+    Args:
+        task: Tâche (prompt, cwd, limites)
+
+    Returns:
+        Résultat structuré (tokens, itérations, timings)
+    """
+    started_at = datetime.now().isoformat()
+    start = time.monotonic()
+    result = {
+        "id": task['id'],
+        "status": "error",
+        "cwd": task.get('cwd', '.'),
+        "started_at": started_at,
+        "worker_pid": os.getpid()
+    }
+
+    log_path = None
+    if _worker_log_dir:
+        log_path = Path(_worker_log_dir) / f"{task['id']}.log"
+        result["log_file"] = str(log_path)
+
+    with open(log_path or os.devnull, 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            from main import DeepSeekAgent
+            cwd = task.get('cwd')
+            if cwd is not None and not os.path.isdir(cwd):
+                raise FileNotFoundError(f"Répertoire de travail introuvable: {cwd}")
+
+            # Outils dans le répertoire de la tâche (comme une session du démon): pas de chdir du worker
+            agent = DeepSeekAgent(cwd=os.path.abspath(cwd) if cwd else None)
+            agent.rate_limiter = _worker_limiter
+            if task.get('max_iterations'):
+                agent.max_iterations = int(task['max_iterations'])
+            if task.get('timeout'):
+                agent.deadline = start + float(task['timeout'])
+            if task.get('max_input_tokens'):
+                agent.max_input_tokens = int(task['max_input_tokens'])
+
+            response = agent.chat(task['prompt'], stream=False)
+
+            result.update({
+                # Réponse d'erreur de l'API (échec définitif après auto-corrections)
+                "status": "error" if response.startswith("[ERREUR") else "ok",
+                "stop_reason": agent.last_run.get('stop_reason'),
+                "response": response,
+                "iterations": agent.last_run.get('iterations', 0),
+                "tokens": {
+                    "input": agent.token_stats['total_input'],
+                    "output": agent.token_stats['total_output'],
+                    "memory": agent.token_stats['memory_tokens']
+                },
+                "rate_limit_wait_s": round(agent.last_run.get('rate_limit_wait', 0.0), 3),
+                "memory_skipped_turns": agent.token_stats['memory_skipped'],
+                "memory_late_turns": agent.token_stats['memory_late'],
+                "api_errors": agent.token_stats['api_errors']
+            })
+        except Exception as e:
+            result["error"] = str(e)
+            result["traceback"] = traceback.format_exc()
+
+    result["duration_s"] = round(time.monotonic() - start, 3)
+    return result
+
+
+def run_batch(tasks_file: str, output_file: str, workers: int = 4,
+              requests_per_minute: float = 60.0, log_dir: Optional[str] = None) -> Dict:
+    """
+    Exécute toutes les tâches en parallèle et écrit les résultats au fil de l'eau
+
+    Args:
+        tasks_file: Fichier JSONL de tâches
+        output_file: Fichier JSONL de résultats
+        workers: Nombre de processus
+        requests_per_minute: Débit max d'appels API (tous processus confondus)
+        log_dir: Répertoire des logs par tâche (None = sortie ignorée)
+
+    Returns:
+        Résumé (succès, échecs, tokens, durée)
+    """
+    if not os.getenv('DEEPSEEK_API_KEY'):
+        raise ValueError("❌ DEEPSEEK_API_KEY non trouvée dans l'environnement")
+
+    tasks = load_tasks(tasks_file)
+    if log_dir:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+
+    ctx = multiprocessing.get_context('spawn')
+    limiter = SharedRateLimiter(requests_per_minute, ctx=ctx)
+
+    summary = {"tasks": len(tasks), "ok": 0, "error": 0, "input_tokens": 0, "output_tokens": 0}
+    start = time.monotonic()
+
+    with open(output_file, 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                initializer=_init_worker, initargs=(limiter, log_dir)) as pool:
+        futures = {pool.submit(run_task, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker mort (OOM, signal...): la tâche est marquée en échec
+                result = {"id": task['id'], "status": "error", "error": f"Worker interrompu: {e}"}
+
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+
+            summary[result['status']] += 1
+            summary['input_tokens'] += result.get('tokens', {}).get('input', 0)
+            summary['output_tokens'] += result.get('tokens', {}).get('output', 0)
+            status = "✅" if result['status'] == 'ok' else "❌"
+            print(f"{status} {result['id']} ({result.get('duration_s', 0):.1f}s, "
+                  f"{result.get('iterations', 0)} itérations)", flush=True)
+
+    summary["duration_s"] = round(time.monotonic() - start, 3)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    """Point d'entrée du mode batch"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DeepSeek Dev Agent - Mode batch")
+    parser.add_argument('tasks', help="Fichier JSONL de tâches")
+    parser.add_argument('-o', '--output', default='batch_results.jsonl', help="Fichier JSONL de résultats")
+    parser.add_argument('-w', '--workers', type=int, default=4, help="Nombre de processus agents")
+    parser.add_argument('--rpm', type=float, default=60.0, help="Requêtes API par minute (tous workers)")
+    parser.add_argument('--log-dir', default=None, help="Répertoire des logs par tâche")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_batch(args.tasks, args.output, args.workers, args.rpm, args.log_dir)
+    except (ValueError, FileNotFoundError) as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"\n📊 {summary['ok']}/{summary['tasks']} tâches réussies en {summary['duration_s']:.1f}s "
+          f"(~{summary['input_tokens']:,} tokens input, ~{summary['output_tokens']:,} output)")
+    print(f"📄 Résultats: {args.output}")
+    sys.exit(0 if summary['error'] == 0 else 2)
+
+
+if __name__ == "__main__":
+    main()
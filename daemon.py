@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+DeepSeek Dev Agent - Mode démon
+Garde le modèle d'embeddings, le client Qdrant et le prompt système chargés
+une fois pour toutes, et sert des sessions à un client léger via une socket Unix
+
+Usage:
+    python daemon.py serve      # Démarre le démon
+    python daemon.py connect    # Ouvre une session (ou: python main.py --connect)
+    python daemon.py stop       # Arrête le démon
+
+Protocole: une ligne JSON par message
+    client → {"type": "open", "cwd": "..."} | {"type": "message", "text": "..."} | {"type": "close"}
+    démon  → {"type": "ready", "session": "..."} | {"type": "output", "data": "..."} | {"type": "done", "quit": bool}
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import uuid
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+DEFAULT_SOCKET = os.getenv('DS_DAEMON_SOCKET', os.path.expanduser('~/.deepseek_agent.sock'))
+
+
+class SessionOutput(io.TextIOBase):
+    """
+    Remplace sys.stdout dans le démon: chaque thread de session écrit vers
+    sa propre connexion, les autres threads vers la sortie d'origine
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def bind(self, sink: Callable[[str], None]):
+        """Associe le thread courant à la connexion d'une session"""
+        self._local.sink = sink
+
+    def unbind(self):
+        self._local.sink = None
+
+    def write(self, data: str) -> int:
+        sink = getattr(self._local, 'sink', None)
+        if sink is not None:
+            sink(data)
+        else:
+            self._fallback.write(data)
+        return len(data)
+
+    def flush(self):
+        if getattr(self._local, 'sink', None) is None:
+            self._fallback.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+class AgentDaemon:
+    """État partagé du démon: ressources chargées une fois, sessions isolées"""
+
+    def __init__(self):
+        from tools.tool_cache import ToolResultCache
+
+        self.sessions: Dict[str, object] = {}
+        self.sessions_lock = threading.Lock()
+        self.tool_cache = ToolResultCache(max_bytes=32 * 1024 * 1024, max_entries=1024)
+        self.system_prompt: Optional[str] = None
+        self.stats = {'sessions_opened': 0, 'warmup_s': 0.0}
+
+    def warm_up(self):
+        """Charge le modèle d'embeddings, le client Qdrant et le prompt système"""
+        from main import DeepSeekAgent, start_memory_warmup
+
+        start = time.perf_counter()
+        try:
+            # Le démon attend la fin du préchauffage: les sessions trouvent la mémoire prête
+            start_memory_warmup().result()
+        except Exception as e:
+            print(f"⚠️  Mémoire indisponible: {e}")
+        prototype = DeepSeekAgent(tool_cache=self.tool_cache)
+        self.system_prompt = prototype.system_prompt
+        self.stats['warmup_s'] = time.perf_counter() - start
+        print(f"✅ Démon prêt en {self.stats['warmup_s']:.1f}s")
+
+    def open_session(self, cwd: Optional[str]):
+        """Crée une session (historique propre, caches partagés)"""
+        from main import DeepSeekAgent
+
+        agent = DeepSeekAgent(system_prompt=self.system_prompt, tool_cache=self.tool_cache, cwd=cwd)
+        session_id = uuid.uuid4().hex[:8]
+        with self.sessions_lock:
+            self.sessions[session_id] = agent
+            self.stats['sessions_opened'] += 1
+        return session_id, agent
+
+    def close_session(self, session_id: str):
+        with self.sessions_lock:
+            self.sessions.pop(session_id, None)
+
+
+class SessionHandler(socketserver.StreamRequestHandler):
+    """Une connexion = une session"""
+
+    def setup(self):
+        super().setup()
+        self._send_lock = threading.Lock()
+        self._connected = True
+
+    def _send(self, message: Dict):
+        if not self._connected:
+            return
+        try:
+            with self._send_lock:
+                self.wfile.write((json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8'))
+                self.wfile.flush()
+        except OSError:
+            # Client parti: la session se termine après le tour en cours
+            self._connected = False
+
+    def handle(self):
+        from main import Colors, handle_command, print_banner
+
+        daemon: AgentDaemon = self.server.daemon
+        output: SessionOutput = self.server.output
+        output.bind(lambda data: self._send({'type': 'output', 'data': data}))
+
+        session_id, agent = None, None
+        try:
+            for raw in self.rfile:
+                try:
+                    message = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                kind = message.get('type')
+
+                if kind == 'open' and agent is None:
+                    session_id, agent = daemon.open_session(message.get('cwd'))
+                    print_banner()
+                    print(f"{Colors.GREEN}✓ Session {session_id} ouverte "
+                          f"({len(daemon.sessions)} active(s), démon prêt depuis {daemon.stats['warmup_s']:.1f}s de warm-up){Colors.RESET}\n")
+                    if agent.memory_ready():
+                        last_conv = agent.load_last_conversation()
+                        if last_conv:
+                            print(last_conv + "\n")
+                    self._send({'type': 'ready', 'session': session_id})
+
+                elif kind == 'message' and agent is not None:
+                    text = message.get('text', '').strip()
+                    quit_session = False
+                    try:
+                        if text.startswith('/'):
+                            quit_session = handle_command(agent, text)
+                        elif text:
+                            agent.chat(text, stream=True)
+                            print()
+                    except Exception as e:
+                        print(f"{Colors.RED}❌ Erreur: {e}{Colors.RESET}")
+                    self._send({'type': 'done', 'quit': quit_session})
+                    if quit_session:
+                        break
+
+                elif kind == 'close':
+                    break
+
+                elif kind == 'shutdown':
+                    self._send({'type': 'done', 'quit': True})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    break
+        finally:
+            output.unbind()
+            if session_id:
+                daemon.close_session(session_id)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _daemon_running(socket_path: str) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def create_server(socket_path: str) -> DaemonServer:
+    """Serveur lié à la socket, créée directement en 0600 (sessions réservées à l'utilisateur courant)"""
+    # Sans fenêtre entre bind et chmod: umask restrictive pendant le bind
+    old_umask = os.umask(0o177)
+    try:
+        server = DaemonServer(socket_path, SessionHandler)
+    finally:
+        os.umask(old_umask)
+    os.chmod(socket_path, 0o600)  # Filet de sécurité
+    return server
+
+
+def serve(socket_path: str = DEFAULT_SOCKET):
+    """Démarre le démon et sert les sessions jusqu'à `stop`"""
+    if not os.getenv('DEEPSEEK_API_KEY'):
+        print("❌ DEEPSEEK_API_KEY non trouvée dans l'environnement")
+        sys.exit(1)
+
+    if os.path.exists(socket_path):
+        if _daemon_running(socket_path):
+            print(f"ℹ️  Démon déjà actif sur {socket_path}")
+            return
+        os.unlink(socket_path)  # Socket orpheline d'un démon arrêté brutalement
+
+    daemon = AgentDaemon()
+    daemon.warm_up()
+
+    # Consolidation périodique optionnelle (DS_MEMORY_CONSOLIDATE_HOURS)
+    from tools.memory_consolidation import start_consolidation_task
+    from main import print_consolidation_notice
+    start_consolidation_task(on_result=print_consolidation_notice)  # Journal du démon (aucune session liée)
+
+    output = SessionOutput(sys.stdout)
+    sys.stdout = output
+
+    server = create_server(socket_path)
+    server.daemon = daemon
+    server.output = output
+    print(f"🚀 Démon en écoute sur {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        sys.stdout = output._fallback
+        print("👋 Démon arrêté")
+
+
+def _connect(socket_path: str):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    return sock, sock.makefile('rwb')
+
+
+def _send_message(stream, message: Dict):
+    stream.write((json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8'))
+    stream.flush()
+
+
+def _read_until(stream, expected: str) -> Optional[Dict]:
+    """Affiche la sortie de la session jusqu'au message attendu"""
+    for raw in stream:
+        message = json.loads(raw)
+        if message.get('type') == 'output':
+            sys.stdout.write(message.get('data', ''))
+            sys.stdout.flush()
+        elif message.get('type') == expected:
+            return message
+    return None  # Connexion fermée par le démon
+
+
+def connect(socket_path: str = DEFAULT_SOCKET):
+    """Client léger: relaie la saisie vers une session du démon"""
+    from main import Colors, readline, HISTORY_FILE
+
+    try:
+        sock, stream = _connect(socket_path)
+    except OSError:
+        print(f"{Colors.RED}❌ Aucun démon sur {socket_path}{Colors.RESET}")
+        print(f"{Colors.YELLOW}💡 Démarrez-le avec: python daemon.py serve{Colors.RESET}")
+        sys.exit(1)
+
+    def save_history():
+        if readline and HISTORY_FILE:
+            try:
+                readline.write_history_file(HISTORY_FILE)
+            except Exception:
+                pass
+
+    with sock:
+        _send_message(stream, {'type': 'open', 'cwd': os.getcwd()})
+        if _read_until(stream, 'ready') is None:
+            return
+
+        if readline:
+            prompt = f"\001{Colors.GREEN}\002👤 Vous:\001{Colors.RESET}\002 "
+        else:
+            prompt = f"{Colors.GREEN}👤 Vous:{Colors.RESET} "
+
+        while True:
+            try:
+                user_input = input(prompt).strip()
+                if not user_input:
+                    continue
+                _send_message(stream, {'type': 'message', 'text': user_input})
+                done = _read_until(stream, 'done')
+                if done is None or done.get('quit'):
+                    break
+            except KeyboardInterrupt:
+                # Comme en mode interactif: sauvegarde de la conversation
+                print()
+                _send_message(stream, {'type': 'message', 'text': '/quit'})
+                _read_until(stream, 'done')
+                break
+            except EOFError:
+                print(f"\n{Colors.YELLOW}👋 Au revoir !{Colors.RESET}")
+                _send_message(stream, {'type': 'close'})
+                break
+        save_history()
+
+
+def stop(socket_path: str = DEFAULT_SOCKET):
+    """Demande l'arrêt du démon"""
+    try:
+        sock, stream = _connect(socket_path)
+    except OSError:
+        print(f"ℹ️  Aucun démon sur {socket_path}")
+        return
+    with sock:
+        _send_message(stream, {'type': 'shutdown'})
+        _read_until(stream, 'done')
+    print("✅ Arrêt demandé")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DeepSeek Dev Agent - Mode démon")
+    parser.add_argument('action', choices=['serve', 'connect', 'stop'])
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help="Chemin de la socket Unix")
+    args = parser.parse_args(argv)
+
+    {'serve': serve, 'connect': connect, 'stop': stop}[args.action](args.socket)
+
+
+if __name__ == "__main__":
+    main()
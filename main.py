@@ -4,14 +4,29 @@ DeepSeek Dev Agent - Chat CLI interactif avec function calling
 Agent de développement autonome avec accès aux outils
 """
 
+import time
+
+# Profil de démarrage (affiché avec --profile-startup)
+STARTUP_T0 = time.perf_counter()
+STARTUP_PROFILE = []
+
+
+def _mark_startup(label: str):
+    """Enregistre le temps écoulé depuis le lancement du processus"""
+    STARTUP_PROFILE.append((label, time.perf_counter() - STARTUP_T0))
+
+
 import os
 import sys
 import json
 import re
+import threading
 import requests
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 import traceback
+import queue
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from datetime import datetime
 
 # Support pour l'édition de ligne avec les flèches
@@ -35,17 +50,67 @@ except ImportError:
     readline = None
     HISTORY_FILE = None
 
-# Importer les outils
+_mark_startup("imports standard + readline")
+
+# Importer les outils (chargés à la demande, voir tools/registry.py)
 sys.path.insert(0, str(Path(__file__).parent))
-from tools import (
-    read_file, write_file, list_files, file_exists, append_file, replace_in_file,
-    execute_command, check_command_exists, get_system_info,
-    remember, recall, search_facts, decide, get_memory,
-    search_web, fetch_webpage, extract_links, summarize_webpage,
-    backup_qdrant, restore_qdrant, list_backups, get_backup_stats,
-    git_status, git_diff, git_commit, git_log, git_branch_list
-)
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+from tools.registry import LazyToolRegistry
+from tools.progress_tracker import ProgressTracker
+from tools.tool_cache import ToolResultCache, Prefetcher, CACHEABLE_TOOLS, FILE_WRITE_TOOLS, GLOBAL_INVALIDATION_TOOLS
+from tools.working_dir import use_working_directory
+
+_mark_startup("imports outils (registre paresseux)")
+
+
+# Préchauffage de la mémoire (modèle d'embeddings + connexion Qdrant), partagé par les agents du processus
+_memory_warmup: Dict[str, Any] = {'future': None, 'started_at': None, 'duration_s': None, 'error': None}
+_memory_warmup_lock = threading.Lock()
+
+
+def start_memory_warmup() -> Future:
+    """
+    Lance l'initialisation de la mémoire sur un thread d'arrière-plan (idempotent)
+    
+    Returns:
+        Future résolue avec l'instance QdrantMemory (ou l'exception d'initialisation)
+    """
+    with _memory_warmup_lock:
+        if _memory_warmup['future'] is not None:
+            return _memory_warmup['future']
+        future = Future()
+        future.set_running_or_notify_cancel()
+        _memory_warmup['future'] = future
+        _memory_warmup['started_at'] = time.perf_counter()
+    
+    def warm_up():
+        try:
+            # Import sur le thread: qdrant_client et le backend d'embeddings ne retardent pas le prompt
+            from tools.memory_tools import get_memory
+            memory = get_memory()
+        except Exception as e:
+            error = e
+        else:
+            error = None
+        # Statistiques renseignées avant de résoudre la future: memory_ready() ⇒ duration_s connue
+        _memory_warmup['duration_s'] = time.perf_counter() - _memory_warmup['started_at']
+        if error is not None:
+            _memory_warmup['error'] = str(error)
+            future.set_exception(error)
+        else:
+            future.set_result(memory)
+    
+    # Thread démon (pas ThreadPoolExecutor): un chargement bloqué ne retient pas la sortie du processus
+    threading.Thread(target=warm_up, name="memory-warmup", daemon=True).start()
+    return future
+
+
+def memory_warmup_stats() -> Dict[str, Any]:
+    """Durée du préchauffage de la mémoire (None tant qu'il n'est pas terminé)"""
+    return {key: value for key, value in _memory_warmup.items() if key != 'future'}
+
+
+# Taille max d'un résultat read_file dans l'historique (JSON, au-delà: tronqué)
+READ_FILE_MAX_CHARS = 100000
 
 
 class Colors:
@@ -64,46 +129,60 @@ class Colors:
 class ToolExecutor:
     """Exécuteur d'outils pour l'agent"""
     
-    def __init__(self):
-        self.tools = {
+    def __init__(self, cache: Optional[ToolResultCache] = None, cwd: Optional[str] = None):
+        """
+        Args:
+            cache: Cache de résultats partagé (None = cache propre à l'exécuteur)
+            cwd: Répertoire de travail des outils (None = répertoire courant du processus)
+        """
+        self.cwd = cwd
+        # Outils déclarés par chemin d'import, chargés au premier appel
+        self.tools = LazyToolRegistry({
             # File tools
-            'read_file': read_file,
-            'write_file': write_file,
-            'list_files': list_files,
-            'file_exists': file_exists,
-            'append_file': append_file,
-            'replace_in_file': replace_in_file,
+            'read_file': 'tools.file_tools:read_file',
+            'write_file': 'tools.file_tools:write_file',
+            'list_files': 'tools.file_tools:list_files',
+            'file_exists': 'tools.file_tools:file_exists',
+            'append_file': 'tools.file_tools:append_file',
+            'replace_in_file': 'tools.file_tools:replace_in_file',
             
             # Shell tools
-            'execute_command': execute_command,
-            'check_command_exists': check_command_exists,
-            'get_system_info': get_system_info,
+            'execute_command': 'tools.shell_tools:execute_command',
+            'check_command_exists': 'tools.shell_tools:check_command_exists',
+            'get_system_info': 'tools.shell_tools:get_system_info',
             
             # Memory tools
-            'remember': remember,
-            'recall': recall,
-            'search_facts': search_facts,
-            'decide': decide,
+            'remember': 'tools.memory_tools:remember',
+            'remember_many': 'tools.memory_tools:remember_many',
+            'recall': 'tools.memory_tools:recall',
+            'search_facts': 'tools.memory_tools:search_facts',
+            'search_keywords': 'tools.memory_tools:search_keywords',
+            'decide': 'tools.memory_tools:decide',
             
             # Web tools
-            'search_web': search_web,
-            'fetch_webpage': fetch_webpage,
-            'extract_links': extract_links,
-            'summarize_webpage': summarize_webpage,
+            'search_web': 'tools.web_tools:search_web',
+            'fetch_webpage': 'tools.web_tools:fetch_webpage',
+            'extract_links': 'tools.web_tools:extract_links',
+            'summarize_webpage': 'tools.web_tools:summarize_webpage',
             
             # Qdrant backup tools
-            'backup_qdrant': backup_qdrant,
-            'restore_qdrant': restore_qdrant,
-            'list_backups': list_backups,
-            'get_backup_stats': get_backup_stats,
+            'backup_qdrant': 'tools.qdrant_backup:backup_qdrant',
+            'restore_qdrant': 'tools.qdrant_backup:restore_qdrant',
+            'list_backups': 'tools.qdrant_backup:list_backups',
+            'get_backup_stats': 'tools.qdrant_backup:get_backup_stats',
             
             # Git tools
-            'git_status': git_status,
-            'git_diff': git_diff,
-            'git_commit': git_commit,
-            'git_log': git_log,
-            'git_branch_list': git_branch_list,
-        }
+            'git_status': 'tools.git_tools:git_status',
+            'git_diff': 'tools.git_tools:git_diff',
+            'git_commit': 'tools.git_tools:git_commit',
+            'git_log': 'tools.git_tools:git_log',
+            'git_branch_list': 'tools.git_tools:git_branch_list',
+        })
+        
+        # Cache des résultats en lecture seule + préchargement spéculatif
+        self.cache = cache or ToolResultCache()
+        self.prefetcher = Prefetcher(self.cache, self.tools)
+        self.prefetcher.cwd = cwd
     
     def execute(self, tool_name: str, **kwargs) -> Any:
         """
@@ -119,11 +198,34 @@ class ToolExecutor:
         if tool_name not in self.tools:
             return {"error": f"Outil inconnu: {tool_name}"}
         
+        # Répertoire de la session propre au thread appelant (chemins et sous-processus
+        # des outils): ni os.chdir ni verrou partagé entre les sessions du démon
+        with use_working_directory(self.cwd):
+            return self._execute(tool_name, **kwargs)
+    
+    def _execute(self, tool_name: str, **kwargs) -> Any:
+        """Exécute un outil dans le répertoire de la session (avec cache des lectures)"""
+        if tool_name in CACHEABLE_TOOLS:
+            # Un préchargement en cours pour cet appel: l'attendre plutôt que relire
+            self.prefetcher.wait_for(tool_name, kwargs)
+            hit, cached = self.cache.get(tool_name, kwargs)
+            if hit:
+                return cached
+            # Empreinte avant la lecture: une écriture concurrente invalide le résultat
+            fingerprint = self.cache.fingerprint(tool_name, kwargs)
+        
         try:
             result = self.tools[tool_name](**kwargs)
-            return result
         except Exception as e:
             return {"error": str(e), "traceback": traceback.format_exc()}
+        
+        if tool_name in CACHEABLE_TOOLS:
+            self.cache.put(tool_name, kwargs, result, fingerprint=fingerprint)
+        elif tool_name in FILE_WRITE_TOOLS and kwargs.get('file_path'):
+            self.cache.invalidate_path(kwargs['file_path'])
+        elif tool_name in GLOBAL_INVALIDATION_TOOLS:
+            self.cache.clear()
+        return result
     
     def list_available_tools(self) -> List[str]:
         """Liste les outils disponibles"""
@@ -133,7 +235,15 @@ class ToolExecutor:
 class DeepSeekAgent:
     """Agent de développement basé sur DeepSeek avec function calling"""
     
-    def __init__(self):
+    def __init__(self, system_prompt: Optional[str] = None,
+                 tool_cache: Optional[ToolResultCache] = None,
+                 cwd: Optional[str] = None):
+        """
+        Args:
+            system_prompt: Prompt système déjà construit (partagé par le démon)
+            tool_cache: Cache de résultats d'outils partagé entre sessions
+            cwd: Répertoire de travail de la session (None = répertoire courant)
+        """
         self.api_key = os.getenv('DEEPSEEK_API_KEY')
         if not self.api_key:
             raise ValueError("❌ DEEPSEEK_API_KEY non trouvée dans l'environnement")
@@ -147,20 +257,41 @@ class DeepSeekAgent:
         self.max_history_messages = 15  # Augmenté: Max 15 messages pour meilleur contexte
         self.max_context_tokens = 80000  # Augmenté: 80K tokens max (marge 39%)
         self.max_retries = 3  # Nombre max de tentatives auto-correction
-        self.system_prompt = self._load_system_prompt()
-        self.tool_executor = ToolExecutor()
-        self.memory = get_memory()  # Accès direct à la mémoire
+        self.max_iterations = 25  # Éviter les boucles infinies (augmenté pour les tâches complexes)
+        
+        # Limites optionnelles (mode batch): échéance time.monotonic() et budget de tokens input
+        self.deadline: Optional[float] = None
+        self.max_input_tokens: Optional[int] = None
+        self.rate_limiter = None  # Objet avec acquire(), partagé entre processus en mode batch
+        self.last_run = {'iterations': 0, 'stop_reason': None}
+        self.system_prompt = system_prompt or self._load_system_prompt()
+        self.tool_executor = ToolExecutor(cache=tool_cache, cwd=cwd)
+        
+        # Mémoire initialisée en arrière-plan (modèle d'embeddings + Qdrant)
+        self._memory_future = start_memory_warmup()
+        # Attente max de la mémoire avant un tour; au-delà le rappel est ignoré pour ce tour
+        self.memory_wait_timeout = float(os.getenv('DS_MEMORY_WAIT_S', '2.0'))
+        # Budget de tokens des faits injectés à chaque message (reclassés par pertinence et diversité)
+        self.memory_token_budget = int(os.getenv('DS_MEMORY_TOKEN_BUDGET', '150'))
+        # Faits mémoire injectés dans l'historique (ID → texte), réinjectables une fois évincés
+        self.injected_facts: Dict[str, str] = {}
         
         # NOUVEAU: Détection de boucles
         self.tool_call_history = []  # Historique des appels d'outils récents
         self.max_identical_calls = 3  # Max d'appels identiques consécutifs
         
+        # Détection sémantique des itérations sans progrès
+        self.progress = ProgressTracker(max_read_chars=READ_FILE_MAX_CHARS, cwd=self.tool_executor.cwd)
+        
         # Statistiques de tokens (estimation conservative)
         self.token_stats = {
             'total_input': 0,
             'total_output': 0,
             'memory_tokens': 0,
             'memory_queries': 0,
+            'memory_skipped': 0,  # Tours sans rappel (mémoire pas encore prête)
+            'memory_late': 0,  # Rappels abandonnés (échéance dépassée)
+            'memory_tokens_avoided': 0,  # Faits rappelés déjà présents dans le contexte (non réinjectés)
             'history_truncations': 0,
             'auto_corrections': 0,
             'api_errors': 0,
@@ -176,88 +307,40 @@ class DeepSeekAgent:
             'loop_detections': 0  # Nombre de boucles détectées
         }
     
-    def save_conversation(self) -> bool:
-        """Sauvegarde la conversation courante dans la mémoire"""
-        try:
-            if len(self.conversation_history) < 2:
-                return False  # Pas assez de messages à sauvegarder
-            
-            # Extraire les sujets et actions de la conversation
-            topics = []
-            outcomes = []
-            
-            for msg in self.conversation_history:
-                if msg['role'] == 'user':
-                    # Extraire les premiers mots comme sujets
-                    content = msg['content'].replace('[CRITICAL]', '').replace('[IMPORTANT]', '').replace('[CONTEXT]', '').strip()
-                    words = content.split()[:5]
-                    topic = ' '.join(words)
-                    if topic and topic not in topics:
-                        topics.append(topic)
-                elif 'succès' in msg['content'].lower() or 'créé' in msg['content'].lower():
-                    # Extraire les actions réussies
-                    lines = msg['content'].split('\n')
-                    for line in lines[:3]:
-                        if line.strip():
-                            outcomes.append(line.strip()[:100])
-            
-            # Limiter la taille
-            topics = topics[:5]
-            outcomes = outcomes[:5]
+    def memory_ready(self) -> bool:
+        """Indique si l'initialisation de la mémoire est terminée (sans bloquer)"""
+        return self._memory_future.done()
+    
+    def wait_memory(self, timeout: Optional[float] = None):
+        """
+        Attend la mémoire au plus `timeout` secondes
+        
+        Args:
+            timeout: Délai max (None = attendre la fin de l'initialisation)
             
-            # Créer un résumé
-            summary = f"Conversation du {datetime.now().strftime('%Y-%m-%d %H:%M')}: "
-            if self.initial_request:
-                summary += self.initial_request[:200]
-            else:
-                summary += "Session interactive"
+        Returns:
+            Instance QdrantMemory, ou None si elle n'est pas prête à temps
             
-            # Sauvegarder dans Qdrant
-            self.memory.store_conversation_summary(
-                summary=summary,
-                topics=topics,
-                outcomes=outcomes
-            )
-            return True
-        except Exception as e:
-            print(f"{Colors.DIM}⚠️  Erreur sauvegarde conversation: {e}{Colors.RESET}")
-            return False
-    
-    def load_last_conversation(self) -> Optional[str]:
-        """Charge le résumé de la dernière conversation"""
+        Raises:
+            RuntimeError: si l'initialisation a échoué
+        """
         try:
-            # Rechercher toutes les conversations (sans order_by qui nécessite un index)
-            results = self.memory.client.scroll(
-                collection_name=self.memory.collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(key="type", match=MatchValue(value="conversation"))]
-                ),
-                limit=100,  # Récupérer jusqu'à 100 conversations
-                with_payload=True
-            )
-            
-            if results and len(results[0]) > 0:
-                # Trier côté client par timestamp (ISO format se trie alphabétiquement)
-                conversations = results[0]
-                if conversations:
-                    # Trier par timestamp décroissant
-                    sorted_convs = sorted(
-                        conversations,
-                        key=lambda x: x.payload.get('timestamp', ''),
-                        reverse=True
-                    )
-                    last_conv = sorted_convs[0].payload
-                    summary = f"📜 Dernière conversation:\n"
-                    summary += f"  {last_conv.get('summary', 'N/A')}\n"
-                    if last_conv.get('topics'):
-                        summary += f"  Sujets: {', '.join(last_conv['topics'][:3])}\n"
-                    if last_conv.get('outcomes'):
-                        summary += f"  Actions: {', '.join(last_conv['outcomes'][:2])}"
-                    return summary
+            return self._memory_future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
         except Exception as e:
-            print(f"{Colors.DIM}⚠️  Erreur chargement conversation: {e}{Colors.RESET}")
-        return None
-        
+            raise RuntimeError(f"Mémoire indisponible: {e}")
+    
+    @property
+    def memory(self):
+        """Accès à la mémoire (attend la fin de l'initialisation en arrière-plan)"""
+        return self.wait_memory()
+    
+    def memory_namespace(self) -> str:
+        """Espace de noms mémoire de la session (racine git de son répertoire de travail)"""
+        from tools.memory_tools import current_namespace
+        return current_namespace(self.tool_executor.cwd)
+    
     def _load_system_prompt(self) -> str:
         """Charge les instructions système depuis SYSTEM.md"""
         system_file = Path(__file__).parent / "SYSTEM.md"
@@ -292,9 +375,11 @@ Syntaxe: <tool>{"name": "outil", "parameters": {...}}</tool>
 - get_system_info() → infos système
 
 **Mémoire:**
-- remember(fact: str, category: str = "general") → mémorise un fait
+- remember(fact: str, category: str = "general", scope: str = "project") → mémorise un fait (scope="global": visible depuis tous les projets)
+- remember_many(facts: list, category: str = "general", scope: str = "project") → mémorise un lot de faits (import en masse)
 - recall(category: str = None, limit: int = 10) → récupère faits par catégorie
 - search_facts(query: str, limit: int = 5) → recherche sémantique dans les faits
+- search_keywords(query: str, limit: int = 5) → recherche par mots-clés exacts (fichier, fonction, code d'erreur), sans embedding
 - decide(decision: str, reasoning: str) → enregistre une décision
 
 **Web:**
@@ -582,11 +667,20 @@ Notes:
             
             print(f"\n{Colors.YELLOW}🔧 Exécution: {tool_name}({json.dumps(parameters, ensure_ascii=False)}){Colors.RESET}")
             
-            result = self.tool_executor.execute(tool_name, **parameters)
+            # Appel sans progrès possible (relecture inchangée, édition en échec répété)
+            blocked = self.progress.check(tool_name, parameters)
+            if blocked:
+                result = blocked
+                guidance = blocked['hint']
+            else:
+                result = self.tool_executor.execute(tool_name, **parameters)
+                guidance = self.progress.record(tool_name, parameters, result)
+            
             results.append({
                 "tool": tool_name,
                 "parameters": parameters,
-                "result": result
+                "result": result,
+                "guidance": guidance
             })
             
             # Afficher le résultat
@@ -650,6 +744,7 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
                 "max_tokens": 200
             }
             
+            self._wait_rate_limit()
             response = requests.post(self.api_url, headers=headers, json=data, timeout=10)
             if response.status_code == 200:
                 result = response.json()
@@ -671,7 +766,7 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
         result_str = json.dumps(result, ensure_ascii=False, indent=2)
         
         # Limite très grande pour read_file (agent lit ~1000 lignes à la fois)
-        effective_max = 100000 if tool_name == "read_file" else max_chars
+        effective_max = READ_FILE_MAX_CHARS if tool_name == "read_file" else max_chars
         
         if len(result_str) <= effective_max:
             return result_str
@@ -682,6 +777,16 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
     
     def _truncate_history(self):
         """Tronque l'historique si trop long (garde TOUJOURS le 1er message utilisateur + messages récents)"""
+        history_size = len(self.conversation_history)
+        try:
+            self._truncate_history_steps()
+        finally:
+            if len(self.conversation_history) < history_size:
+                # Des lectures ont pu sortir du contexte: les relire redevient légitime
+                self.progress.prune_reads("".join(m['content'] for m in self.conversation_history))
+    
+    def _truncate_history_steps(self):
+        """Étapes de troncature: compression, filtrage par importance, limites messages/tokens"""
         # NOUVEAU: Étape 1 - Compression du contexte (éliminer répétitions)
         self._compress_context()
         
@@ -805,28 +910,91 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
             self.token_stats['history_truncations'] += 1
             print(f"{Colors.DIM}✂️  Message ancien supprimé (tokens: {self._estimate_tokens(removed_msg['content'])}){Colors.RESET}")
     
-    def _get_relevant_memory(self, user_message: str, max_facts: int = 3, min_score: float = 0.4) -> str:
+    def _start_memory_recall(self, user_message: str, min_score: float = 0.4) -> Optional[tuple]:
         """
-        Récupère les faits pertinents de la mémoire (avec limite stricte)
+        Lance la recherche des faits pertinents sans attendre son résultat
+        
+        Les faits sont reclassés (similarité, fraîcheur, utilisation, diversité)
+        et sélectionnés dans la limite de memory_token_budget.
         
         Args:
             user_message: Message de l'utilisateur
-            max_facts: Nombre max de faits (limite tokens)
             min_score: Score minimum de pertinence
             
         Returns:
-            Contexte mémoire formaté (compact)
+            (mémoire, future, instant de lancement), ou None si la mémoire n'est pas disponible
         """
         try:
-            # Recherche sémantique
-            relevant_facts = self.memory.search_facts(user_message, limit=max_facts)
+            memory = self.wait_memory(self.memory_wait_timeout)
+            if memory is None:
+                # Préchauffage pas terminé: ce tour part sans rappel plutôt que d'attendre
+                self.token_stats['memory_skipped'] += 1
+                print(f"{Colors.DIM}🧠 Mémoire en cours de chargement: rappel ignoré pour ce message{Colors.RESET}")
+                return None
+            recall = memory.submit_recall(user_message, self.memory_token_budget, min_score=min_score,
+                                          namespace=self.memory_namespace(),
+                                          in_context=self._facts_in_context())
+            return memory, recall, time.monotonic()
+        except Exception as e:
+            # Ne pas crasher si la mémoire échoue
+            print(f"{Colors.DIM}⚠️  Mémoire indisponible: {e}{Colors.RESET}")
+            return None
+    
+    def _facts_in_context(self) -> set:
+        """
+        IDs des faits mémoire encore présents dans l'historique
+        
+        Un fait évincé (troncature, compression, /clear) est oublié: il pourra être réinjecté.
+        """
+        if not self.injected_facts:
+            return set()
+        user_contents = [msg['content'] for msg in self.conversation_history if msg['role'] == 'user']
+        self.injected_facts = {
+            fact_id: text for fact_id, text in self.injected_facts.items()
+            if any(text in content for content in user_contents)
+        }
+        return set(self.injected_facts)
+    
+    def _get_relevant_memory(self, recall: Optional[tuple]) -> str:
+        """
+        Récupère les faits pertinents d'un rappel lancé (avec échéance et budget de tokens)
+        
+        Args:
+            recall: Rappel lancé par _start_memory_recall
             
-            # Filtrer par score
-            relevant_facts = [f for f in relevant_facts if f.get('score', 0) >= min_score]
+        Returns:
+            Contexte mémoire formaté (compact) avec les seuls faits absents du contexte,
+            vide si le rappel arrive après l'échéance
+        """
+        if recall is None:
+            return ""
+        memory, future, started = recall
+        try:
+            relevant_facts = memory.result_within(future, "search", started)
+            if relevant_facts is None:
+                # Qdrant trop lent: le résultat en retard est abandonné pour ce tour
+                self.token_stats['memory_late'] += 1
+                print(f"{Colors.DIM}🧠 Rappel mémoire hors délai ({memory.deadline('search'):.1f}s): ignoré pour ce message{Colors.RESET}")
+                return ""
             
             if not relevant_facts:
                 return ""
             
+            # Utilisation des faits rappelés (score de rétention de la consolidation)
+            memory.record_usage([fact['id'] for fact in relevant_facts])
+            
+            # Injection différentielle: un fait encore dans l'historique n'est pas répété
+            # (re-vérifié ici: la troncature a pu l'évincer pendant la recherche)
+            present = self._facts_in_context()
+            already = [fact for fact in relevant_facts if fact['id'] in present]
+            relevant_facts = [fact for fact in relevant_facts if fact['id'] not in present]
+            self.token_stats['memory_tokens_avoided'] += sum(
+                self._estimate_tokens(fact['fact']) for fact in already
+            )
+            if not relevant_facts:
+                return ""
+            self.injected_facts.update((fact['id'], fact['fact']) for fact in relevant_facts)
+            
             # Formater de manière COMPACTE pour économiser tokens
             context = "\n[Mémoire: "
             facts_text = []
@@ -849,8 +1017,15 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
     def chat(self, user_message: str, stream: bool = True) -> str:
         """Envoie un message à DeepSeek et récupère la réponse avec exécution des outils"""
         
-        # RAPPEL AUTOMATIQUE de la mémoire (avec limite stricte)
-        memory_context = self._get_relevant_memory(user_message, max_facts=3, min_score=0.4)
+        # RAPPEL AUTOMATIQUE de la mémoire (avec limite stricte), lancé sans attendre
+        recall = self._start_memory_recall(user_message, min_score=0.4)
+        
+        # Préparation indépendante du rappel, pendant la recherche
+        self.progress.new_request()
+        self._truncate_history()
+        
+        # Résultat du rappel au plus tard à son échéance
+        memory_context = self._get_relevant_memory(recall)
         
         # Ajouter contexte mémoire au message si pertinent
         if memory_context:
@@ -868,11 +1043,22 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
         if self.initial_request is None and not enhanced_message.startswith("## Résultats des outils:"):
             self.initial_request = user_message  # Version originale sans contexte mémoire
         
-        max_iterations = 25  # Éviter les boucles infinies (augmenté pour les tâches complexes)
+        max_iterations = self.max_iterations
         iteration = 0
+        last_tool_calls: List[Dict] = []
+        full_response = ""
+        self.last_run = {'iterations': 0, 'stop_reason': None}
         
         while iteration < max_iterations:
+            # Limites du mode batch (temps, tokens)
+            limit_reason = self._limit_reached()
+            if limit_reason:
+                self.last_run['stop_reason'] = limit_reason
+                print(f"{Colors.YELLOW}⚠️  Limite atteinte ({limit_reason}){Colors.RESET}")
+                return full_response
+            
             iteration += 1
+            self.last_run['iterations'] = iteration
             
             # Tronquer l'historique si nécessaire (AVANT chaque requête)
             self._truncate_history()
@@ -914,7 +1100,11 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
             
             # Estimer tokens envoyés
             total_content = "".join([m['content'] for m in messages])
-            self.token_stats['total_input'] += self._estimate_tokens(total_content)
+            request_tokens = self._estimate_tokens(total_content)
+            self.token_stats['total_input'] += request_tokens
+            
+            # Préchargement spéculatif pendant l'appel API
+            self.tool_executor.prefetcher.schedule(last_tool_calls)
             
             if stream:
                 full_response = self._stream_response(headers, data)
@@ -929,10 +1119,12 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
             
             if not tool_calls:
                 # Pas d'appel d'outil, c'est la réponse finale
+                self.last_run['stop_reason'] = 'completed'
                 return full_response
             
             # Exécuter les outils
             tool_results = self._execute_tool_calls(tool_calls)
+            last_tool_calls = tool_calls
             
             # CRITIQUE: Tronquer les résultats AVANT d'ajouter à l'historique
             results_text = "\n\n## Résultats des outils:\n\n"
@@ -941,6 +1133,19 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
                 truncated_result = self._truncate_tool_result(result['result'], max_chars=10000, tool_name=result['tool'])
                 results_text += f"**{result['tool']}**: {truncated_result}\n\n"
             
+            # Conseils ciblés du suivi de progression
+            guidance = [r['guidance'] for r in tool_results if r.get('guidance')]
+            if guidance:
+                results_text += "⚠️ **PROGRESSION**: " + " ".join(dict.fromkeys(guidance)) + "\n\n"
+            
+            # Arrêt anticipé après plusieurs itérations sans progrès
+            if self.progress.end_iteration():
+                self.progress.record_early_stop()
+                print(f"\n{Colors.YELLOW}⚠️  Arrêt anticipé: {self.progress.stalled_iterations} itérations sans progrès{Colors.RESET}")
+                self.last_run['stop_reason'] = 'no_progress'
+                self.add_message("user", results_text)
+                return full_response
+            
             # Tronquer l'historique AVANT d'ajouter les nouveaux résultats
             self._truncate_history()
             
@@ -948,13 +1153,29 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
             
             print(f"\n{Colors.MAGENTA}🔄 L'agent analyse les résultats...{Colors.RESET}\n")
         
+        self.last_run['stop_reason'] = 'max_iterations'
         print(f"{Colors.YELLOW}⚠️  Nombre maximum d'itérations atteint{Colors.RESET}")
         print(f"{Colors.YELLOW}💡 Dernière réponse de l'agent:{Colors.RESET}")
         return full_response
     
+    def _limit_reached(self) -> Optional[str]:
+        """Vérifie les limites optionnelles (échéance, budget de tokens)"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return 'timeout'
+        if self.max_input_tokens is not None and self.token_stats['total_input'] >= self.max_input_tokens:
+            return 'token_budget'
+        return None
+    
+    def _wait_rate_limit(self):
+        """Attend le limiteur de débit partagé (mode batch) avant un appel API"""
+        if self.rate_limiter is not None:
+            waited = self.rate_limiter.acquire() or 0.0
+            self.last_run['rate_limit_wait'] = self.last_run.get('rate_limit_wait', 0.0) + waited
+    
     def _stream_response(self, headers: Dict, data: Dict, retry_count: int = 0) -> str:
         """Récupère une réponse en streaming avec auto-correction"""
         try:
+            self._wait_rate_limit()
             response = requests.post(
                 self.api_url,
                 headers=headers,
@@ -1017,6 +1238,7 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
     def _get_response(self, headers: dict, data: dict, retry_count: int = 0) -> str:
         """Récupère une réponse complète (non streaming) avec auto-correction"""
         try:
+            self._wait_rate_limit()
             response = requests.post(
                 self.api_url,
                 headers=headers,
@@ -1055,11 +1277,18 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
     def clear_history(self):
         """Efface l'historique de la conversation"""
         self.conversation_history = []
+        self.injected_facts = {}
         print(f"{Colors.YELLOW}🔄 Historique effacé{Colors.RESET}")
     
     def save_conversation(self) -> bool:
         """Sauvegarde la conversation courante dans la mémoire"""
         try:
+            if self.memory_ready():
+                # Écritures différées des outils, puis utilisations des faits rappelés
+                if not self.memory.flush_writes(timeout=self.memory.deadline("write")):
+                    print(f"{Colors.DIM}⚠️  Écritures mémoire encore en attente{Colors.RESET}")
+                self.memory.call_with_deadline("write", self.memory.flush_usage)
+            
             if len(self.conversation_history) < 2:
                 return False  # Pas assez de messages à sauvegarder
             
@@ -1070,7 +1299,8 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
             for msg in self.conversation_history:
                 if msg['role'] == 'user':
                     # Extraire les premiers mots comme sujets
-                    words = msg['content'].split()[:5]
+                    content = msg['content'].replace('[CRITICAL]', '').replace('[IMPORTANT]', '').replace('[CONTEXT]', '').strip()
+                    words = content.split()[:5]
                     topic = ' '.join(words)
                     if topic and topic not in topics:
                         topics.append(topic)
@@ -1092,33 +1322,28 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
             else:
                 summary += "Session interactive"
             
-            # Sauvegarder dans Qdrant
-            self.memory.store_conversation_summary(
+            # Sauvegarder dans Qdrant (échéance d'écriture)
+            stored = self.memory.call_with_deadline(
+                "write", self.memory.store_conversation_summary,
                 summary=summary,
                 topics=topics,
-                outcomes=outcomes
+                outcomes=outcomes,
+                namespace=self.memory_namespace()
             )
+            if stored is None:
+                print(f"{Colors.DIM}⚠️  Sauvegarde de la conversation hors délai{Colors.RESET}")
+                return False
             return True
         except Exception as e:
             print(f"{Colors.DIM}⚠️  Erreur sauvegarde conversation: {e}{Colors.RESET}")
             return False
     
     def load_last_conversation(self) -> Optional[str]:
-        """Charge le résumé de la dernière conversation"""
+        """Charge le résumé de la dernière conversation (une requête triée côté serveur)"""
         try:
-            # Rechercher les conversations récentes
-            results = self.memory.client.scroll(
-                collection_name=self.memory.collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(key="type", match=MatchValue(value="conversation"))]
-                ),
-                limit=1,
-                with_payload=True,
-                order_by="timestamp"
-            )
-            
-            if results and len(results[0]) > 0:
-                last_conv = results[0][0].payload
+            last_conv = self.memory.call_with_deadline("read", self.memory.get_last_conversation,
+                                                       namespace=self.memory_namespace())
+            if last_conv:
                 summary = f"📜 Dernière conversation:\n"
                 summary += f"  {last_conv.get('summary', 'N/A')}\n"
                 if last_conv.get('topics'):
@@ -1178,6 +1403,19 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
         print(f"  Erreurs API: {self.token_stats.get('api_errors', 0)}")
         print(f"  Auto-corrections: {self.token_stats.get('auto_corrections', 0)}")
         print(f"  Boucles détectées: {self.token_stats.get('loop_detections', 0)}")
+        progress_stats = self.progress.stats
+        print(f"  Itérations sans progrès: {progress_stats['stalled_iterations']} "
+              f"({progress_stats['blocked_calls']} appels bloqués, {progress_stats['early_stops']} arrêts anticipés)")
+        print(f"  Tokens de relectures évitées: ~{progress_stats['tokens_saved']:,}")
+        
+        # Cache d'outils et préchargement
+        cache_stats = self.tool_executor.cache.get_statistics()
+        print(f"\n{Colors.CYAN}⚡ Cache d'outils:{Colors.RESET}")
+        print(f"  Hits: {cache_stats['hits']} / {cache_stats['hits'] + cache_stats['misses']} ({cache_stats['hit_rate']*100:.1f}%)")
+        print(f"  Entrées: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.1f} KB)")
+        for rule, rule_stats in self.tool_executor.prefetcher.get_statistics().items():
+            status = "" if rule_stats['active'] else " (désactivée)"
+            print(f"  Préchargement {rule}: {rule_stats['hits']}/{rule_stats['issued']} utilisés ({rule_stats['hit_rate']*100:.1f}%){status}")
         if self.token_stats.get('api_errors', 0) > 0:
             success_rate = (1 - self.token_stats.get('api_errors', 0) / max(user_msgs, 1)) * 100
             print(f"  Taux de succès: {success_rate:.1f}%")
@@ -1193,17 +1431,67 @@ Résumé (3 lignes max, format: 'Objectif: ... | Fait: ... | Reste: ...'):"""
         print(f"  Tokens input:  ~{self.token_stats['total_input']:,} (${input_cost:.6f})")
         print(f"  Tokens output: ~{self.token_stats['total_output']:,} (${output_cost:.6f})")
         print(f"  Tokens mémoire: ~{self.token_stats['memory_tokens']:,} ({self.token_stats['memory_queries']} requêtes, ${memory_cost:.6f})")
+        print(f"  Tokens mémoire évités: ~{self.token_stats['memory_tokens_avoided']:,} (faits déjà dans le contexte)")
         print(f"  {Colors.BOLD}Coût total estimé: ${total_cost:.6f}{Colors.RESET}")
-        print(f"{Colors.DIM}  (Tarif: $0.14/1M input, $0.28/1M output - Limite mémoire: 3 faits × 50 tokens max){Colors.RESET}")
+        print(f"{Colors.DIM}  (Tarif: $0.14/1M input, $0.28/1M output - Budget mémoire: {self.memory_token_budget} tokens/message){Colors.RESET}")
         
         # Stats mémoire
-        memory = get_memory()
-        mem_stats = memory.get_statistics()
+        warmup = memory_warmup_stats()
+        if not self.memory_ready():
+            print(f"\n{Colors.CYAN}🧠 Mémoire Qdrant:{Colors.RESET} en cours de chargement "
+                  f"({time.perf_counter() - warmup['started_at']:.1f}s écoulées)")
+            return
+        if warmup['error']:
+            print(f"\n{Colors.CYAN}🧠 Mémoire Qdrant:{Colors.RESET} indisponible ({warmup['error']})")
+            return
+        mem_stats = self.memory.get_statistics()
         print(f"\n{Colors.CYAN}🧠 Mémoire Qdrant:{Colors.RESET}")
-        print(f"  Faits: {mem_stats['total_facts']}")
+        print(f"  Préchauffage: {warmup['duration_s']:.1f}s en arrière-plan "
+              f"({self.token_stats['memory_skipped']} tour(s) sans rappel)")
+        if self.token_stats['memory_late'] or self.memory.deadline_stats:
+            late = ", ".join(f"{op}: {count}" for op, count in self.memory.deadline_stats.items())
+            print(f"  Échéances dépassées: {late} ({self.token_stats['memory_late']} rappel(s) abandonné(s))")
+        namespace = self.memory_namespace()
+        print(f"  Faits: {mem_stats['total_facts']} (projet {namespace}: {mem_stats['namespaces'].get(namespace, 0)}, "
+              f"global: {mem_stats['namespaces'].get('global', 0)})")
+        if mem_stats.get('categories'):
+            categories = sorted(mem_stats['categories'].items(), key=lambda item: -item[1])
+            print(f"    {', '.join(f'{name}: {count}' for name, count in categories[:8])}")
         print(f"  Décisions: {mem_stats['total_decisions']}")
         print(f"  Conversations: {mem_stats['total_conversations']}")
         print(f"  Total points: {mem_stats['total_points']}")
+        
+        cache_stats = self.memory.embedding_cache.get_statistics()
+        print(f"  Cache d'embeddings: {cache_stats['hit_rate']*100:.1f}% de hits "
+              f"({cache_stats['memory_hits']} mémoire, {cache_stats['disk_hits']} disque, {cache_stats['misses']} calculs)")
+        
+        if self.memory.local_index is not None:
+            index_stats = self.memory.local_index.get_statistics()
+            if index_stats['ready']:
+                print(f"  Index local: {index_stats['points']} points, {index_stats['searches']} recherches "
+                      f"(~{index_stats['avg_search_us']:.0f} µs/recherche)")
+            else:
+                print(f"  Index local: inactif (collection > {index_stats['max_points']} points)")
+        
+        if self.memory.write_queue is not None:
+            write_stats = self.memory.write_queue.get_statistics()
+            print(f"  Écritures différées: {write_stats['written']} points en {write_stats['batches']} lot(s) "
+                  f"({write_stats['pending']} en attente, {write_stats['errors']} erreur(s))")
+        
+        cache_stats = self.memory.search_cache.get_statistics()
+        print(f"  Cache de recherche: {cache_stats['hit_rate']:.0%} de succès "
+              f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}, "
+              f"{cache_stats['invalidations']} invalidation(s))")
+        
+        if self.memory.local_store is not None:
+            store_stats = self.memory.local_store.get_statistics()
+            print(f"  Niveau local SQLite: {store_stats['points']} points, {store_stats['reads']} lecture(s) "
+                  f"(~{store_stats['avg_read_us']:.0f} µs)")
+        
+        if self.memory.hybrid_search:
+            lexical_stats = self.memory.lexical_index.get_statistics()
+            print(f"  Recherche hybride (BM25 + dense): {lexical_stats['documents']} faits, "
+                  f"{lexical_stats['terms']} termes indexés")
 
     
     def show_tools(self):
@@ -1247,6 +1535,9 @@ def print_help():
 {Colors.BOLD}/backup{Colors.RESET} - Sauvegarde la mémoire Qdrant
 {Colors.BOLD}/backups{Colors.RESET} - Liste les backups disponibles
 {Colors.BOLD}/restore <file>{Colors.RESET} - Restaure depuis un backup
+{Colors.BOLD}/optimize [int8|noint8]{Colors.RESET} - Index de payload, HNSW (et quantification int8 activée/retirée) sur la collection
+{Colors.BOLD}/consolidate [dry]{Colors.RESET} - Fusionne les faits en double et plafonne la mémoire
+{Colors.BOLD}/migrate <backend> [modèle]{Colors.RESET} - Ré-embedde la mémoire avec un nouveau modèle (bascule par alias)
 {Colors.BOLD}/last{Colors.RESET}   - Affiche la dernière conversation
 {Colors.BOLD}/help{Colors.RESET}   - Affiche cette aide
 {Colors.BOLD}/quit{Colors.RESET}   - Quitte le chat (ou Ctrl+D)
@@ -1266,8 +1557,216 @@ L'historique des commandes est sauvegardé dans ~/.deepseek_agent_history{Colors
     print(help_text)
 
 
+def handle_command(agent: DeepSeekAgent, user_input: str) -> bool:
+    """
+    Exécute une commande spéciale (/stats, /backup, /last...)
+    
+    Args:
+        agent: Agent de la session
+        user_input: Ligne saisie (commence par '/')
+        
+    Returns:
+        True si la session doit se terminer (/quit)
+    """
+    command = user_input.lower()
+    
+    if command == '/quit' or command == '/q':
+        # Sauvegarder la conversation dans la mémoire
+        print(f"{Colors.CYAN}💾 Sauvegarde de la conversation...{Colors.RESET}")
+        if agent.save_conversation():
+            print(f"{Colors.GREEN}✅ Conversation sauvegardée{Colors.RESET}")
+        print(f"{Colors.YELLOW}👋 Au revoir !{Colors.RESET}")
+        return True
+    elif command == '/clear':
+        agent.clear_history()
+    elif command == '/stats':
+        agent.show_stats()
+    elif command == '/tools':
+        agent.show_tools()
+    elif command == '/backup':
+        print(f"{Colors.CYAN}💾 Backup de la mémoire Qdrant...{Colors.RESET}")
+        result = agent.tool_executor.tools['backup_qdrant']()
+        if result.get('success'):
+            print(f"{Colors.GREEN}✅ Backup réussi !{Colors.RESET}")
+            print(f"  Fichier: {result['backup_file']}")
+            print(f"  Points: {result['total_points']}")
+            print(f"  Taille: {result['file_size'] / 1024:.1f} KB")
+            if result.get('statistics'):
+                print(f"  Types: {result['statistics']}")
+        else:
+            print(f"{Colors.RED}❌ Erreur: {result.get('error')}{Colors.RESET}")
+    elif command.startswith('/restore '):
+        backup_file = user_input[9:].strip()
+        if not backup_file:
+            print(f"{Colors.RED}❌ Usage: /restore <fichier_backup>{Colors.RESET}")
+        else:
+            print(f"{Colors.CYAN}♻️  Restauration depuis {backup_file}...{Colors.RESET}")
+            result = agent.tool_executor.tools['restore_qdrant'](backup_file)
+            if result.get('success'):
+                print(f"{Colors.GREEN}✅ Restauration réussie !{Colors.RESET}")
+                print(f"  Collection: {result['collection']}")
+                print(f"  Points restaurés: {result['points_restored']}")
+            else:
+                print(f"{Colors.RED}❌ Erreur: {result.get('error')}{Colors.RESET}")
+    elif command == '/backups':
+        backups = agent.tool_executor.tools['list_backups']()
+        if not backups:
+            print(f"{Colors.YELLOW}ℹ️  Aucun backup trouvé{Colors.RESET}")
+        else:
+            print(f"{Colors.CYAN}📦 Backups disponibles:{Colors.RESET}")
+            for backup in backups:
+                print(f"\n  📄 {backup['filename']}")
+                print(f"     Taille: {backup['size'] / 1024:.1f} KB")
+                print(f"     Points: {backup['total_points']}")
+                print(f"     Date: {backup['created'][:19]}")
+    elif command == '/optimize' or command.startswith('/optimize '):
+        from tools.qdrant_schema import optimize_collection, collection_search_params
+        # int8 = activer, noint8 = retirer la quantification, sans argument = inchangée
+        quantization = {'int8': True, 'noint8': False}.get(' '.join(command.split()[1:]))
+        print(f"{Colors.CYAN}⚙️  Optimisation de la collection Qdrant...{Colors.RESET}")
+        result = optimize_collection(quantization=quantization)
+        if result.get('success'):
+            print(f"{Colors.GREEN}✅ Collection {result['collection']} optimisée{Colors.RESET}")
+            if result.get('note'):
+                print(f"{Colors.DIM}  {result['note']}{Colors.RESET}")
+            else:
+                print(f"  Index créés: {', '.join(result['indexes_created']) or 'aucun (déjà présents)'}")
+                print(f"  HNSW: m={result['hnsw']['m']}, ef_construct={result['hnsw']['ef_construct']}")
+                print(f"  Quantification: {result['quantization'] or 'aucune'}")
+            for label, key in (("Recherche", "search"), ("Scroll", "scroll")):
+                before = result['latency_before'].get(key)
+                after = result['latency_after'].get(key)
+                if before and after:
+                    print(f"  {label}: p50 {before['p50_ms']:.2f} → {after['p50_ms']:.2f} ms, "
+                          f"p95 {before['p95_ms']:.2f} → {after['p95_ms']:.2f} ms")
+            if agent.memory_ready():
+                try:
+                    memory = agent.memory
+                    memory.search_params = collection_search_params(memory.client, memory.collection_name)
+                except RuntimeError:
+                    pass  # Mémoire indisponible: rien à mettre à jour
+        else:
+            print(f"{Colors.RED}❌ Erreur: {result.get('error')}{Colors.RESET}")
+    elif command == '/consolidate' or command.startswith('/consolidate '):
+        from tools.memory_consolidation import consolidate_memory
+        dry_run = command.split()[1:] == ['dry']
+        print(f"{Colors.CYAN}🧹 Consolidation de la mémoire{' (simulation)' if dry_run else ''}...{Colors.RESET}")
+        try:
+            result = consolidate_memory(agent.memory, dry_run=dry_run)
+        except RuntimeError as e:
+            result = {'success': False, 'error': str(e)}
+        if result.get('success'):
+            print(f"{Colors.GREEN}✅ {result['points_before']} → {result['points_after']} points "
+                  f"(-{result['reduction_pct']}%) en {result['duration_s']:.1f}s{Colors.RESET}")
+            print(f"  Faits fusionnés: {result['facts_merged']} ({result['clusters']} groupes de doublons)")
+            print(f"  Faits au-delà du plafond par catégorie: {result['facts_capped']}")
+            print(f"  Anciennes conversations: {result['conversations_capped']}")
+        else:
+            print(f"{Colors.RED}❌ Erreur: {result.get('error')}{Colors.RESET}")
+    elif command.startswith('/migrate '):
+        from tools.memory_migration import migrate_embeddings
+        from tools.memory_tools import get_embedding_backend
+        args = user_input.split()[1:]
+        print(f"{Colors.CYAN}🔁 Migration de la mémoire vers {' '.join(args)}...{Colors.RESET}")
+        try:
+            result = migrate_embeddings(get_embedding_backend(args[0], args[1] if len(args) > 1 else None))
+        except (RuntimeError, ValueError) as e:
+            result = {'success': False, 'error': str(e)}
+        if result.get('success'):
+            print(f"{Colors.GREEN}✅ {result['points_migrated']} points ré-embeddés ({result['vector_space']}) "
+                  f"en {result['duration_s']:.1f}s{' (reprise)' if result['resumed'] else ''}{Colors.RESET}")
+            print(f"  Alias {result['alias']} → {result['target']}")
+            if result.get('backup_file'):
+                print(f"  Backup de l'ancienne collection: {result['backup_file']}")
+            if result.get('preserved_source'):
+                print(f"  Ancienne collection conservée: {result['preserved_source']}")
+            print(f"{Colors.DIM}  Définir DS_EMBEDDING_BACKEND / DS_EMBEDDING_MODEL pour les prochains lancements{Colors.RESET}")
+        else:
+            print(f"{Colors.RED}❌ Erreur: {result.get('error')}{Colors.RESET}")
+    elif command == '/last':
+        last_conv = agent.load_last_conversation()
+        if last_conv:
+            print(last_conv)
+        else:
+            print(f"{Colors.YELLOW}ℹ️  Aucune conversation précédente trouvée{Colors.RESET}")
+    elif command == '/help' or command == '/?':
+        print_help()
+    else:
+        print(f"{Colors.RED}❌ Commande inconnue: {user_input}{Colors.RESET}")
+        print(f"{Colors.DIM}Tapez /help pour voir les commandes disponibles{Colors.RESET}")
+
+    return False
+
+
+def print_consolidation_notice(result: Dict):
+    """Affiche le résultat d'une consolidation périodique (s'il a changé quelque chose)"""
+    if not result.get('success'):
+        print(f"{Colors.YELLOW}⚠️  Consolidation périodique échouée: {result.get('error')}{Colors.RESET}")
+    elif result['points_before'] != result['points_after']:
+        print(f"{Colors.DIM}🧹 Mémoire consolidée: {result['points_before']} → {result['points_after']} points{Colors.RESET}")
+
+
+def print_startup_profile(agent: Optional[DeepSeekAgent] = None):
+    """Affiche le profil de démarrage (--profile-startup)"""
+    print(f"\n{Colors.CYAN}⏱️  Profil de démarrage:{Colors.RESET}")
+    previous = 0.0
+    for label, elapsed in STARTUP_PROFILE:
+        print(f"  {elapsed*1000:8.1f} ms  (+{(elapsed - previous)*1000:7.1f} ms)  {label}")
+        previous = elapsed
+    if agent is not None:
+        loaded = agent.tool_executor.tools.load_times
+        if loaded:
+            print(f"{Colors.DIM}  Modules d'outils déjà importés:{Colors.RESET}")
+            for module, duration in loaded.items():
+                print(f"    {duration*1000:8.1f} ms  {module}")
+        warmup = memory_warmup_stats()
+        if agent.memory_ready():
+            status = f"prête (préchauffage: {warmup['duration_s']*1000:.0f} ms)"
+            if warmup['error']:
+                status = f"indisponible après {warmup['duration_s']*1000:.0f} ms ({warmup['error']})"
+        else:
+            status = "en cours de chargement (arrière-plan)"
+        print(f"{Colors.DIM}  Mémoire: {status}{Colors.RESET}")
+    print(f"{Colors.DIM}  Détail des imports: python -X importtime main.py{Colors.RESET}\n")
+
+
 def main():
     """Point d'entrée principal"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="DeepSeek Dev Agent - Chat CLI interactif")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Affiche le temps passé dans chaque étape du démarrage")
+    parser.add_argument('--batch', metavar='TASKS_JSONL',
+                        help="Mode non interactif: exécute les tâches d'un fichier JSONL (voir batch.py)")
+    parser.add_argument('--output', default='batch_results.jsonl', help="Résultats du mode batch (JSONL)")
+    parser.add_argument('--workers', type=int, default=4, help="Processus agents en mode batch")
+    parser.add_argument('--rpm', type=float, default=60.0, help="Requêtes API par minute en mode batch")
+    parser.add_argument('--connect', action='store_true',
+                        help="Ouvre une session sur le démon (python daemon.py serve)")
+    parser.add_argument('--socket', default=None, help="Socket Unix du démon")
+    args = parser.parse_args()
+    
+    if args.connect:
+        import daemon
+        daemon.connect(args.socket or daemon.DEFAULT_SOCKET)
+        return
+    
+    if args.batch:
+        from batch import main as batch_main
+        batch_main([args.batch, '--output', args.output, '--workers', str(args.workers), '--rpm', str(args.rpm)])
+        return
+    
+    # Le préchauffage démarre avant la construction de l'agent (prompt système, outils)
+    start_memory_warmup()
+    _mark_startup("préchauffage mémoire lancé")
+    
+    # Consolidation périodique optionnelle (DS_MEMORY_CONSOLIDATE_HOURS)
+    # Résultats affichés avant le prompt suivant, jamais pendant la saisie
+    consolidation_results = queue.SimpleQueue()
+    if float(os.getenv('DS_MEMORY_CONSOLIDATE_HOURS', '0')) > 0:
+        from tools.memory_consolidation import start_consolidation_task
+        start_consolidation_task(on_result=consolidation_results.put)
     
     try:
         agent = DeepSeekAgent()
@@ -1275,21 +1774,32 @@ def main():
         print(f"{Colors.RED}{e}{Colors.RESET}")
         print(f"{Colors.YELLOW}💡 Définissez votre clé API: export DEEPSEEK_API_KEY='votre-clé'{Colors.RESET}")
         sys.exit(1)
+    _mark_startup("initialisation de l'agent")
     
     print_banner()
     print(f"{Colors.GREEN}✓ Agent initialisé avec succès{Colors.RESET}")
     print(f"{Colors.DIM}Instructions système chargées depuis SYSTEM.md{Colors.RESET}")
     print(f"{Colors.DIM}Outils disponibles: {len(agent.tool_executor.list_available_tools())}{Colors.RESET}\n")
     
-    # Charger et afficher la dernière conversation
-    last_conv = agent.load_last_conversation()
-    if last_conv:
-        print(last_conv)
-        print()
+    # Afficher la dernière conversation si la mémoire est déjà prête (sans bloquer le prompt)
+    if agent.memory_ready():
+        last_conv = agent.load_last_conversation()
+        if last_conv:
+            print(last_conv)
+            print()
+    else:
+        print(f"{Colors.DIM}🧠 Mémoire en cours de chargement en arrière-plan (/last pour la dernière conversation){Colors.RESET}\n")
+    
+    _mark_startup("prompt prêt")
+    if args.profile_startup:
+        print_startup_profile(agent)
     
     # Boucle principale
     while True:
         try:
+            while not consolidation_results.empty():
+                print_consolidation_notice(consolidation_results.get())
+            
             # Prompt utilisateur avec délimiteurs readline pour les couleurs
             if readline:
                 # Utiliser les délimiteurs \001 et \002 pour que readline ignore les codes couleur
@@ -1304,14 +1814,7 @@ def main():
             
             # Commandes spéciales
             if user_input.startswith('/'):
-                command = user_input.lower()
-                
-                if command == '/quit' or command == '/q':
-                    # Sauvegarder la conversation dans la mémoire
-                    print(f"{Colors.CYAN}💾 Sauvegarde de la conversation...{Colors.RESET}")
-                    if agent.save_conversation():
-                        print(f"{Colors.GREEN}✅ Conversation sauvegardée{Colors.RESET}")
-                    print(f"{Colors.YELLOW}👋 Au revoir !{Colors.RESET}")
+                if handle_command(agent, user_input):
                     # Sauvegarder l'historique avant de quitter
                     if readline and HISTORY_FILE:
                         try:
@@ -1319,60 +1822,6 @@ def main():
                         except Exception:
                             pass
                     break
-                elif command == '/clear':
-                    agent.clear_history()
-                elif command == '/stats':
-                    agent.show_stats()
-                elif command == '/tools':
-                    agent.show_tools()
-                elif command == '/backup':
-                    print(f"{Colors.CYAN}💾 Backup de la mémoire Qdrant...{Colors.RESET}")
-                    result = backup_qdrant()
-                    if result.get('success'):
-                        print(f"{Colors.GREEN}✅ Backup réussi !{Colors.RESET}")
-                        print(f"  Fichier: {result['backup_file']}")
-                        print(f"  Points: {result['total_points']}")
-                        print(f"  Taille: {result['file_size'] / 1024:.1f} KB")
-                        if result.get('statistics'):
-                            print(f"  Types: {result['statistics']}")
-                    else:
-                        print(f"{Colors.RED}❌ Erreur: {result.get('error')}{Colors.RESET}")
-                elif command.startswith('/restore '):
-                    backup_file = user_input[9:].strip()
-                    if not backup_file:
-                        print(f"{Colors.RED}❌ Usage: /restore <fichier_backup>{Colors.RESET}")
-                    else:
-                        print(f"{Colors.CYAN}♻️  Restauration depuis {backup_file}...{Colors.RESET}")
-                        result = restore_qdrant(backup_file)
-                        if result.get('success'):
-                            print(f"{Colors.GREEN}✅ Restauration réussie !{Colors.RESET}")
-                            print(f"  Collection: {result['collection']}")
-                            print(f"  Points restaurés: {result['points_restored']}")
-                        else:
-                            print(f"{Colors.RED}❌ Erreur: {result.get('error')}{Colors.RESET}")
-                elif command == '/backups':
-                    backups = list_backups()
-                    if not backups:
-                        print(f"{Colors.YELLOW}ℹ️  Aucun backup trouvé{Colors.RESET}")
-                    else:
-                        print(f"{Colors.CYAN}📦 Backups disponibles:{Colors.RESET}")
-                        for backup in backups:
-                            print(f"\n  📄 {backup['filename']}")
-                            print(f"     Taille: {backup['size'] / 1024:.1f} KB")
-                            print(f"     Points: {backup['total_points']}")
-                            print(f"     Date: {backup['created'][:19]}")
-                elif command == '/last':
-                    last_conv = agent.load_last_conversation()
-                    if last_conv:
-                        print(last_conv)
-                    else:
-                        print(f"{Colors.YELLOW}ℹ️  Aucune conversation précédente trouvée{Colors.RESET}")
-                elif command == '/help' or command == '/?':
-                    print_help()
-                else:
-                    print(f"{Colors.RED}❌ Commande inconnue: {user_input}{Colors.RESET}")
-                    print(f"{Colors.DIM}Tapez /help pour voir les commandes disponibles{Colors.RESET}")
-                
                 continue
             
             # Envoyer le message à l'agent
@@ -4,6 +4,8 @@ Configuration pytest pour les tests
 
 import os
 import sys
+import glob
+import pytest
 from pathlib import Path
 
 # Ajouter le répertoire parent au path pour importer les modules
@@ -11,5 +13,20 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 # Configurer les variables d'environnement pour les tests
-os.environ.setdefault('QDRANT_ENDPOINT', 'http://172.16.20.90:6333')
+# Qdrant embarqué en mémoire: aucun serveur requis
+os.environ.setdefault('QDRANT_ENDPOINT', ':memory:')
 os.environ.setdefault('QDRANT_COLLECTION_NAME', 'deepseek_collection')
+
+# Cache d'embeddings en mémoire seulement (pas d'écriture dans ~/.cache)
+os.environ.setdefault('DS_EMBEDDING_CACHE_DIR', '')
+
+
+@pytest.fixture(scope="session")
+def seeded_qdrant():
+    """Collection de test remplie depuis le backup versionné dans backups/"""
+    from tools.qdrant_backup import restore_qdrant
+
+    backup_file = sorted(glob.glob(str(project_root / "backups" / "qdrant_backup_*.json")))[-1]
+    result = restore_qdrant(backup_file, collection_name=os.environ['QDRANT_COLLECTION_NAME'])
+    assert result['success'], result.get('error')
+    return result
@@ -0,0 +1,141 @@
+"""
+Tests unitaires pour le mode batch (tâches JSONL, limiteur de débit partagé, résultats)
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import batch
+import main
+
+
+def _acquire_in_worker(_) -> float:
+    """Créneau obtenu par un processus worker (limiteur installé par batch._init_worker)"""
+    batch._worker_limiter.acquire()
+    return time.time()
+
+
+class FakeAgent:
+    """Agent sans appel API: réponse fixée par la classe"""
+
+    response = "Terminé"
+    error = None
+
+    def __init__(self, cwd=None):
+        FakeAgent.last = self
+        self.cwd = cwd
+        self.rate_limiter = None
+        self.max_iterations = 25
+        self.deadline = None
+        self.max_input_tokens = None
+        self.last_run = {}
+        self.token_stats = {'total_input': 0, 'total_output': 0, 'memory_tokens': 0,
+                            'memory_skipped': 0, 'memory_late': 0, 'api_errors': 0}
+
+    def chat(self, prompt, stream=True):
+        if self.error:
+            raise self.error
+        print(f"prompt: {prompt}")
+        self.last_run = {'stop_reason': 'completed', 'iterations': 2, 'rate_limit_wait': 0.25}
+        self.token_stats.update(total_input=1200, total_output=300, memory_tokens=40)
+        return self.response
+
+
+class TestLoadTasks:
+    """Tests du chargement des tâches"""
+
+    def test_format(self, tmp_path):
+        tasks_file = tmp_path / "tasks.jsonl"
+        tasks_file.write_text(
+            '# commentaire\n'
+            '{"id": "repo-a", "prompt": "lance les tests", "cwd": "/tmp", "timeout": 60}\n'
+            '\n'
+            '{"prompt": "sans id"}\n',
+            encoding='utf-8'
+        )
+        tasks = batch.load_tasks(str(tasks_file))
+        assert [task['id'] for task in tasks] == ["repo-a", "task-4"]
+        assert tasks[0]['timeout'] == 60 and tasks[0]['cwd'] == "/tmp"
+
+    @pytest.mark.parametrize("line, message", [
+        ('{"prompt": "ok"', "Ligne 1: JSON invalide"),
+        ('{"id": "x"}', "Ligne 1: champ 'prompt' manquant"),
+        ('{"prompt": ""}', "Ligne 1: champ 'prompt' manquant"),
+    ])
+    def test_errors(self, tmp_path, line, message):
+        tasks_file = tmp_path / "tasks.jsonl"
+        tasks_file.write_text(line + "\n", encoding='utf-8')
+        with pytest.raises(ValueError, match=message):
+            batch.load_tasks(str(tasks_file))
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            batch.load_tasks(str(tmp_path / "absent.jsonl"))
+
+
+class TestSharedRateLimiter:
+    """Tests du limiteur partagé entre processus"""
+
+    def test_disabled(self):
+        assert batch.SharedRateLimiter(0).acquire() == 0.0
+
+    def test_slots_spaced_across_workers(self):
+        ctx = multiprocessing.get_context('spawn')
+        limiter = batch.SharedRateLimiter(600, ctx=ctx)  # Un créneau toutes les 100 ms
+        with ProcessPoolExecutor(max_workers=2, mp_context=ctx, initializer=batch._init_worker,
+                                 initargs=(limiter, None)) as pool:
+            slots = sorted(pool.map(_acquire_in_worker, range(6)))
+        gaps = [later - earlier for earlier, later in zip(slots, slots[1:])]
+        assert min(gaps) >= 0.1 - 0.02  # Marge: horloge relevée après le réveil
+        assert slots[-1] - slots[0] >= 0.5 - 0.02
+
+
+class TestRunTask:
+    """Tests de la forme des résultats d'une tâche"""
+
+    @pytest.fixture(autouse=True)
+    def agent(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(main, "DeepSeekAgent", FakeAgent)
+        monkeypatch.setattr(FakeAgent, "response", "Terminé")
+        monkeypatch.setattr(FakeAgent, "error", None)
+        batch._init_worker(batch.SharedRateLimiter(0), str(tmp_path))
+        yield
+        batch._init_worker(None, None)
+
+    def test_success(self, tmp_path):
+        cwd = os.getcwd()
+        result = batch.run_task({'id': 'repo-a', 'prompt': 'lance les tests', 'cwd': str(tmp_path),
+                                 'max_iterations': 5})
+        assert os.getcwd() == cwd  # Répertoire du worker inchangé
+        assert FakeAgent.last.cwd == str(tmp_path)  # Répertoire passé à l'agent (outils)
+        assert result['status'] == 'ok' and result['stop_reason'] == 'completed'
+        assert result['response'] == "Terminé" and result['iterations'] == 2
+        assert result['tokens'] == {'input': 1200, 'output': 300, 'memory': 40}
+        assert result['rate_limit_wait_s'] == 0.25
+        assert result['cwd'] == str(tmp_path) and result['worker_pid'] == os.getpid()
+        assert {'started_at', 'duration_s', 'memory_skipped_turns', 'memory_late_turns',
+                'api_errors'} <= set(result)
+        # Sortie de l'agent dans le log de la tâche, pas sur la console
+        assert "prompt: lance les tests" in (tmp_path / "repo-a.log").read_text(encoding='utf-8')
+        assert result['log_file'] == str(tmp_path / "repo-a.log")
+
+    def test_api_error_response(self):
+        FakeAgent.response = "[ERREUR API] quota dépassé"
+        result = batch.run_task({'id': 'quota', 'prompt': 'x'})
+        assert result['status'] == 'error' and result['response'].startswith("[ERREUR")
+
+    def test_exception(self, tmp_path):
+        FakeAgent.error = RuntimeError("connexion perdue")
+        result = batch.run_task({'id': 'crash', 'prompt': 'x'})
+        assert result['status'] == 'error' and result['error'] == "connexion perdue"
+        assert "RuntimeError" in result['traceback']
+        assert 'tokens' not in result and 'duration_s' in result
+
+    def test_missing_cwd(self, tmp_path):
+        result = batch.run_task({'id': 'absent', 'prompt': 'x', 'cwd': str(tmp_path / "absent")})
+        assert result['status'] == 'error' and 'traceback' in result
+        assert "introuvable" in result['error']
@@ -0,0 +1,145 @@
+"""
+Tests unitaires pour le mode démon (protocole sur socket Unix, sessions isolées)
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import daemon
+import main
+
+
+def _fake_chat(self, text, stream=True):
+    """Tour sans appel API: historique de la session + un outil lancé dans son répertoire"""
+    self.conversation_history.append({"role": "user", "content": text})
+    command = "sleep 0.5 && pwd" if text == "lent" else "pwd"
+    result = self.tool_executor.execute('execute_command', command=command, shell=True)
+    print(f"cwd={result['stdout'].strip()}")
+    return "ok"
+
+
+class Client:
+    """Client de test: une connexion = une session"""
+
+    def __init__(self, socket_path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(10)
+        self.sock.connect(socket_path)
+        self.stream = self.sock.makefile('rwb')
+
+    def send(self, message):
+        self.stream.write((json.dumps(message) + "\n").encode('utf-8'))
+        self.stream.flush()
+
+    def read_until(self, expected):
+        """(message attendu, sortie de la session reçue avant)"""
+        output = []
+        for raw in self.stream:
+            message = json.loads(raw)
+            if message['type'] == 'output':
+                output.append(message['data'])
+            elif message['type'] == expected:
+                return message, "".join(output)
+        raise AssertionError(f"connexion fermée avant '{expected}'")
+
+    def open(self, cwd):
+        self.send({'type': 'open', 'cwd': str(cwd)})
+        return self.read_until('ready')[0]['session']
+
+    def ask(self, text):
+        self.send({'type': 'message', 'text': text})
+        return self.read_until('done')[1]
+
+    def close(self):
+        self.send({'type': 'close'})
+        self.sock.close()
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    monkeypatch.setenv('DEEPSEEK_API_KEY', 'test')
+    monkeypatch.setattr(main, 'start_memory_warmup', Future)  # Mémoire jamais prête: aucun chargement
+    monkeypatch.setattr(main.DeepSeekAgent, 'chat', _fake_chat)
+
+    socket_path = str(tmp_path / "daemon.sock")
+    server = daemon.create_server(socket_path)
+    server.daemon = daemon.AgentDaemon()
+    server.daemon.system_prompt = "prompt de test"
+    server.output = daemon.SessionOutput(sys.stdout)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _route_stdout(server, monkeypatch):
+    """Comme serve(): sys.stdout aiguillé vers la connexion de chaque session
+    (installé dans le test: pytest remplace sys.stdout entre les phases)"""
+    monkeypatch.setattr(sys, 'stdout', server.output)
+
+
+class TestDaemon:
+    """Tests des sessions servies par le démon"""
+
+    def test_socket_created_owner_only(self, tmp_path, monkeypatch):
+        """Socket en 0600 dès le bind (sans compter sur le chmod qui suit)"""
+        monkeypatch.setattr(daemon.os, 'chmod', lambda *args: None)
+        socket_path = str(tmp_path / "bind.sock")
+        server = daemon.create_server(socket_path)
+        try:
+            assert os.stat(socket_path).st_mode & 0o777 == 0o600
+        finally:
+            server.server_close()
+
+    def test_round_trip(self, server, tmp_path, monkeypatch):
+        _route_stdout(server, monkeypatch)
+        client = Client(server.server_address)
+        session_id = client.open(tmp_path)
+        assert session_id in server.daemon.sessions
+        assert f"cwd={tmp_path}" in client.ask("bonjour")
+        client.close()
+
+        deadline = time.monotonic() + 5
+        while server.daemon.sessions and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert server.daemon.sessions == {}  # Session fermée avec la connexion
+
+    def test_sessions_keep_separate_cwd_and_history(self, server, tmp_path, monkeypatch):
+        _route_stdout(server, monkeypatch)
+        dir_a, dir_b = tmp_path / "a", tmp_path / "b"
+        dir_a.mkdir()
+        dir_b.mkdir()
+        client_a, client_b = Client(server.server_address), Client(server.server_address)
+        session_a, session_b = client_a.open(dir_a), client_b.open(dir_b)
+
+        # Outil lent dans la session A: la session B n'attend pas (pas de verrou global)
+        finished = {}
+
+        def slow_turn():
+            finished['a_output'] = client_a.ask("lent")
+            finished['a'] = time.monotonic()
+
+        slow = threading.Thread(target=slow_turn)
+        slow.start()
+        time.sleep(0.1)
+        b_output = client_b.ask("rapide")
+        finished['b'] = time.monotonic()
+        slow.join(timeout=10)
+
+        assert f"cwd={dir_b}" in b_output and f"cwd={dir_a}" in finished['a_output']
+        assert finished['b'] < finished['a']
+
+        agent_a, agent_b = server.daemon.sessions[session_a], server.daemon.sessions[session_b]
+        assert agent_a.tool_executor.cwd == str(dir_a) and agent_b.tool_executor.cwd == str(dir_b)
+        assert [m['content'] for m in agent_a.conversation_history if m['role'] == 'user'] == ["lent"]
+        assert [m['content'] for m in agent_b.conversation_history if m['role'] == 'user'] == ["rapide"]
+        client_a.close()
+        client_b.close()
@@ -0,0 +1,79 @@
+"""
+Tests unitaires pour les backends d'embeddings
+"""
+
+import numpy as np
+import pytest
+
+from tools.memory_tools import (
+    EmbeddingBackend,
+    QdrantMemory,
+    HashingBackend,
+    OnnxBackend,
+    SentenceTransformerBackend,
+    get_embedding_backend
+)
+
+
+class TestEmbeddingBackends:
+    """Tests pour la sélection des backends et le marquage des vecteurs"""
+
+    def test_hashing_backend_is_deterministic_and_normalized(self):
+        """Mêmes vecteurs d'une instance à l'autre, norme 1, proximité lexicale"""
+        first = HashingBackend(64).encode(["le démon écoute sur une socket", "recette de crêpes"])
+        second = HashingBackend(64).encode(["le démon écoute sur une socket", "recette de crêpes"])
+
+        assert first.shape == (2, 64)
+        assert np.allclose(first, second)
+        assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+        query = HashingBackend(64).encode(["sur quelle socket écoute le démon"])[0]
+        assert query @ first[0] > query @ first[1]
+
+    def test_backend_selection(self, monkeypatch):
+        """Le backend est choisi par DS_EMBEDDING_BACKEND; un nom inconnu est refusé"""
+        monkeypatch.setenv('DS_EMBEDDING_BACKEND', 'hashing')
+        monkeypatch.setenv('DS_HASHING_DIMENSION', '32')
+        backend = get_embedding_backend()
+        assert isinstance(backend, HashingBackend)
+        assert backend.dimension == 32
+        assert backend.vector_space == "hashing-v1-32"
+
+        with pytest.raises(ValueError):
+            get_embedding_backend('word2vec')
+
+    def test_incomplete_backend_rejected(self):
+        """Un backend sans encode ou dimension échoue dès l'instanciation"""
+        class NoEncode(EmbeddingBackend):
+            name = "incomplet"
+
+            @property
+            def dimension(self):
+                return 8
+
+        with pytest.raises(TypeError, match="encode"):
+            NoEncode("modele")
+        with pytest.raises(TypeError):
+            EmbeddingBackend("modele")
+
+    def test_model_backends_share_vector_space(self):
+        """sentence-transformers et ONNX: même modèle, même espace, caches distincts"""
+        st = SentenceTransformerBackend.__new__(SentenceTransformerBackend)
+        st.model_name, st._dimension = 'all-MiniLM-L6-v2', 384
+        onnx = OnnxBackend.__new__(OnnxBackend)
+        onnx.model_name, onnx._dimension, onnx.file_name = 'all-MiniLM-L6-v2', 384, 'onnx/model_quint8_avx2.onnx'
+
+        assert st.vector_space == onnx.vector_space == "all-MiniLM-L6-v2-384"
+        assert st.cache_key != onnx.cache_key
+
+    def test_points_are_tagged_with_vector_space(self):
+        """Chaque point stocké porte l'espace vectoriel et le backend d'origine"""
+        memory = QdrantMemory(collection_name='test_backends', backend=HashingBackend(32))
+        try:
+            memory.store_fact("Les tests tournent sans modèle")
+            points, _ = memory.client.scroll('test_backends', limit=1, with_payload=True)
+            assert points[0].payload['vector_space'] == "hashing-v1-32"
+            assert points[0].payload['embedding_backend'] == "hashing"
+            assert memory.search_facts("tests sans modèle", limit=1)[0]['score'] > 0.5
+        finally:
+            memory.client.delete_collection('test_backends')
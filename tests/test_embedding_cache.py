@@ -0,0 +1,61 @@
+"""
+Tests unitaires pour le cache d'embeddings à deux niveaux
+"""
+
+import shutil
+import tempfile
+from tools.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    """Tests pour le LRU mémoire et le stockage mappé sur disque"""
+
+    def setup_method(self):
+        """Créer un répertoire de cache temporaire"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Nettoyer après chaque test"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_memory_hit(self):
+        """Un vecteur stocké est resservi depuis la mémoire"""
+        cache = EmbeddingCache('test-model', 4, cache_dir=self.temp_dir)
+        assert cache.get("bonjour") is None
+
+        cache.put("bonjour", [0.1, 0.2, 0.3, 0.4])
+        vector = cache.get("bonjour")
+        assert vector is not None
+        assert abs(vector[2] - 0.3) < 1e-6
+
+        stats = cache.get_statistics()
+        assert stats['memory_hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_disk_shared_between_instances(self):
+        """Le niveau disque survit au processus et est lu par une autre instance"""
+        first = EmbeddingCache('test-model', 4, cache_dir=self.temp_dir)
+        for i in range(10):
+            first.put(f"texte {i}", [float(i)] * 4)
+
+        second = EmbeddingCache('test-model', 4, cache_dir=self.temp_dir)
+        assert second.get("texte 7") == [7.0] * 4
+        assert second.get_statistics()['disk_hits'] == 1
+
+        # Autre modèle: clés et fichiers distincts
+        other = EmbeddingCache('other-model', 4, cache_dir=self.temp_dir)
+        assert other.get("texte 7") is None
+
+    def test_memory_only_and_wrong_dimension(self):
+        """Sans niveau disque, le LRU est borné; les vecteurs mal dimensionnés sont ignorés"""
+        cache = EmbeddingCache('test-model', 2, use_disk=False, max_memory_entries=2)
+        cache.put("a", [1.0, 1.0])
+        cache.put("b", [2.0, 2.0])
+        cache.put("c", [3.0, 3.0])
+        cache.put("d", [1.0, 2.0, 3.0])
+
+        assert cache.get("a") is None
+        assert cache.get("c") == [3.0, 3.0]
+        assert cache.get("d") is None
+        assert cache.get_statistics()['disk_enabled'] is False
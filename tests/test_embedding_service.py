@@ -0,0 +1,167 @@
+"""
+Tests unitaires pour le service d'embeddings partagé (socket Unix + mémoire partagée)
+"""
+
+import os
+import stat
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+import numpy as np
+import pytest
+
+from tools.embedding_service import (
+    EmbeddingService, EmbeddingServer, EmbeddingServiceClient, service_authkey, service_running
+)
+from tools.memory_tools import QdrantMemory, HashingBackend, ServiceBackend
+
+
+def _start_server(socket_path):
+    """Service servi par un thread du processus de test (backend par hachage)"""
+    server = EmbeddingServer(EmbeddingService(HashingBackend(32), max_delay=0.05), socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if service_running(socket_path):
+            break
+        thread.join(0.01)
+    return server, thread
+
+
+def _stop_server(server, thread):
+    server.shutdown()
+    thread.join(2)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server, thread = _start_server(str(tmp_path / "emb.sock"))
+    yield server
+    _stop_server(server, thread)
+
+
+class _InterruptedConnection:
+    """Connexion interrompue une fois entre l'envoi et la réception (Ctrl+C, timeout)"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def send(self, message):
+        self._conn.send(message)
+
+    def recv(self):
+        raise KeyboardInterrupt
+
+    def close(self):
+        self._conn.close()
+
+
+class TestEmbeddingService:
+    """Tests du client, du regroupement en lots et du backend 'service'"""
+
+    def test_vectors_match_direct_encoding(self, server):
+        client = EmbeddingServiceClient(server.socket_path, autostart=False)
+        try:
+            texts = ["le démon écoute sur une socket", "recette de crêpes"] * 300  # Tampon agrandi (> 1 Mo)
+            assert np.allclose(client.encode(texts[:2]), HashingBackend(32).encode(texts[:2]))
+            assert client.encode(texts).shape == (600, 32)
+            assert client.encode([]).shape == (0, 32)
+            assert client.info()["vector_space"] == "hashing-v1-32"
+        finally:
+            client.close()
+
+    def test_concurrent_requests_are_batched(self, server):
+        client = EmbeddingServiceClient(server.socket_path, autostart=False)
+        results = {}
+
+        def encode(i):
+            results[i] = client.encode([f"texte numéro {i}"])[0]
+
+        threads = [threading.Thread(target=encode, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.close()
+
+        stats = server.service.get_statistics()
+        assert stats["requests"] == 8
+        assert stats["batches"] < 8
+        assert np.allclose(results[3], HashingBackend(32).encode(["texte numéro 3"])[0])
+
+    def test_memory_with_service_backend(self, server):
+        backend = ServiceBackend(server.socket_path)
+        memory = QdrantMemory(collection_name='test_service_backend', backend=backend)
+        try:
+            assert backend.vector_space == HashingBackend(32).vector_space
+            memory.store_fact("les tests tournent sans modèle")
+            assert memory.search_facts("tests sans modèle", limit=1)[0]["score"] > 0.5
+        finally:
+            memory.client.delete_collection('test_service_backend')
+            backend.client.close()
+
+    def test_no_service_without_autostart(self, tmp_path):
+        with pytest.raises(RuntimeError):
+            EmbeddingServiceClient(str(tmp_path / "absent.sock"), autostart=False)
+
+
+class TestEmbeddingServiceConnections:
+    """Tests des connexions: réponse non lue, redémarrage du service, authentification"""
+
+    def test_interrupted_channel_is_not_reused(self, server):
+        """Une réponse non lue ne peut pas être prise pour celle de la demande suivante"""
+        client = EmbeddingServiceClient(server.socket_path, autostart=False)
+        try:
+            client.encode(["premier texte"])
+            channel = client._all_channels[0]
+            channel.conn = _InterruptedConnection(channel.conn)
+            with pytest.raises(KeyboardInterrupt):
+                client.encode(["texte interrompu"])
+            assert channel not in client._all_channels
+
+            vectors = client.encode(["texte suivant"])
+            assert np.allclose(vectors, HashingBackend(32).encode(["texte suivant"]))
+        finally:
+            client.close()
+
+    def test_reconnects_after_service_restart(self, tmp_path):
+        socket_path = str(tmp_path / "emb.sock")
+        server, thread = _start_server(socket_path)
+        client = EmbeddingServiceClient(socket_path, autostart=False)
+        try:
+            client.encode(["avant le redémarrage"])
+            _stop_server(server, thread)
+            server, thread = _start_server(socket_path)
+
+            vectors = client.encode(["après le redémarrage"])
+            assert np.allclose(vectors, HashingBackend(32).encode(["après le redémarrage"]))
+            assert len(client._all_channels) == 1  # Connexion morte remplacée
+        finally:
+            client.close()
+            _stop_server(server, thread)
+
+    def test_service_gone_without_autostart(self, tmp_path):
+        socket_path = str(tmp_path / "emb.sock")
+        server, thread = _start_server(socket_path)
+        client = EmbeddingServiceClient(socket_path, autostart=False)
+        client.encode(["texte"])
+        _stop_server(server, thread)
+        with pytest.raises(RuntimeError, match="Aucun service"):
+            client.encode(["texte"])
+        assert client._all_channels == []
+        client.close()
+
+    def test_connections_are_authenticated(self, server):
+        """Socket et clé en 0600; une connexion sans la clé est refusée avant tout dépicklage"""
+        assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+        assert stat.S_IMODE(os.stat(server.socket_path + ".key").st_mode) == 0o600
+        assert service_authkey(server.socket_path) == server.authkey
+
+        with pytest.raises(AuthenticationError):
+            Client(server.socket_path, family='AF_UNIX', authkey=b"mauvaise cle")
+        client = EmbeddingServiceClient(server.socket_path, autostart=False)
+        try:
+            assert client.encode(["toujours servi"]).shape == (1, 32)
+        finally:
+            client.close()
@@ -14,6 +14,7 @@ from tools.file_tools import (
     list_files,
     file_exists
 )
+from tools.working_dir import use_working_directory, working_directory
 
 
 class TestFileTools:
@@ -135,3 +136,15 @@ class TestFileTools:
         result = list_files(self.temp_dir, pattern="*.py")
         assert 'count' in result
         assert result['count'] == 3
+    
+    def test_relative_paths_use_session_directory(self):
+        """Chemins relatifs résolus dans le répertoire de la session, sans os.chdir"""
+        cwd = os.getcwd()
+        with use_working_directory(self.temp_dir):
+            assert working_directory() == os.path.abspath(self.temp_dir)
+            assert write_file("rel.txt", "session")['success']
+            assert read_file("rel.txt") == "session"
+            assert file_exists("rel.txt")
+            assert "rel.txt" in list_files(".")['files']
+        assert os.getcwd() == cwd and working_directory() == cwd
+        assert Path(self.temp_dir, "rel.txt").read_text() == "session"
@@ -0,0 +1,94 @@
+"""
+Tests unitaires pour l'index lexical BM25 et la recherche hybride des faits
+"""
+
+from tools import memory_tools
+from tools.lexical_index import LexicalIndex, tokenize, identifier_terms, reciprocal_rank_fusion
+from tools.memory_tools import QdrantMemory, HashingBackend
+
+
+class TestLexicalIndex:
+    """Tests pour le découpage, le classement BM25 et la fusion RRF"""
+
+    def test_tokenize_keeps_identifiers(self):
+        """Identifiants indexés entiers et par morceaux"""
+        terms = tokenize("Erreur E501 dans tools/memory_tools.py (_get_relevant_memory, QdrantMemory)")
+        assert "tools/memory_tools.py" in terms
+        assert "memory_tools" not in terms
+        assert {"tools", "memory", "py", "e501", "_get_relevant_memory", "relevant", "qdrantmemory", "qdrant"} <= set(terms)
+        assert identifier_terms("corrige E501 dans main.py") == {"e501", "main.py"}
+
+    def test_identifier_terms_ignore_numbers_and_versions(self):
+        """Dates, versions et nombres ne sont pas des identifiants (pas de lexical_match)"""
+        assert identifier_terms("en 2024, passage de v2 à 3.5 puis v2.1 (e.g 10-12)") == set()
+        assert identifier_terms("getUser lève HTTP404 dans api/users via load_config, cf. CVE-2024-1234") == {
+            "getuser", "http404", "api/users", "load_config", "cve-2024-1234"
+        }
+
+    def test_bm25_ranks_rare_terms_first(self):
+        """Le terme rare (identifiant) l'emporte sur les mots fréquents"""
+        index = LexicalIndex()
+        index.add(
+            ["a", "b", "c"],
+            ["le projet utilise python", "le projet utilise pytest", "le bug E501 vient de main.py"],
+            [{"fact": "a"}, {"fact": "b"}, {"fact": "c"}]
+        )
+        assert index.search("projet E501")[0][0] == "c"
+        assert [doc_id for doc_id, _ in index.search("pytest")] == ["b"]
+
+        index.remove(["c"])
+        assert index.search("E501") == []
+        assert len(index) == 2
+
+    def test_reciprocal_rank_fusion(self):
+        """Un document bien classé dans les deux listes passe devant"""
+        fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]], k=60)
+        assert fused[0][0] == "y"
+        assert {doc_id for doc_id, _ in fused} == {"x", "y", "z", "w"}
+
+
+class TestHybridSearch:
+    """Tests de search_facts en mode hybride sur un Qdrant local"""
+
+    def setup_method(self):
+        self.memory = QdrantMemory(collection_name='test_hybrid', backend=HashingBackend(dimension=16))
+        memory_tools._memory = self.memory
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_hybrid')
+        memory_tools._memory = None
+
+    def test_identifier_found_and_flagged(self):
+        """Le fait contenant l'identifiant exact remonte et est marqué lexical_match"""
+        self.memory.store_facts([f"préférence générale numéro {i}" for i in range(60)])
+        target = self.memory.store_fact("ruff signale E731 dans tools/file_tools.py")
+
+        results = self.memory.search_facts("pourquoi E731 ?", limit=3)
+        assert results[0]["id"] == target["id"]
+        assert results[0]["lexical_match"] is True
+        assert "rrf_score" in results[0]
+
+        dense_only = self.memory.search_facts("pourquoi E731 ?", limit=3, hybrid=False)
+        assert all("rrf_score" not in fact for fact in dense_only)
+
+    def test_index_loaded_on_first_hybrid_search(self):
+        """Pas de chargement au démarrage: la première recherche hybride charge l'index"""
+        self.memory.store_facts(["le cache vit dans tools/tool_cache.py", "autre fait"])
+        memory = QdrantMemory(collection_name='test_hybrid', backend=HashingBackend(dimension=16))
+        assert memory.lexical_index.ready is False
+
+        results = memory.search_facts("tools/tool_cache.py", limit=1)
+        assert memory.lexical_index.ready is True and len(memory.lexical_index) == 2
+        assert results[0]["lexical_match"] is True
+
+    def test_index_follows_writes(self):
+        """Suppression et vidage répercutés sur l'index lexical"""
+        target = self.memory.store_fact("le script deploy.sh échoue")
+        assert len(self.memory.lexical_index) == 1
+
+        self.memory.delete_points([target["id"]])
+        assert self.memory.lexical_index.search("deploy.sh") == []
+
+        self.memory.store_fact("autre fait")
+        self.memory.clear_all()
+        assert len(self.memory.lexical_index) == 0
@@ -0,0 +1,74 @@
+"""
+Tests unitaires pour l'index vectoriel local miroir de Qdrant
+"""
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+
+from tools.local_index import LocalVectorIndex
+
+
+class TestLocalIndex:
+    """Tests pour le chargement, la recherche et la synchronisation de l'index local"""
+
+    def setup_method(self):
+        """Collection Qdrant locale de 200 points aléatoires (faits et décisions)"""
+        rng = np.random.default_rng(42)
+        self.vectors = rng.normal(size=(200, 8)).astype(np.float32)
+        self.client = QdrantClient(':memory:')
+        self.client.create_collection('test_index', vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+        self.client.upsert('test_index', points=[
+            PointStruct(id=i, vector=self.vectors[i].tolist(),
+                        payload={"type": "fact" if i % 2 else "decision", "fact": f"fait {i}"})
+            for i in range(200)
+        ])
+
+    def test_matches_qdrant_results(self):
+        """Mêmes voisins et mêmes scores que Qdrant, filtre sur le type compris"""
+        index = LocalVectorIndex()
+        assert index.load(self.client, 'test_index') is True
+        assert len(index) == 200
+
+        query = self.vectors[7] + 0.1
+        local = index.search(query.tolist(), limit=5, filters={"type": "fact"})
+        remote = self.client.query_points(
+            'test_index', query=query.tolist(), limit=5,
+            query_filter=Filter(must=[FieldCondition(key="type", match=MatchValue(value="fact"))])
+        ).points
+
+        assert [hit[0] for hit in local] == [str(point.id) for point in remote]
+        assert abs(local[0][1] - remote[0].score) < 1e-4
+        assert all(hit[2]["type"] == "fact" for hit in local)
+
+    def test_writes_keep_index_in_sync(self):
+        """Ajout, remplacement et suppression de points"""
+        index = LocalVectorIndex()
+        index.load(self.client, 'test_index')
+
+        index.add(["nouveau"], [[1.0] * 8], [{"type": "fact", "fact": "nouveau"}])
+        hits = index.search([1.0] * 8, limit=1, score_threshold=0.99)
+        assert hits[0][0] == "nouveau"
+
+        index.remove(["nouveau", "3"])
+        assert len(index) == 199
+        assert index.search([1.0] * 8, limit=1, score_threshold=0.99) == []
+        assert all(hit[0] != "3" for hit in index.search(self.vectors[3].tolist(), limit=3))
+
+    def test_payload_updates_refresh_results_and_filters(self):
+        """Payload fusionné (usage_count, type) visible dans les résultats et les filtres"""
+        index = LocalVectorIndex()
+        index.load(self.client, 'test_index')
+        query = self.vectors[7].tolist()
+        assert index.search(query, limit=1, filters={"type": "fact"})[0][0] == "7"
+
+        index.update_payloads({"7": {"usage_count": 3, "type": "decision"}, "absent": {"usage_count": 1}})
+        assert index.search(query, limit=1)[0][2] == {"type": "decision", "fact": "fait 7", "usage_count": 3}
+        assert index.search(query, limit=1, filters={"type": "fact"})[0][0] != "7"
+        assert len(index) == 200
+
+    def test_large_collection_falls_back(self):
+        """Au-delà de max_points, l'index n'est pas utilisé"""
+        index = LocalVectorIndex(max_points=100)
+        assert index.load(self.client, 'test_index') is False
+        assert index.ready is False
@@ -0,0 +1,170 @@
+"""
+Tests unitaires pour le niveau local SQLite/FTS5 de la mémoire
+"""
+
+from qdrant_client.models import PointStruct
+
+from tools import memory_tools
+from tools.local_store import LocalStore, fts_query, local_store_path
+from tools.memory_tools import QdrantMemory, HashingBackend, GLOBAL_NAMESPACE
+
+
+def _fact(text, namespace="alpha", category="general", timestamp="2026-10-19T10:00:00"):
+    return {"type": "fact", "fact": text, "category": category, "namespace": namespace, "timestamp": timestamp}
+
+
+class TestLocalStore:
+    """Tests du stockage SQLite et de l'index FTS5"""
+
+    def setup_method(self):
+        self.store = LocalStore()
+        payloads = [
+            _fact("le cache est invalidé par write_file dans memory_tools.py", timestamp="2026-10-01T10:00:00"),
+            _fact("les tests utilisent pytest", category="tests", timestamp="2026-10-03T10:00:00"),
+            _fact("réponses en français", namespace=GLOBAL_NAMESPACE, timestamp="2026-10-02T10:00:00"),
+            _fact("le cache des images est purgé", namespace="beta"),
+            {"type": "fact", "fact": "ancien fait sur le cache"},  # Sans espace de noms
+        ]
+        self.store.upsert([f"id{i}" for i in range(5)], [p["fact"] for p in payloads], payloads)
+
+    def test_keyword_search_is_scoped(self):
+        found = [point_id for point_id, _, _ in self.store.search("cache", "fact", ["alpha", GLOBAL_NAMESPACE])]
+        assert set(found) == {"id0", "id4"}
+        # Identifiant: cherché comme suite de morceaux, accents ignorés
+        assert [r[0] for r in self.store.search("memory_tools.py")] == ["id0"]
+        assert [r[0] for r in self.store.search("francais")] == ["id2"]
+        assert self.store.search("!!") == []
+
+    def test_scroll_newest_first_and_category(self):
+        facts = self.store.scroll("fact", ["alpha", GLOBAL_NAMESPACE])
+        assert [point_id for point_id, _ in facts][:3] == ["id1", "id2", "id0"]
+        assert [point_id for point_id, _ in self.store.scroll("fact", None, category="tests")] == ["id1"]
+        assert self.store.latest("conversation") is None
+
+    def test_update_delete_and_rebuild(self):
+        self.store.update_payloads({"id0": {"usage_count": 3, "timestamp": "2026-12-01T00:00:00"}})
+        assert self.store.get(["id0"])[0][1]["usage_count"] == 3
+        assert self.store.latest("fact", ["alpha"])[0] == "id0"
+
+        self.store.delete(["id0"])
+        assert self.store.get(["id0", "id1"]) == [("id1", self.store.get(["id1"])[0][1])]
+        assert self.store.search("memory_tools") == []  # Index FTS tenu à jour par les triggers
+
+        self.store.rebuild([("x", "nouveau contenu", _fact("nouveau contenu"))])
+        assert len(self.store) == 1 and [r[0] for r in self.store.search("contenu")] == ["x"]
+
+    def test_file_shared_between_connections(self, tmp_path):
+        path = str(tmp_path / "memory" / "store.sqlite3")
+        writer, reader = LocalStore(path), LocalStore(path)
+        writer.upsert(["a"], ["fait partagé"], [_fact("fait partagé")])
+        assert reader.get(["a"])[0][1]["fact"] == "fait partagé"
+        writer.close()
+        reader.close()
+
+    def test_rebuild_is_atomic_for_other_processes(self, tmp_path):
+        """Pendant une reconstruction: ancien contenu complet visible, écritures concurrentes conservées"""
+        path = str(tmp_path / "store.sqlite3")
+        store, other = LocalStore(path), LocalStore(path)
+        store.upsert(["old", "kept"], ["ancien", "conservé"], [_fact("ancien"), _fact("conservé")])
+        seen = []
+
+        def qdrant_points():
+            yield ("kept", "conservé", _fact("conservé"))
+            seen.append(len(other))  # Lecture d'un autre processus en pleine reconstruction
+            other.upsert(["deferred"], ["écrit ailleurs"], [_fact("écrit ailleurs")])  # Pas encore dans Qdrant
+            yield ("new", "nouveau", _fact("nouveau"))
+
+        store.rebuild(qdrant_points())
+        assert seen == [2]
+        assert sorted(point_id for point_id, _ in other.scroll("fact")) == ["deferred", "kept", "new"]
+        store.close()
+        other.close()
+
+    def test_location(self, monkeypatch):
+        assert local_store_path(":memory:", "c") == ":memory:"
+        monkeypatch.setenv("DS_MEMORY_LOCAL_STORE_DIR", "")
+        assert local_store_path("http://localhost:6333", "c") is None
+        monkeypatch.setenv("DS_MEMORY_LOCAL_STORE_DIR", "/tmp/ds")
+        assert local_store_path("http://localhost:6333", "c") == "/tmp/ds/http_localhost_6333-c.sqlite3"
+        assert fts_query("E501 memory_tools.py") == '"E501" OR "memory tools py"'
+
+
+class TestMemoryLocalTier:
+    """Tests des lectures servies localement et de la cohérence avec Qdrant"""
+
+    def setup_method(self):
+        self.memory = QdrantMemory(collection_name='test_local_store', backend=HashingBackend(dimension=32))
+        memory_tools._memory = self.memory
+        self.facts = self.memory.store_facts([
+            {"fact": "write_file invalide le cache des outils", "category": "cache"},
+            {"fact": "les tests utilisent pytest", "category": "tests"},
+        ], namespace="alpha")
+        self.memory.store_conversation_summary("refonte du cache", ["cache"], [], namespace="alpha")
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_local_store')
+        memory_tools._memory = None
+
+    def _forbid_qdrant_reads(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("lecture Qdrant")
+        monkeypatch.setattr(self.memory.client, "scroll", fail)
+        monkeypatch.setattr(self.memory.client, "retrieve", fail)
+
+    def test_reads_are_served_locally(self, monkeypatch):
+        self._forbid_qdrant_reads(monkeypatch)
+        assert [f["fact"] for f in self.memory.get_facts("tests", namespace="alpha")] == ["les tests utilisent pytest"]
+        assert self.memory.get_last_conversation(namespace="alpha")["summary"] == "refonte du cache"
+        assert self.memory.find_exact("fact", "les tests utilisent pytest", namespace="alpha")["id"] == self.facts[1]["id"]
+        assert self.memory.find_exact("fact", "absent", namespace="alpha") is None
+        found = self.memory.search_keywords("write_file", namespace="alpha")
+        assert [f["id"] for f in found] == [self.facts[0]["id"]]
+        assert self.memory.local_store.get_statistics()["avg_read_us"] < 1000
+
+    def test_search_keywords_agent_tool(self, tmp_path, monkeypatch):
+        """Outil search_keywords de l'agent: projet de la session, sans embedding"""
+        from main import ToolExecutor
+        from tools.working_dir import use_working_directory
+
+        with use_working_directory(str(tmp_path)):
+            target = self.memory.store_fact("le hook pre-commit lance ruff sur tools/")
+
+        def no_embedding(*args, **kwargs):
+            raise AssertionError("embedding inattendu")
+        monkeypatch.setattr(self.memory.backend, "encode", no_embedding)
+        found = ToolExecutor(cwd=str(tmp_path)).execute('search_keywords', query="ruff pre-commit")
+        assert [fact["id"] for fact in found] == [target["id"]]
+
+    def test_write_paths_keep_tiers_consistent(self):
+        self.memory.store_fact("écriture différée", namespace="alpha", defer=True)
+        assert self.memory.find_exact("fact", "écriture différée", namespace="alpha") is not None
+
+        self.memory.delete_points([self.facts[0]["id"]])
+        assert self.memory.search_keywords("write_file", namespace="alpha") == []
+
+        self.memory.record_usage([self.facts[1]["id"]])
+        self.memory.flush_usage()
+        assert self.memory.get_facts("tests", namespace="alpha")[0]["id"] == self.facts[1]["id"]
+        assert self.memory.local_store.get([self.facts[1]["id"]])[0][1]["usage_count"] == 1
+
+        self.memory.flush_writes()
+        assert len(self.memory.local_store) == self.memory._count()
+        self.memory.clear_all()
+        assert len(self.memory.local_store) == 0
+
+    def test_resync_after_external_write(self):
+        self.memory.client.upsert('test_local_store', points=[PointStruct(
+            id=1, vector=self.memory._generate_embedding("fait écrit hors de la mémoire"),
+            payload={"type": "fact", "fact": "fait écrit hors de la mémoire", "category": "general"}
+        )])
+        assert self.memory.search_keywords("hors", namespace="alpha") == []
+        self.memory.refresh_local_store()  # Comptes différents: reconstruction
+        assert [f["id"] for f in self.memory.search_keywords("hors", namespace="alpha")] == ["1"]
+
+    def test_disabled_store_falls_back_to_qdrant(self):
+        self.memory.local_store = None
+        assert {f["fact"] for f in self.memory.get_facts(namespace="alpha")} == {
+            "write_file invalide le cache des outils", "les tests utilisent pytest"
+        }
+        assert self.memory.get_last_conversation(namespace="alpha")["summary"] == "refonte du cache"
+        assert self.memory.search_keywords("pytest", namespace="alpha")[0]["id"] == self.facts[1]["id"]
@@ -0,0 +1,56 @@
+"""
+Tests unitaires pour les accès asynchrones de la mémoire et leurs échéances
+"""
+
+import time
+
+from tools import memory_tools
+from tools.memory_tools import QdrantMemory, HashingBackend
+
+
+class TestMemoryAsync:
+    """Tests pour submit_search, call_with_deadline et l'abandon des résultats en retard"""
+
+    def setup_method(self):
+        self.memory = QdrantMemory(collection_name='test_async', backend=HashingBackend(dimension=16))
+        memory_tools._memory = self.memory
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_async')
+        memory_tools._memory = None
+
+    def test_embedded_mode_uses_executor(self):
+        """Mode embarqué: pas de client asynchrone séparé (données du client synchrone)"""
+        assert self.memory.async_client is None
+
+    def test_submit_search_matches_sync_search(self):
+        """La recherche lancée sur la boucle mémoire renvoie les mêmes faits"""
+        self.memory.store_facts(["le projet utilise pytest", "la CI tourne sur GitHub Actions", "erreur E402 dans main.py"])
+
+        future = self.memory.submit_search("E402 main.py", limit=2)
+        started = time.monotonic()
+        results = self.memory.result_within(future, "search", started)
+
+        assert [fact["id"] for fact in results] == [fact["id"] for fact in self.memory.search_facts("E402 main.py", limit=2)]
+        assert self.memory.deadline_stats == {}
+
+    def test_late_result_is_dropped(self, monkeypatch):
+        """Au-delà de l'échéance, la valeur par défaut est renvoyée sans bloquer"""
+        monkeypatch.setenv("DS_MEMORY_DEADLINE_READ_S", "0.05")
+        assert self.memory.deadline("read") == 0.05
+
+        start = time.monotonic()
+        result = self.memory.call_with_deadline("read", time.sleep, 0.5, default="abandonné")
+
+        assert result == "abandonné"
+        assert time.monotonic() - start < 0.4
+        assert self.memory.deadline_stats["read"] == 1
+
+    def test_write_within_deadline(self):
+        """Une écriture rapide renvoie son résultat"""
+        stored = self.memory.call_with_deadline(
+            "write", self.memory.store_conversation_summary,
+            summary="session de test", topics=["tests"], outcomes=[]
+        )
+        assert stored["summary"] == "session de test"
+        assert self.memory.get_last_conversation()["summary"] == "session de test"
@@ -0,0 +1,157 @@
+"""
+Tests unitaires pour les écritures groupées de la mémoire Qdrant
+(client Qdrant en mode local ':memory:', backend de hachage à la place du modèle)
+"""
+
+from tools import memory_tools
+from tools.memory_tools import QdrantMemory, HashingBackend
+
+
+class CountingBackend(HashingBackend):
+    """Backend de hachage qui compte les appels et les textes encodés"""
+
+    def __init__(self):
+        super().__init__(dimension=16)
+        self.calls = 0
+        self.encoded = 0
+
+    def encode(self, texts, batch_size=64):
+        self.calls += 1
+        self.encoded += len(texts)
+        return super().encode(texts, batch_size)
+
+
+class TestMemoryBatch:
+    """Tests pour store_facts, remember_many et l'insertion par paquets"""
+
+    def setup_method(self):
+        """Mémoire sur un Qdrant local en mémoire (collection créée automatiquement)"""
+        self.memory = QdrantMemory(collection_name='test_batch', backend=CountingBackend())
+        self.memory.UPSERT_CHUNK_SIZE = 100
+        memory_tools._memory = self.memory
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_batch')
+        memory_tools._memory = None
+
+    def test_store_facts_batches_encoding_and_upserts(self):
+        """Un lot de faits = un appel au modèle, insertion en plusieurs paquets"""
+        facts = [f"fait numéro {i}" for i in range(250)]
+        stored = self.memory.store_facts(facts, category="import")
+
+        assert len(stored) == 250
+        assert self.memory.backend.calls == 1
+        assert self.memory.client.count('test_batch').count == 250
+        assert stored[10]['fact'] == "fait numéro 10"
+        assert stored[10]['category'] == "import"
+
+        # Les textes déjà encodés sont servis par le cache d'embeddings
+        self.memory.store_fact("fait numéro 10", category="import")
+        assert self.memory.backend.calls == 1
+
+    def test_store_decisions_and_summaries(self):
+        """Les variantes groupées conservent le format des variantes unitaires"""
+        decisions = self.memory.store_decisions([
+            {"decision": "Utiliser Qdrant", "reasoning": "Recherche sémantique"},
+            {"decision": "Garder le CLI", "reasoning": "Simplicité", "context": "v2"},
+        ])
+        assert decisions[1]['context'] == "v2"
+        assert len(self.memory.get_decisions()) == 2
+
+        summary = self.memory.store_conversation_summary("Résumé", ["tests"], ["ok"])
+        assert summary['topics'] == ["tests"]
+        assert self.memory.client.count('test_batch').count == 3
+
+    def test_remember_many_deduplicates(self):
+        """remember_many ignore les doublons du lot et les faits déjà en mémoire"""
+        memory_tools.remember("Le projet utilise Python 3.12")
+
+        result = memory_tools.remember_many([
+            "Le projet utilise Python 3.12",
+            "Les tests utilisent pytest",
+            "Les tests utilisent pytest",
+            {"fact": "Le démon écoute sur une socket Unix", "category": "architecture"},
+            "   ",
+        ])
+
+        assert result['stored'] == 2
+        assert result['deduplicated'] == 2
+        assert self.memory.flush_writes() is True  # Écritures différées des outils
+        assert self.memory.client.count('test_batch').count == 3
+        assert len(self.memory.get_facts(category="architecture")) == 1
+
+    def test_content_ids_make_exact_writes_idempotent(self):
+        """Même contenu (espaces ignorés) = même point, doublon exact sans embedding"""
+        first = self.memory.store_fact("Le cache  est dans ~/.cache/ds-cli")
+        again = self.memory.store_fact("Le cache est dans ~/.cache/ds-cli")
+        assert first['id'] == again['id']
+        assert self.memory.client.count('test_batch').count == 1
+
+        # La casse compte: pas d'écrasement d'un fait (ni de sa catégorie) par un autre
+        other = self.memory.store_fact("le cache est dans ~/.cache/ds-cli", category="outils")
+        assert other['id'] != first['id']
+        assert self.memory.client.count('test_batch').count == 2
+        assert [fact['category'] for fact in self.memory.get_facts(category="outils")] == ["outils"]
+        assert len(self.memory.get_facts(category="general")) == 1
+
+        calls = self.memory.backend.calls
+        result = memory_tools.remember("Le cache est dans ~/.cache/ds-cli")
+        assert result['status'] == "deduplicated"
+        assert result['id'] == first['id']
+        assert self.memory.backend.calls == calls
+
+    def test_failed_deferred_write_leaves_no_local_entry(self, monkeypatch):
+        """Lot différé refusé par Qdrant: aucun index local ne garde ses points"""
+        kept = self.memory.store_fact("Fait bien écrit dans cache.py")
+
+        def unavailable(**kwargs):
+            raise ConnectionError("Qdrant indisponible")
+        monkeypatch.setattr(self.memory.client, "upsert", unavailable)
+        lost = self.memory.store_fact("Fait jamais écrit dans lost.py", defer=True)
+        assert self.memory.local_store.get([lost['id']])  # Visible tant que le lot est en file
+        assert self.memory.flush_writes(timeout=5.0) is True
+
+        assert self.memory.write_queue.stats['errors'] == 1
+        assert self.memory.local_store.get([lost['id']]) == []
+        assert [doc_id for doc_id, _ in self.memory.lexical_index.search("lost.py")] == [kept['id']]
+        assert self.memory.find_exact("fact", "Fait jamais écrit dans lost.py") is None
+        if self.memory.local_index is not None:
+            assert len(self.memory.local_index) == 1
+        assert self.memory.find_exact("fact", "Fait bien écrit dans cache.py")['id'] == kept['id']
+
+    def test_statistics_use_counts_and_cache(self):
+        """Comptages exacts par type, répartition par catégorie, cache invalidé par les écritures"""
+        self.memory.store_facts([f"fait {i}" for i in range(30)], category="import")
+        self.memory.store_fact("Le démon écoute sur une socket Unix", category="architecture")
+        self.memory.store_decision("Utiliser Qdrant", "Recherche sémantique")
+
+        stats = self.memory.get_statistics()
+        assert stats['total_points'] == 32
+        assert stats['total_facts'] == 31
+        assert stats['total_decisions'] == 1
+        assert stats['total_conversations'] == 0
+        assert stats['categories'] == {"import": 30, "architecture": 1}
+
+        # Servi par le cache, puis recalculé après une écriture
+        assert self.memory.get_statistics() is stats
+        self.memory.store_fact("Nouveau fait")
+        assert self.memory.get_statistics()['total_facts'] == 32
+
+    def test_last_conversation_is_newest_beyond_100(self):
+        """La dernière conversation est la plus récente, même au-delà de 100 résumés"""
+        summaries = [
+            {"summary": f"Conversation {i}", "topics": [f"sujet {i}"], "outcomes": []}
+            for i in range(150)
+        ]
+        stored = self.memory.store_conversation_summaries(summaries)
+
+        # Horodatages distincts, dans un ordre sans rapport avec l'ordre d'insertion
+        self.memory.update_payloads({
+            conversation['id']: {"timestamp": f"2026-{1 + (i * 7) % 12:02d}-{1 + (i * 11) % 28:02d}T{i % 24:02d}:00:00"}
+            for i, conversation in enumerate(stored)
+        })
+        newest = max(range(150), key=lambda i: f"2026-{1 + (i * 7) % 12:02d}-{1 + (i * 11) % 28:02d}T{i % 24:02d}:00:00")
+
+        assert self.memory.get_last_conversation()['summary'] == f"Conversation {newest}"
+        self.memory.local_store = None  # Même résultat servi par Qdrant (tri côté serveur)
+        assert self.memory.get_last_conversation()['summary'] == f"Conversation {newest}"
@@ -0,0 +1,100 @@
+"""
+Tests unitaires pour la consolidation de la mémoire
+"""
+
+import queue
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from tools import memory_tools
+from tools.memory_tools import QdrantMemory, HashingBackend
+from tools.memory_consolidation import (
+    consolidate_memory, find_duplicate_clusters, retention_score,
+    start_consolidation_task, stop_consolidation_task
+)
+
+
+class TestMemoryConsolidation:
+    """Tests pour la fusion des doublons, la décroissance et les plafonds"""
+
+    def setup_method(self):
+        """Mémoire sur un Qdrant local en mémoire"""
+        self.memory = QdrantMemory(collection_name='test_consolidation', backend=HashingBackend(64))
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_consolidation')
+
+    def test_local_index_sees_usage_and_merges(self):
+        """usage_count et merged_count écrits via update_payloads visibles dans les recherches locales"""
+        stored = self.memory.store_facts(["Le projet utilise pytest pour les tests",
+                                          "Le projet utilise pytest pour les tests."], category="notes")
+        self.memory.refresh_local_index()
+        self.memory.record_usage([stored[0]['id'], stored[1]['id']])
+        self.memory.flush_usage()
+        hits = self.memory.search_facts("Le projet utilise pytest pour les tests", limit=2, hybrid=False)
+        assert [hit['usage_count'] for hit in hits] == [1, 1]
+
+        consolidate_memory(self.memory, max_per_category=5, max_conversations=2)
+        hits = self.memory.search_facts("Le projet utilise pytest pour les tests", limit=2, hybrid=False)
+        assert len(hits) == 1 and hits[0]['usage_count'] == 2
+
+    def test_periodic_task_reports_without_printing(self, capsys, monkeypatch):
+        """La tâche d'arrière-plan transmet ses résultats à l'appelant, sans écrire dans le terminal"""
+        monkeypatch.setattr(memory_tools, '_memory', self.memory)
+        self.memory.store_facts(["Le projet utilise pytest pour les tests",
+                                 "Le projet utilise pytest pour les tests."])
+        results = queue.SimpleQueue()
+        assert start_consolidation_task(interval_hours=0.01 / 3600, on_result=results.put) is True
+        try:
+            result = results.get(timeout=10)
+        finally:
+            stop_consolidation_task()
+        assert result['success'] and result['facts_merged'] == 1
+        assert capsys.readouterr().out == ""
+
+    def test_clusters_do_not_chain(self):
+        """Un groupe ne contient que des voisins directs de son représentant"""
+        vectors = np.array([[1.0, 0.0], [0.95, 0.31], [0.81, 0.59], [0.0, 1.0]], dtype=np.float32)
+        clusters = find_duplicate_clusters(vectors, priority=[0, 1, 2, 3], threshold=0.9)
+        assert clusters == [[0, 1]]
+
+    def test_retention_score_decays_and_rewards_usage(self):
+        """Le score baisse avec l'âge et augmente avec l'utilisation"""
+        now = datetime.now()
+        old = {"timestamp": (now - timedelta(days=90)).isoformat()}
+        recent = {"timestamp": now.isoformat()}
+        used = {"timestamp": (now - timedelta(days=90)).isoformat(), "usage_count": 3}
+        assert abs(retention_score(old, now) - 0.5) < 1e-3
+        assert retention_score(recent, now) > retention_score(old, now)
+        assert retention_score(used, now) > retention_score(recent, now)
+
+    def test_consolidate_merges_and_caps(self):
+        """Doublons fusionnés (utilisations cumulées), plafonds appliqués, réduction rapportée"""
+        # Quasi-doublons (ponctuation): les copies exactes partagent déjà le même ID de point
+        facts = ["Le projet utilise pytest pour les tests", "Le projet utilise pytest pour les tests.",
+                 "Le projet utilise pytest pour les tests !"] + [f"note numéro {i} sur le cache" for i in range(6)]
+        stored = self.memory.store_facts(facts, category="notes")
+        self.memory.record_usage([stored[1]['id'], stored[2]['id']])
+        self.memory.store_conversation_summaries([
+            {"summary": f"Conversation {i}", "topics": [], "outcomes": []} for i in range(4)
+        ])
+
+        preview = consolidate_memory(self.memory, max_per_category=5, max_conversations=2, dry_run=True)
+        assert preview['success'] is True
+        assert self.memory.get_statistics(refresh=True)['total_points'] == 13
+
+        result = consolidate_memory(self.memory, max_per_category=5, max_conversations=2)
+        assert result['facts_merged'] == 2
+        assert result['facts_capped'] == 2
+        assert result['conversations_capped'] == 2
+        assert result['points_after'] == 7
+        assert result == {**preview, 'dry_run': False, 'duration_s': result['duration_s']}
+
+        survivors = self.memory.get_facts(category="notes", limit=100)
+        pytest_facts = [f for f in survivors if "pytest" in f['fact']]
+        assert len(pytest_facts) == 1
+
+        points = self.memory.client.retrieve('test_consolidation', ids=[pytest_facts[0]['id']])
+        assert points[0].payload['usage_count'] == 2
+        assert points[0].payload['merged_count'] == 2
@@ -0,0 +1,158 @@
+"""
+Tests unitaires pour la migration de la mémoire vers un nouveau modèle d'embeddings
+"""
+
+import json
+
+import pytest
+from qdrant_client.models import DeleteAlias, DeleteAliasOperation
+
+from tools import memory_tools
+from tools.memory_migration import migrate_embeddings, resolve_alias
+from tools.memory_tools import QdrantMemory, HashingBackend
+
+
+class FailingBackend(HashingBackend):
+    """Backend interrompu après quelques lots (simule un arrêt pendant la migration)"""
+
+    def __init__(self, dimension: int, fail_after: int):
+        super().__init__(dimension)
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def encode(self, texts, batch_size=64):
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise RuntimeError("interruption")
+        return super().encode(texts, batch_size)
+
+
+class TestMemoryMigration:
+    """Tests du ré-embedding, de la reprise et de la bascule par alias"""
+
+    def setup_method(self):
+        self.memory = QdrantMemory(collection_name='test_migration', backend=HashingBackend(32))
+        memory_tools._memory = self.memory
+        self.facts = self.memory.store_facts([f"fait numéro {i} sur le projet" for i in range(5)])
+        self.decision = self.memory.store_decision("utiliser pytest", "déjà en place")
+        self.client = self.memory.client
+
+    def teardown_method(self):
+        if resolve_alias(self.client, 'test_migration'):
+            self.client.update_collection_aliases(change_aliases_operations=[
+                DeleteAliasOperation(delete_alias=DeleteAlias(alias_name='test_migration'))
+            ])
+        for collection in self.client.get_collections().collections:
+            if collection.name.startswith('test_migration'):
+                self.client.delete_collection(collection.name)
+        memory_tools._memory = None
+
+    def test_migrate_and_switch_alias(self, tmp_path):
+        result = migrate_embeddings(HashingBackend(64), collection_name='test_migration',
+                                    workers=1, checkpoint_dir=str(tmp_path))
+
+        assert result["success"], result.get("error")
+        assert result["points_migrated"] == 6
+        assert result["switched"] and result["atomic_switch"] is False  # Première bascule: backup
+        assert json.loads(open(result["backup_file"]).read())["metadata"]["total_points"] == 6
+        assert resolve_alias(self.client, 'test_migration') == 'test_migration__hashing-v1-64'
+        assert list(tmp_path.glob("migration_*.json")) == []
+        # Ancienne collection conservée sous son nom physique, vecteurs compris
+        assert result["preserved_source"] == 'test_migration__hashing-v1-32'
+        old = self.client.retrieve('test_migration__hashing-v1-32', ids=[self.decision["id"]], with_vectors=True)[0]
+        assert len(old.vector) == 32
+
+        # Mêmes IDs, nouveau modèle, mémoire chargée basculée
+        assert self.memory.backend.dimension == 64
+        found = self.memory.search_facts("fait numéro 3 sur le projet", limit=1)
+        assert found[0]["id"] == self.facts[3]["id"]
+        point = self.client.retrieve('test_migration', ids=[self.decision["id"]], with_vectors=True)[0]
+        assert len(point.vector) == 64 and point.payload["vector_space"] == "hashing-v1-64"
+
+        # Migration suivante: alias existant, bascule atomique
+        result = migrate_embeddings(HashingBackend(48), collection_name='test_migration',
+                                    workers=1, checkpoint_dir=str(tmp_path), drop_source=True)
+        assert result["success"] and result["atomic_switch"] is True
+        assert not self.client.collection_exists('test_migration__hashing-v1-64')
+
+    def test_interrupted_first_switch_is_completed(self, tmp_path, monkeypatch):
+        """Arrêt entre la libération du nom et la création de l'alias: données intactes, bascule terminée à la relance"""
+        update_aliases = self.client.update_collection_aliases
+
+        def crash(*args, **kwargs):
+            raise RuntimeError("interruption")
+
+        monkeypatch.setattr(self.client, "update_collection_aliases", crash)
+        failed = migrate_embeddings(HashingBackend(64), collection_name='test_migration',
+                                    workers=1, checkpoint_dir=str(tmp_path))
+        assert not failed["success"]
+        assert self.client.count('test_migration__hashing-v1-32').count == 6
+        assert self.client.count('test_migration__hashing-v1-64').count == 6
+
+        monkeypatch.setattr(self.client, "update_collection_aliases", update_aliases)
+        result = migrate_embeddings(HashingBackend(64), collection_name='test_migration',
+                                    workers=1, checkpoint_dir=str(tmp_path))
+        assert result["success"] and result["resumed"] and result["switched"]
+        assert resolve_alias(self.client, 'test_migration') == 'test_migration__hashing-v1-64'
+        assert list(tmp_path.glob("migration_*.json")) == []
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        failed = migrate_embeddings(FailingBackend(64, fail_after=2), collection_name='test_migration',
+                                    batch_size=2, workers=1, checkpoint_dir=str(tmp_path))
+        assert not failed["success"]
+        checkpoint = json.loads(next(tmp_path.glob("migration_*.json")).read_text())
+        assert checkpoint["migrated"] == 4
+
+        backend = FailingBackend(64, fail_after=100)
+        result = migrate_embeddings(backend, collection_name='test_migration',
+                                    batch_size=2, workers=1, checkpoint_dir=str(tmp_path))
+        assert result["success"] and result["resumed"]
+        assert backend.calls == 1  # Seul le dernier lot restait à encoder
+        assert result["points_migrated"] == 6
+
+    def test_resume_with_process_pool(self, tmp_path, monkeypatch):
+        """Reprise avec plusieurs processus d'encodage: lots en cours perdus, lots écrits conservés"""
+        target = 'test_migration__hashing-v1-64'
+        upsert = self.client.upsert
+        writes = []
+        fail_after = [2]  # Lots écrits dans la cible avant l'interruption
+
+        def counting_upsert(collection_name, *args, **kwargs):
+            if collection_name == target:
+                writes.append(len(kwargs["points"]))
+                if len(writes) > fail_after[0]:
+                    raise RuntimeError("interruption")
+            return upsert(collection_name, *args, **kwargs)
+
+        monkeypatch.setattr(self.client, "upsert", counting_upsert)
+        failed = migrate_embeddings(HashingBackend(64), collection_name='test_migration',
+                                    batch_size=2, workers=2, checkpoint_dir=str(tmp_path))
+        assert not failed["success"]
+        checkpoint = json.loads(next(tmp_path.glob("migration_*.json")).read_text())
+        assert checkpoint["migrated"] == 4
+
+        writes.clear()
+        fail_after[0] = 100
+        result = migrate_embeddings(HashingBackend(64), collection_name='test_migration',
+                                    batch_size=2, workers=2, checkpoint_dir=str(tmp_path))
+        assert result["success"] and result["resumed"] and result["workers"] == 2
+        assert writes == [2]  # Seul le dernier lot restait à écrire
+        assert result["points_migrated"] == 6
+        point = self.client.retrieve('test_migration', ids=[self.decision["id"]], with_vectors=True)[0]
+        assert len(point.vector) == 64
+
+    def test_same_vector_space_is_refused(self, tmp_path):
+        migrate_embeddings(HashingBackend(64), collection_name='test_migration',
+                           workers=1, checkpoint_dir=str(tmp_path))
+        result = migrate_embeddings(HashingBackend(64), collection_name='test_migration',
+                                    workers=1, checkpoint_dir=str(tmp_path))
+        assert not result["success"]
+
+    def test_process_pool_encoding(self, tmp_path):
+        """Encodage dans des processus séparés: mêmes vecteurs qu'en local"""
+        result = migrate_embeddings(HashingBackend(64), collection_name='test_migration', batch_size=2,
+                                    workers=2, checkpoint_dir=str(tmp_path), switch=False)
+        assert result["success"], result.get("error")
+        point = self.client.retrieve('test_migration__hashing-v1-64', ids=[self.facts[0]["id"]], with_vectors=True)[0]
+        expected = HashingBackend(64).encode([self.facts[0]["fact"]])[0]
+        assert point.vector == pytest.approx(expected.tolist(), abs=1e-6)
@@ -0,0 +1,102 @@
+"""
+Tests unitaires pour les espaces de noms mémoire par projet
+"""
+
+from qdrant_client.models import PointStruct
+
+from tools import memory_tools
+from tools.memory_tools import QdrantMemory, HashingBackend, current_namespace, GLOBAL_NAMESPACE
+
+
+class TestNamespaceDetection:
+    """Tests pour la détection de l'espace de noms du projet"""
+
+    def test_git_root_name(self, tmp_path, monkeypatch):
+        """Nom de la racine git et hash de son chemin, depuis n'importe quel sous-répertoire"""
+        monkeypatch.delenv("DS_MEMORY_NAMESPACE", raising=False)
+        (tmp_path / "mon-projet" / ".git").mkdir(parents=True)
+        (tmp_path / "mon-projet" / "src" / "pkg").mkdir(parents=True)
+        namespace = current_namespace(str(tmp_path / "mon-projet" / "src" / "pkg"))
+        assert namespace.startswith("mon-projet-") and len(namespace) == len("mon-projet-") + 8
+        assert current_namespace(str(tmp_path / "mon-projet")) == namespace
+        assert current_namespace(str(tmp_path)).startswith(tmp_path.name + "-")
+
+    def test_homonymous_repositories_are_distinct(self, tmp_path, monkeypatch):
+        """Deux dépôts `api` n'ont pas le même espace de noms; `global` reste réservé"""
+        monkeypatch.delenv("DS_MEMORY_NAMESPACE", raising=False)
+        for owner in ("client-a", "client-b", "outils"):
+            (tmp_path / owner / ("global" if owner == "outils" else "api") / ".git").mkdir(parents=True)
+        first = current_namespace(str(tmp_path / "client-a" / "api"))
+        second = current_namespace(str(tmp_path / "client-b" / "api"))
+        assert first != second and first.startswith("api-") and second.startswith("api-")
+        assert current_namespace(str(tmp_path / "outils" / "global")) != GLOBAL_NAMESPACE
+
+    def test_git_init_during_session(self, tmp_path, monkeypatch):
+        """Un dépôt créé en cours de session change l'espace de noms (pas de réponse en cache)"""
+        monkeypatch.delenv("DS_MEMORY_NAMESPACE", raising=False)
+        (tmp_path / "projet" / "src").mkdir(parents=True)
+        before = current_namespace(str(tmp_path / "projet" / "src"))
+        assert before.startswith("src-")
+        (tmp_path / "projet" / ".git").mkdir()
+        assert current_namespace(str(tmp_path / "projet" / "src")).startswith("projet-")
+
+    def test_environment_override(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DS_MEMORY_NAMESPACE", "client-x")
+        assert current_namespace(str(tmp_path)) == "client-x"
+        monkeypatch.setenv("DS_MEMORY_NAMESPACE", GLOBAL_NAMESPACE)  # Réservé: ignoré
+        assert current_namespace(str(tmp_path)).startswith(tmp_path.name + "-")
+
+
+class TestNamespacedRetrieval:
+    """Tests du filtrage des lectures: projet courant + niveau global (+ points sans espace de noms)"""
+
+    def setup_method(self):
+        self.memory = QdrantMemory(collection_name='test_namespaces', backend=HashingBackend(dimension=32))
+        memory_tools._memory = self.memory
+        self.memory.store_fact("le cache des outils est invalidé par write_file", namespace="alpha")
+        self.memory.store_fact("le cache des images est purgé chaque nuit", namespace="beta")
+        self.memory.store_fact("l'utilisateur préfère les réponses en français", namespace=GLOBAL_NAMESPACE)
+        # Point antérieur aux espaces de noms (pas de champ namespace)
+        self.memory.client.upsert('test_namespaces', points=[PointStruct(
+            id=1, vector=self.memory._generate_embedding("ancien fait sur le cache"),
+            payload={"type": "fact", "fact": "ancien fait sur le cache", "category": "general"}
+        )])
+        self.memory.refresh_local_store()
+        self.memory.refresh_lexical_index()
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_namespaces')
+        memory_tools._memory = None
+
+    def _facts(self, results):
+        return {fact["fact"] for fact in results}
+
+    def test_search_sees_project_global_and_legacy(self):
+        for hybrid in (True, False):
+            facts = self._facts(self.memory.search_facts("cache", limit=10, hybrid=hybrid, namespace="alpha"))
+            assert "le cache des outils est invalidé par write_file" in facts
+            assert "ancien fait sur le cache" in facts
+            assert "le cache des images est purgé chaque nuit" not in facts
+
+        facts = self._facts(self.memory.get_facts(limit=100, namespace="beta"))
+        assert facts == {"le cache des images est purgé chaque nuit",
+                         "l'utilisateur préfère les réponses en français", "ancien fait sur le cache"}
+
+    def test_local_index_applies_same_scope(self):
+        self.memory.refresh_local_index()
+        facts = self._facts(self.memory.search_facts("cache", limit=10, hybrid=False, namespace="alpha"))
+        assert "le cache des images est purgé chaque nuit" not in facts
+        assert "le cache des outils est invalidé par write_file" in facts
+
+    def test_same_fact_in_two_projects(self):
+        """Même contenu, projets différents: deux points distincts"""
+        first = self.memory.store_fact("les tests utilisent pytest", namespace="alpha")
+        second = self.memory.store_fact("les tests utilisent pytest", namespace="beta")
+        assert first["id"] != second["id"]
+        assert self.memory.find_exact("fact", "les tests utilisent pytest", namespace="alpha")["id"] == first["id"]
+
+    def test_last_conversation_per_project(self):
+        self.memory.store_conversation_summary("session alpha", [], [], namespace="alpha")
+        self.memory.store_conversation_summary("session beta", [], [], namespace="beta")
+        assert self.memory.get_last_conversation(namespace="alpha")["summary"] == "session alpha"
+        assert self.memory.get_last_conversation(namespace="beta")["summary"] == "session beta"
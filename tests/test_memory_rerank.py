@@ -0,0 +1,93 @@
+"""
+Tests unitaires pour le reclassement des faits rappelés (fraîcheur, MMR, budget de tokens)
+"""
+
+from datetime import datetime, timedelta
+
+from tools import memory_tools
+from tools.memory_rerank import relevance, select_facts
+from tools.memory_tools import QdrantMemory, HashingBackend
+
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def _fact(text, score, days=0, usage=0, **extra):
+    return {"id": text, "fact": text, "score": score, "usage_count": usage,
+            "timestamp": (NOW - timedelta(days=days)).isoformat(), **extra}
+
+
+class TestRerank:
+    """Tests pour la pertinence et la sélection MMR"""
+
+    def test_recent_correction_beats_stale_fact(self):
+        """À similarité proche, le fait récent passe devant l'ancien"""
+        stale = _fact("le port du serveur est 8000", 0.82, days=120)
+        fresh = _fact("le port du serveur est maintenant 8080", 0.78, days=1)
+        assert relevance(fresh, NOW) > relevance(stale, NOW)
+
+        selected = select_facts([stale, fresh], [[1.0, 0.0], [0.9, 0.1]], token_budget=10, now=NOW)
+        assert [fact["id"] for fact in selected] == [fresh["id"]]
+
+    def test_usage_and_lexical_match(self):
+        """Les faits souvent rappelés et les identifiants exacts sont favorisés"""
+        assert relevance(_fact("a", 0.5, usage=8), NOW) > relevance(_fact("b", 0.5), NOW)
+        assert relevance(_fact("c", 0.0, lexical_match=True), NOW) > relevance(_fact("d", 0.4), NOW)
+        assert relevance({"fact": "sans date", "score": 0.5}, NOW) > 0
+
+    def test_mmr_skips_paraphrases(self):
+        """Deux paraphrases: une seule retenue, même avec du budget pour l'autre"""
+        facts = [
+            _fact("l'utilisateur préfère pytest", 0.90),
+            _fact("l'utilisateur aime utiliser pytest", 0.88),
+            _fact("la CI tourne sur GitHub Actions", 0.60),
+        ]
+        vectors = [[1.0, 0.0], [0.99, 0.05], [0.0, 1.0]]
+        selected = select_facts(facts, vectors, token_budget=150, now=NOW)
+        assert [fact["id"] for fact in selected] == [facts[0]["id"], facts[2]["id"]]
+
+    def test_token_budget(self):
+        """Le budget borne les tokens; un fait trop long laisse sa place à un plus court"""
+        facts = [_fact("x" * 400, 0.9), _fact("court", 0.5), _fact("y" * 40, 0.45)]
+        vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        selected = select_facts(facts, vectors, token_budget=15, now=NOW)
+        assert [fact["fact"] for fact in selected] == ["court", "y" * 40]
+        assert select_facts(facts, vectors, token_budget=0, now=NOW) == []
+
+    def test_facts_in_context_cost_nothing(self):
+        """Un fait déjà injecté est signalé sans consommer de budget, et ses paraphrases restent pénalisées"""
+        facts = [
+            _fact("l'utilisateur préfère pytest", 0.90),
+            _fact("l'utilisateur aime utiliser pytest", 0.88),
+            _fact("la CI tourne sur GitHub Actions", 0.60),
+        ]
+        vectors = [[1.0, 0.0], [0.99, 0.05], [0.0, 1.0]]
+        selected = select_facts(facts, vectors, token_budget=9, now=NOW, in_context={facts[0]["id"]})
+        assert [(fact["id"], fact["in_context"]) for fact in selected] == [
+            (facts[0]["id"], True), (facts[2]["id"], False)
+        ]
+
+
+class TestRecall:
+    """Tests de QdrantMemory.submit_recall sur un Qdrant local"""
+
+    def setup_method(self):
+        self.memory = QdrantMemory(collection_name='test_rerank', backend=HashingBackend(dimension=64))
+        memory_tools._memory = self.memory
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_rerank')
+        memory_tools._memory = None
+
+    def test_recall_within_budget(self):
+        self.memory.store_facts([
+            "le projet utilise pytest pour les tests",
+            "le projet utilise pytest pour les tests unitaires",
+            "la documentation est écrite en français",
+        ])
+        future = self.memory.submit_recall("le projet utilise pytest pour les tests", token_budget=12, min_score=0.0)
+        facts = self.memory.result_within(future, "search")
+
+        assert facts and facts[0]["fact"].startswith("le projet utilise pytest")
+        assert sum(len(fact["fact"]) // 4 + 1 for fact in facts) <= 12
+        assert all("relevance" in fact and "usage_count" in fact for fact in facts)
@@ -0,0 +1,88 @@
+"""
+Tests unitaires pour le préchauffage de la mémoire en arrière-plan et les tours sans rappel
+"""
+
+from concurrent.futures import Future
+
+import pytest
+
+import main
+import tools.memory_tools
+
+
+@pytest.fixture
+def warmup(monkeypatch):
+    """Préchauffage neuf (l'état est partagé par le processus)"""
+    state = {'future': None, 'started_at': None, 'duration_s': None, 'error': None}
+    monkeypatch.setattr(main, '_memory_warmup', state)
+    return state
+
+
+def _stats_when_resolved(future):
+    """Statistiques vues par un observateur au moment où la future est résolue"""
+    seen = {}
+    future.add_done_callback(lambda _: seen.update(main.memory_warmup_stats()))
+    return seen
+
+
+class TestMemoryWarmup:
+    """Tests du préchauffage partagé par les agents du processus"""
+
+    def test_resolved_with_memory(self, warmup, monkeypatch):
+        memory = object()
+        monkeypatch.setattr(tools.memory_tools, 'get_memory', lambda: memory)
+
+        future = main.start_memory_warmup()
+        assert main.start_memory_warmup() is future  # Idempotent
+        seen = _stats_when_resolved(future)
+        assert future.result(timeout=5) is memory
+        # Durée déjà connue quand la future est résolue (/stats, --profile-startup)
+        assert seen['duration_s'] is not None and seen['duration_s'] >= 0
+        assert main.memory_warmup_stats()['error'] is None
+
+    def test_failure_recorded_before_resolution(self, warmup, monkeypatch):
+        def fail():
+            raise ConnectionError("Qdrant injoignable")
+        monkeypatch.setattr(tools.memory_tools, 'get_memory', fail)
+
+        future = main.start_memory_warmup()
+        seen = _stats_when_resolved(future)
+        with pytest.raises(ConnectionError):
+            future.result(timeout=5)
+        assert seen['error'] == "Qdrant injoignable" and seen['duration_s'] is not None
+
+
+class TestRecallWhileLoading:
+    """Tests d'un tour lancé avant la fin du préchauffage"""
+
+    @pytest.fixture
+    def agent(self, monkeypatch):
+        monkeypatch.setenv('DEEPSEEK_API_KEY', 'test')
+        pending = Future()
+        monkeypatch.setattr(main, 'start_memory_warmup', lambda: pending)
+        agent = main.DeepSeekAgent(system_prompt="prompt de test")
+        agent.memory_wait_timeout = 0.01
+        return agent, pending
+
+    def test_recall_skipped_while_loading(self, agent, capsys):
+        agent, _ = agent
+        assert agent.memory_ready() is False
+        assert agent._start_memory_recall("comment lancer les tests ?") is None
+        assert agent._get_relevant_memory(None) == ""
+        assert agent.token_stats['memory_skipped'] == 1
+        assert "rappel ignoré pour ce message" in capsys.readouterr().out
+
+    def test_recall_started_once_ready(self, agent):
+        agent, pending = agent
+
+        class FakeMemory:
+            def submit_recall(self, message, budget, **kwargs):
+                self.submitted = (message, budget, kwargs['namespace'])
+                return Future()
+
+        memory = FakeMemory()
+        pending.set_result(memory)
+        recall = agent._start_memory_recall("comment lancer les tests ?")
+        assert recall is not None and recall[0] is memory
+        assert memory.submitted[:2] == ("comment lancer les tests ?", agent.memory_token_budget)
+        assert agent.token_stats['memory_skipped'] == 0
@@ -0,0 +1,111 @@
+"""
+Tests unitaires pour le suivi de progression de l'agent
+"""
+
+import os
+import tempfile
+from tools.file_tools import read_file
+from tools.progress_tracker import ProgressTracker
+
+
+class TestProgressTracker:
+    """Tests pour la détection des itérations sans progrès"""
+
+    def setup_method(self):
+        """Créer un fichier de test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.temp_dir, "app.py")
+        with open(self.test_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"ligne {i}\n" for i in range(1, 101)))
+        self.tracker = ProgressTracker()
+
+    def teardown_method(self):
+        """Nettoyer après chaque test"""
+        import shutil
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def _read(self, start, end):
+        params = {'file_path': self.test_file, 'start_line': start, 'end_line': end}
+        blocked = self.tracker.check('read_file', params)
+        if blocked:
+            return blocked, None
+        result = read_file(**params)
+        return result, self.tracker.record('read_file', params, result)
+
+    def test_overlapping_read_is_flagged_then_blocked(self):
+        """Une plage couverte par des lectures précédentes est signalée puis bloquée"""
+        self._read(1, 60)
+        self._read(50, 100)
+        assert self.tracker.end_iteration() is False
+
+        _, guidance = self._read(10, 90)
+        assert guidance is not None
+
+        blocked, _ = self._read(20, 30)
+        assert blocked['no_progress'] is True
+        assert self.tracker.stats['blocked_calls'] == 1
+
+    def test_read_allowed_after_file_change(self):
+        """Une relecture après modification du fichier est un progrès"""
+        self._read(1, 50)
+        with open(self.test_file, 'a', encoding='utf-8') as f:
+            f.write("ajout\n")
+        _, guidance = self._read(1, 50)
+        assert guidance is None
+
+    def test_read_allowed_after_truncation(self):
+        """Une lecture sortie du contexte peut être refaite"""
+        self._read(1, 50)
+        self.tracker.prune_reads("historique sans le contenu lu")
+        _, guidance = self._read(1, 50)
+        assert guidance is None
+
+    def test_repeated_failing_edits_stop_agent(self):
+        """Des éditions qui échouent à répétition mènent à l'arrêt anticipé"""
+        params = {'file_path': self.test_file, 'old_text': 'absent', 'new_text': 'x'}
+        failure = {'success': False, 'error': f'Texte à remplacer non trouvé dans {self.test_file}'}
+
+        stop = False
+        for _ in range(5):
+            if not self.tracker.check('replace_in_file', params):
+                self.tracker.record('replace_in_file', params, failure)
+            stop = self.tracker.end_iteration()
+            if stop:
+                break
+
+        assert stop is True
+        assert self.tracker.stats['stalled_iterations'] >= 3
+
+    def test_truncated_read_records_only_delivered_lines(self):
+        """Résultat tronqué: la suite non transmise peut être lue sans être signalée"""
+        self.tracker = ProgressTracker(max_read_chars=200)  # ~20 lignes sur 100
+        params = {'file_path': self.test_file}
+        self.tracker.record('read_file', params, read_file(**params))
+
+        _, guidance = self._read(60, 100)
+        assert guidance is None
+        _, guidance = self._read(1, 5)
+        assert guidance is not None
+
+    def test_relative_paths_use_session_cwd(self):
+        """Chemins relatifs résolus contre le répertoire de la session, pas celui du processus"""
+        self.tracker = ProgressTracker(cwd=self.temp_dir)
+        params = {'file_path': 'app.py', 'start_line': 1, 'end_line': 50}
+        self.tracker.record('read_file', params, read_file(self.test_file, 1, 50))
+        assert self.tracker.record('read_file', params, read_file(self.test_file, 1, 50)) is not None
+        absolute = {'file_path': self.test_file, 'start_line': 1, 'end_line': 50}
+        self.tracker.check('read_file', absolute)
+        assert self.tracker.check('read_file', absolute)['no_progress'] is True
+
+    def test_tokens_saved_counts_blocked_reads(self):
+        """Tokens économisés = taille de la relecture bloquée (pas de la dernière lecture)"""
+        self._read(1, 100)
+        self._read(1, 100)  # Signalée
+        blocked, _ = self._read(1, 10)
+        assert blocked['no_progress'] is True
+        expected = len(read_file(self.test_file, 1, 100)) // 4 * 10 // 100
+        assert abs(self.tracker.stats['tokens_saved'] - expected) <= 1
+        self.tracker.record_early_stop()
+        assert self.tracker.stats['early_stops'] == 1
+        assert abs(self.tracker.stats['tokens_saved'] - expected) <= 1
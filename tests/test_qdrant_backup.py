@@ -13,6 +13,10 @@ from tools.qdrant_backup import (
     list_backups,
     get_backup_stats
 )
+from tools.memory_tools import get_qdrant_client
+
+# Qdrant embarqué (QDRANT_ENDPOINT=:memory: dans conftest), rempli depuis backups/
+pytestmark = pytest.mark.usefixtures("seeded_qdrant")
 
 
 class TestQdrantBackup:
@@ -87,3 +91,15 @@ class TestQdrantBackup:
             assert 'collection_name' in data['metadata']
             assert 'timestamp' in data['metadata']
             assert isinstance(data['points'], list)
+    
+    def test_restore_creates_collection(self):
+        """Test de restauration dans une collection absente (créée automatiquement)"""
+        result = backup_qdrant(backup_dir=self.temp_dir)
+        assert result['success'] is True
+        
+        restored = restore_qdrant(result['backup_file'], collection_name="restored_collection")
+        assert restored['success'] is True
+        assert restored['points_restored'] == result['total_points']
+        
+        client = get_qdrant_client()
+        assert client.count("restored_collection").count == result['total_points']
@@ -0,0 +1,123 @@
+"""
+Tests unitaires pour le schéma optimisé de la collection Qdrant
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from qdrant_client.models import CollectionStatus, Disabled, PayloadSchemaType, ScalarQuantization
+
+import tools.memory_tools
+from tools.memory_tools import get_qdrant_client
+from tools.qdrant_schema import (
+    PAYLOAD_INDEXES,
+    SEARCH_HNSW_EF,
+    is_embedded,
+    create_payload_indexes,
+    collection_search_params,
+    measure_latency,
+    optimize_collection
+)
+
+# Qdrant embarqué (QDRANT_ENDPOINT=:memory: dans conftest), rempli depuis backups/
+pytestmark = pytest.mark.usefixtures("seeded_qdrant")
+
+
+class TestQdrantSchema:
+    """Tests pour les index de payload, la mesure de latence et la migration"""
+
+    def test_creates_missing_payload_indexes(self):
+        """Serveur Qdrant: seuls les index absents sont créés, avec leur type"""
+        client = _server_client(payload_schema={'type': object()})
+        created = create_payload_indexes(client, "facts")
+
+        assert created == ['category', 'namespace', 'timestamp']
+        calls = {call.kwargs['field_name']: call.kwargs for call in client.create_payload_index.call_args_list}
+        assert set(calls) == set(created)
+        assert calls['category']['field_schema'] == PayloadSchemaType.KEYWORD
+        assert calls['timestamp']['field_schema'] == PayloadSchemaType.DATETIME
+        assert all(call['collection_name'] == "facts" and call['wait'] for call in calls.values())
+
+    def test_embedded_mode_is_noop(self, seeded_qdrant):
+        """En mode embarqué, aucun index n'est créé et la recherche reste exacte"""
+        client = get_qdrant_client()
+        assert is_embedded(client) is True
+        assert create_payload_indexes(client, seeded_qdrant['collection']) == []
+        assert collection_search_params(client, seeded_qdrant['collection']) is None
+
+    def test_measure_latency_and_optimize(self, seeded_qdrant):
+        """La latence est mesurée avant/après, sans modifier une collection embarquée"""
+        latency = measure_latency(get_qdrant_client(), seeded_qdrant['collection'], samples=5)
+        assert latency['samples'] == 5
+        assert latency['search']['p50_ms'] >= 0
+        assert latency['search']['p95_ms'] >= latency['search']['p50_ms']
+
+        result = optimize_collection(collection_name=seeded_qdrant['collection'], samples=5)
+        assert result['success'] is True
+        assert result['embedded'] is True
+        assert result['latency_before']['samples'] == 5
+
+
+def _server_client(payload_schema=None, quantization_config=None):
+    """Client simulé d'un serveur Qdrant (non embarqué), collection vide et indexée"""
+    client = MagicMock()
+    client.get_collection.return_value = SimpleNamespace(
+        payload_schema=payload_schema or {},
+        status=CollectionStatus.GREEN,
+        config=SimpleNamespace(quantization_config=quantization_config)
+    )
+    client.scroll.return_value = ([], None)
+    return client
+
+
+class TestOptimizeCollection:
+    """Tests de la migration en place sur un serveur Qdrant (client simulé)"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        client = _server_client()
+        monkeypatch.setattr(tools.memory_tools, "get_qdrant_client", lambda url=None: client)
+        return client
+
+    @pytest.mark.parametrize("quantization, expected", [
+        (None, None),
+        (True, ScalarQuantization),
+        (False, Disabled.DISABLED),
+    ])
+    def test_quantization_option(self, client, quantization, expected):
+        """None = inchangée, True = int8, False = désactivée explicitement"""
+        result = optimize_collection(collection_name="facts", quantization=quantization, samples=5)
+        assert result['success'] is True and result['embedded'] is False
+        assert result['indexes_created'] == list(PAYLOAD_INDEXES)
+
+        kwargs = client.update_collection.call_args.kwargs
+        assert kwargs['collection_name'] == "facts"
+        assert (kwargs['hnsw_config'].m, kwargs['hnsw_config'].ef_construct) == (result['hnsw']['m'],
+                                                                                 result['hnsw']['ef_construct'])
+        if isinstance(expected, type):
+            assert isinstance(kwargs['quantization_config'], expected)
+            assert kwargs['quantization_config'].scalar.type == "int8"
+        else:
+            assert kwargs['quantization_config'] == expected
+
+    def test_reports_quantization_state_of_collection(self, client):
+        """Quantification rapportée d'après la collection (inchangée et déjà en int8)"""
+        client.get_collection.return_value.config.quantization_config = object()
+        result = optimize_collection(collection_name="facts", samples=5)
+        assert result['quantization'] == "int8"
+        assert client.update_collection.call_args.kwargs['quantization_config'] is None
+
+    def test_search_params(self, client):
+        """hnsw_ef toujours appliqué sur un serveur; rescoring seulement si quantifiée"""
+        params = collection_search_params(client, "facts")
+        assert params.hnsw_ef == SEARCH_HNSW_EF and params.quantization is None
+
+        client.get_collection.return_value.config.quantization_config = object()
+        params = collection_search_params(client, "facts")
+        assert params.hnsw_ef == SEARCH_HNSW_EF and params.quantization.rescore is True
+
+    def test_error_reported(self, client):
+        client.update_collection.side_effect = RuntimeError("collection introuvable")
+        result = optimize_collection(collection_name="facts", samples=5)
+        assert result == {'success': False, 'error': "collection introuvable"}
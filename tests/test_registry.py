@@ -0,0 +1,80 @@
+"""
+Tests unitaires pour le registre paresseux des outils et les imports à la demande de `tools`
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import tools
+from tools.registry import LazyToolRegistry
+
+
+# Dépendances lourdes qui ne doivent pas être importées au démarrage
+HEAVY_MODULES = ('qdrant_client', 'sentence_transformers', 'torch', 'onnxruntime', 'numpy', 'bs4')
+
+
+def _imported_after(code: str):
+    """Modules lourds présents dans sys.modules après `code`, exécuté dans un processus neuf"""
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True,
+                            env={**os.environ, 'DEEPSEEK_API_KEY': 'test'},
+                            cwd=os.path.dirname(os.path.dirname(tools.__file__)))
+    return [name for name in output.stdout.strip().split(',') if name]
+
+
+class TestLazyToolRegistry:
+    """Tests de la résolution à la demande"""
+
+    def setup_method(self):
+        self.registry = LazyToolRegistry({
+            'dumps': 'json:dumps',
+            'missing_module': 'tools.does_not_exist:func',
+            'missing_attr': 'json:does_not_exist',
+        })
+
+    def test_resolved_on_first_access(self):
+        assert 'dumps' in self.registry and len(self.registry) == 3
+        assert list(self.registry) == ['dumps', 'missing_module', 'missing_attr']
+        assert self.registry.is_loaded('dumps') is False
+
+        import json
+        assert self.registry['dumps'] is json.dumps
+        assert self.registry.is_loaded('dumps') is True
+        assert 'json' in self.registry.load_times
+        assert self.registry['dumps'] is json.dumps  # Servi sans nouvel import
+
+    def test_unknown_and_broken_specs(self):
+        assert 'inconnu' not in self.registry
+        with pytest.raises(KeyError):
+            self.registry['inconnu']
+        with pytest.raises(ModuleNotFoundError):
+            self.registry['missing_module']
+        with pytest.raises(AttributeError):
+            self.registry['missing_attr']
+        assert not self.registry.is_loaded('missing_module')
+        assert not self.registry.is_loaded('missing_attr')
+
+
+class TestToolsPackage:
+    """Tests des imports à la demande du paquet `tools` (PEP 562)"""
+
+    def test_export_resolved_and_cached(self):
+        from tools.file_tools import read_file
+        assert tools.read_file is read_file
+        assert 'read_file' in vars(tools)  # Accès suivants sans __getattr__
+        assert 'remember' in dir(tools)
+
+    def test_unknown_name(self):
+        with pytest.raises(AttributeError):
+            tools.does_not_exist
+        with pytest.raises(ImportError):
+            from tools import does_not_exist  # noqa: F401
+
+    def test_nothing_heavy_until_first_use(self):
+        assert _imported_after("import tools\nfrom tools import read_file, execute_command") == []
+        # Registre de l'agent: déclarer les outils mémoire n'importe ni Qdrant ni le modèle
+        assert _imported_after("from main import ToolExecutor\nToolExecutor()") == []
+        assert 'qdrant_client' in _imported_after("from tools import remember")
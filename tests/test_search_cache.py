@@ -0,0 +1,90 @@
+"""
+Tests unitaires pour le cache des résultats de recherche de la mémoire
+"""
+
+from tools import memory_tools
+from tools.memory_tools import QdrantMemory, HashingBackend
+from tools.search_cache import SearchResultCache
+
+
+class TestSearchResultCache:
+    """Tests pour la clé normalisée, le LRU et les générations"""
+
+    def test_normalized_key_and_copies(self):
+        cache = SearchResultCache(max_entries=2)
+        key = cache.key("Quel  PORT ?", 5, True, "alpha")
+        assert key == cache.key(" Quel PORT ?", 5, True, "alpha")
+        assert key != cache.key("Quel PORT ?", 5, True, "beta")
+        # Casse conservée: la recherche distingue getUser (camelCase) de getuser
+        assert cache.key("getUser", 5, True, "alpha") != cache.key("getuser", 5, True, "alpha")
+
+        results, generation = cache.get(key)
+        assert results is None
+        cache.put(key, [{"id": "a", "score": 0.9}], generation)
+        results, _ = cache.get(key)
+        results[0]["score"] = 0.0  # L'appelant ne modifie pas l'entrée en cache
+        assert cache.get(key)[0] == [{"id": "a", "score": 0.9}]
+        assert cache.get_statistics()["hit_rate"] == 2 / 3
+
+    def test_write_during_search_is_not_cached(self):
+        """Un résultat calculé avant une écriture n'entre pas dans le cache"""
+        cache = SearchResultCache()
+        _, generation = cache.get(("q",))
+        cache.invalidate()
+        cache.put(("q",), [{"id": "périmé"}], generation)
+        assert cache.get(("q",))[0] is None
+
+    def test_entries_expire(self, monkeypatch):
+        """Une entrée expire après ttl (écritures d'un autre processus)"""
+        cache = SearchResultCache(ttl=30.0)
+        now = [1000.0]
+        monkeypatch.setattr("tools.search_cache.time.monotonic", lambda: now[0])
+        cache.put(("q",), [{"id": "a"}], cache.generation)
+        now[0] += 29.0
+        assert cache.get(("q",))[0] == [{"id": "a"}]
+        now[0] += 2.0
+        assert cache.get(("q",))[0] is None
+        assert cache.stats["expired"] == 1 and len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = SearchResultCache(max_entries=2)
+        for name in ("a", "b", "c"):
+            cache.put((name,), [], cache.generation)
+        assert cache.get(("a",))[0] is None
+        assert len(cache) == 2
+
+
+class TestMemorySearchCache:
+    """Tests du cache dans search_facts sur un Qdrant local"""
+
+    def setup_method(self):
+        self.memory = QdrantMemory(collection_name='test_search_cache', backend=HashingBackend(dimension=32))
+        memory_tools._memory = self.memory
+
+    def teardown_method(self):
+        self.memory.client.delete_collection('test_search_cache')
+        memory_tools._memory = None
+
+    def test_hit_skips_qdrant_and_writes_invalidate(self, monkeypatch):
+        self.memory.store_fact("le serveur écoute sur le port 8080")
+        first = self.memory.search_facts("port du serveur", limit=3)
+
+        def no_network(*args, **kwargs):
+            raise AssertionError("requête Qdrant inattendue")
+        monkeypatch.setattr(self.memory.client, "query_points", no_network)
+        assert self.memory.search_facts("port  du serveur", limit=3) == first
+        assert self.memory.search_cache.stats["hits"] == 1
+        monkeypatch.undo()
+
+        # Une écriture (même différée) invalide les recherches en cache
+        self.memory.store_fact("le port du serveur est maintenant 9090", defer=True)
+        facts = {fact["fact"] for fact in self.memory.search_facts("port du serveur", limit=3)}
+        assert "le port du serveur est maintenant 9090" in facts
+
+    def test_case_sensitive_identifier_not_served_from_cache(self):
+        """getuser n'hérite pas du lexical_match de getUser"""
+        self.memory.store_fact("getUser lit le profil depuis l'API")
+        assert self.memory.search_facts("getUser", limit=1)[0]["lexical_match"] is True
+        fresh = self.memory.search_facts("getuser", limit=1)
+        assert all(not fact.get("lexical_match") for fact in fresh)
+        assert self.memory.search_cache.stats["hits"] == 0
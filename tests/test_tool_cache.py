@@ -0,0 +1,90 @@
+"""
+Tests unitaires pour le cache d'outils et le préchargement
+"""
+
+import os
+import tempfile
+from tools.file_tools import read_file, list_files
+from tools.tool_cache import ToolResultCache, Prefetcher
+
+
+class TestToolCache:
+    """Tests pour le cache de résultats et le préchargement spéculatif"""
+
+    def setup_method(self):
+        """Créer un fichier de 30 lignes dans un répertoire temporaire"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.temp_dir, "module.py")
+        with open(self.test_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"ligne {i}\n" for i in range(1, 31)))
+        self.cache = ToolResultCache()
+        self.prefetcher = Prefetcher(self.cache, {'read_file': read_file, 'list_files': list_files})
+
+    def teardown_method(self):
+        """Nettoyer après chaque test"""
+        import shutil
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def test_hit_and_invalidation_on_change(self):
+        """Un résultat est servi tant que le fichier ne change pas"""
+        params = {'file_path': self.test_file}
+        self.cache.put('read_file', params, read_file(**params))
+
+        hit, _ = self.cache.get('read_file', params)
+        assert hit is True
+
+        with open(self.test_file, 'a', encoding='utf-8') as f:
+            f.write("nouvelle ligne\n")
+        hit, _ = self.cache.get('read_file', params)
+        assert hit is False
+
+    def test_prefetch_next_range(self):
+        """Après lecture 1-10, la plage 11-20 est préchargée"""
+        self.prefetcher.schedule([{'name': 'read_file', 'parameters': {
+            'file_path': self.test_file, 'start_line': 1, 'end_line': 10
+        }}])
+        self.prefetcher._thread.join()
+
+        hit, result = self.cache.get('read_file', {'file_path': self.test_file, 'start_line': 11, 'end_line': 20})
+        assert hit is True
+        assert result.startswith("ligne 11")
+        assert self.prefetcher.get_statistics()['next_range']['hits'] == 1
+
+    def test_prefetch_entry_points_after_list_files(self):
+        """Après list_files, les *.py de premier niveau sont préchargés"""
+        self.prefetcher.schedule([{'name': 'list_files', 'parameters': {'directory': self.temp_dir}}])
+        self.prefetcher._thread.join()
+
+        assert self.cache.contains('read_file', {'file_path': self.test_file})
+
+    def test_memory_budget(self):
+        """Le cache ne dépasse jamais son budget mémoire"""
+        cache = ToolResultCache(max_bytes=1000)
+        for i in range(20):
+            cache.put('list_files', {'directory': f"/tmp/{i}"}, {'files': ['x' * 100]})
+        assert cache.get_statistics()['bytes'] <= 1000
+        assert cache.get_statistics()['evictions'] > 0
+
+    def test_write_during_read_is_not_cached(self):
+        """Empreinte relevée avant la lecture: une écriture concurrente n'est pas mise en cache"""
+        params = {'file_path': self.test_file}
+        fingerprint = self.cache.fingerprint('read_file', params)
+        content = read_file(**params)
+        with open(self.test_file, 'a', encoding='utf-8') as f:
+            f.write("écrite pendant la lecture\n")
+        assert self.cache.put('read_file', params, content, fingerprint=fingerprint) is False
+        assert self.cache.get('read_file', params) == (False, None)
+
+    def test_prefetch_counts_lines_like_read_file(self):
+        """Séparateurs reconnus par splitlines (\\x0c): même nombre de lignes que read_file"""
+        with open(self.test_file, 'w', encoding='utf-8') as f:
+            f.write("a\x0cb\n" * 10)  # 10 lignes pour un fichier binaire, 20 pour read_file
+        self.prefetcher.schedule([{'name': 'read_file', 'parameters': {
+            'file_path': self.test_file, 'start_line': 1, 'end_line': 10
+        }}])
+        self.prefetcher._thread.join()
+
+        params = {'file_path': self.test_file, 'start_line': 11, 'end_line': 20}
+        hit, result = self.cache.get('read_file', params)
+        assert hit is True and result == read_file(**params)
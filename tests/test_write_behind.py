@@ -0,0 +1,59 @@
+"""
+Tests unitaires pour la file d'écriture différée de la mémoire
+"""
+
+import threading
+
+from tools.write_behind import WriteBehindQueue
+
+
+class TestWriteBehindQueue:
+    """Tests pour le regroupement des écritures, le vidage et les erreurs"""
+
+    def test_burst_is_written_in_batches(self):
+        """Une rafale de petites écritures devient quelques lots"""
+        batches = []
+        queue = WriteBehindQueue(batches.append, max_batch=50, max_delay=5.0)
+        for i in range(120):
+            queue.put([i])
+
+        assert queue.flush(timeout=5.0) is True
+        assert len(queue) == 0
+        assert [item for batch in batches for item in batch] == list(range(120))
+        assert all(len(batch) <= 50 for batch in batches)
+        assert len(batches) <= 4
+        assert queue.get_statistics()['written'] == 120
+
+    def test_flush_does_not_wait_for_delay(self):
+        """flush envoie le lot incomplet sans attendre max_delay"""
+        written = threading.Event()
+        queue = WriteBehindQueue(lambda batch: written.set(), max_batch=100, max_delay=60.0)
+        queue.put(["a"])
+        assert queue.flush(timeout=2.0) is True
+        assert written.is_set()
+
+    def test_failed_batch_is_counted(self):
+        """Une erreur d'écriture est comptée et ne bloque pas la file"""
+        def write(batch):
+            if "bad" in batch:
+                raise RuntimeError("Qdrant indisponible")
+
+        queue = WriteBehindQueue(write, max_batch=1, max_delay=0.0)
+        queue.put(["bad", "good"])
+        assert queue.flush(timeout=2.0) is True
+        stats = queue.get_statistics()
+        assert stats['errors'] == 1
+        assert stats['written'] == 1
+
+    def test_failed_batch_reported_to_on_error(self):
+        """on_error reçoit le lot refusé et l'erreur (nettoyage des index locaux)"""
+        failed = []
+
+        def write(batch):
+            raise RuntimeError("Qdrant indisponible")
+
+        queue = WriteBehindQueue(write, max_batch=10, max_delay=0.0,
+                                 on_error=lambda batch, error: failed.append((batch, str(error))))
+        queue.put(["a", "b"])
+        assert queue.flush(timeout=2.0) is True
+        assert failed == [(["a", "b"], "Qdrant indisponible")]
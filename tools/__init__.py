@@ -1,49 +1,72 @@
 """
 Outils pour l'agent DeepSeek Dev
+
+Les sous-modules sont importés à la demande (PEP 562): `from tools import read_file`
+ne charge que `file_tools`, sans tirer sentence_transformers/torch, qdrant_client
+ou BeautifulSoup au démarrage.
 """
 
-from .file_tools import (
-    read_file,
-    write_file,
-    list_files,
-    file_exists,
-    append_file,
-    replace_in_file
-)
-
-from .shell_tools import (
-    execute_command,
-    check_command_exists,
-    get_system_info,
-    is_safe_command
-)
-
-from .memory_tools import (
-    get_memory,
-    remember,
-    recall,
-    search_facts,
-    decide
-)
-
-from .web_tools import (
-    search_web,
-    fetch_webpage,
-    extract_links,
-    summarize_webpage
-)
-
-from .qdrant_backup import (
-    backup_qdrant,
-    restore_qdrant,
-    list_backups,
-    get_backup_stats
-)
-
-from .git_tools import (
-    git_status,
-    git_diff,
-    git_commit,
-    git_log,
-    git_branch_list
-)
+import importlib
+
+# Nom exporté → sous-module qui le définit
+_EXPORTS = {
+    # Fichiers
+    'read_file': 'file_tools',
+    'write_file': 'file_tools',
+    'list_files': 'file_tools',
+    'file_exists': 'file_tools',
+    'append_file': 'file_tools',
+    'replace_in_file': 'file_tools',
+
+    # Shell
+    'execute_command': 'shell_tools',
+    'check_command_exists': 'shell_tools',
+    'get_system_info': 'shell_tools',
+    'is_safe_command': 'shell_tools',
+
+    # Mémoire
+    'get_memory': 'memory_tools',
+    'remember': 'memory_tools',
+    'remember_many': 'memory_tools',
+    'recall': 'memory_tools',
+    'search_facts': 'memory_tools',
+    'search_keywords': 'memory_tools',
+    'decide': 'memory_tools',
+    'consolidate_memory': 'memory_consolidation',
+
+    # Web
+    'search_web': 'web_tools',
+    'fetch_webpage': 'web_tools',
+    'extract_links': 'web_tools',
+    'summarize_webpage': 'web_tools',
+
+    # Backup Qdrant
+    'backup_qdrant': 'qdrant_backup',
+    'restore_qdrant': 'qdrant_backup',
+    'list_backups': 'qdrant_backup',
+    'get_backup_stats': 'qdrant_backup',
+    'optimize_collection': 'qdrant_schema',
+
+    # Git
+    'git_status': 'git_tools',
+    'git_diff': 'git_tools',
+    'git_commit': 'git_tools',
+    'git_log': 'git_tools',
+    'git_branch_list': 'git_tools',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """Importe le sous-module au premier accès à l'un de ses outils"""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'tools' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value  # Les accès suivants ne passent plus par __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
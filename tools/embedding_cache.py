@@ -0,0 +1,230 @@
+"""
+Cache d'embeddings à deux niveaux pour QdrantMemory
+- Niveau 1: LRU en mémoire du processus
+- Niveau 2: vecteurs float32 sur disque dans un fichier mappé en mémoire (np.memmap),
+  partagé entre processus (CLI, batch, démon)
+
+Clé: (nom du modèle, sha256 du texte)
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou inter-processus, niveau disque en lecture/écriture simple
+    fcntl = None
+
+
+# Enregistrement d'index: digest sha256 (32 octets) + numéro de ligne (uint32)
+_RECORD_SIZE = 36
+
+
+def _default_cache_dir() -> Optional[str]:
+    """Répertoire du niveau disque (DS_EMBEDDING_CACHE_DIR, vide = désactivé)"""
+    value = os.getenv('DS_EMBEDDING_CACHE_DIR')
+    if value is None:
+        value = '~/.cache/ds-cli/embeddings'
+    return os.path.expanduser(value) if value else None
+
+
+class EmbeddingCache:
+    """Cache d'embeddings: LRU en mémoire + stockage mappé sur disque"""
+
+    def __init__(self, model_name: str, dimension: int,
+                 cache_dir: Optional[str] = None,
+                 max_memory_entries: int = 4096,
+                 max_disk_entries: int = 200_000,
+                 use_disk: bool = True):
+        """
+        Args:
+            model_name: Nom du modèle (fait partie de la clé)
+            dimension: Dimension des vecteurs
+            cache_dir: Répertoire du niveau disque (défaut: ~/.cache/ds-cli/embeddings)
+            max_memory_entries: Taille du LRU en mémoire
+            max_disk_entries: Nombre max de vecteurs sur disque (au-delà: mémoire seule)
+            use_disk: Activer le niveau disque
+        """
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'disk_writes': 0}
+
+        # Niveau disque
+        self._disk_index: Dict[bytes, int] = {}
+        self._index_offset = 0  # Octets de l'index déjà lus
+        self._vectors: Optional[np.memmap] = None
+        self._disk_dir: Optional[Path] = None
+
+        cache_dir = cache_dir if cache_dir is not None else _default_cache_dir()
+        if use_disk and cache_dir:
+            slug = "".join(c if c.isalnum() or c in '-_.' else '_' for c in model_name)
+            self._disk_dir = Path(cache_dir) / f"{slug}-{dimension}"
+            try:
+                self._disk_dir.mkdir(parents=True, exist_ok=True)
+                self._vectors_path = self._disk_dir / 'vectors.f32'
+                self._index_path = self._disk_dir / 'index.bin'
+                self._lock_path = self._disk_dir / '.lock'
+                self._vectors_path.touch(exist_ok=True)
+                self._index_path.touch(exist_ok=True)
+                self._load_index()
+            except OSError as e:
+                print(f"⚠️  Cache d'embeddings disque désactivé: {e}")
+                self._disk_dir = None
+
+    # ------------------------------------------------------------------
+    # Clés
+    # ------------------------------------------------------------------
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).digest()
+
+    # ------------------------------------------------------------------
+    # Niveau disque
+    # ------------------------------------------------------------------
+    def _load_index(self):
+        """Lit les nouveaux enregistrements d'index (écrits par ce processus ou d'autres)"""
+        with open(self._index_path, 'rb') as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        usable = len(data) - len(data) % _RECORD_SIZE
+        for pos in range(0, usable, _RECORD_SIZE):
+            record = data[pos:pos + _RECORD_SIZE]
+            self._disk_index[record[:32]] = int.from_bytes(record[32:], 'little')
+        self._index_offset += usable
+
+    def _map_vectors(self, min_rows: int) -> bool:
+        """(Re)mappe le fichier de vecteurs s'il ne couvre pas min_rows lignes"""
+        if self._vectors is not None and self._vectors.shape[0] >= min_rows:
+            return True
+        size = self._vectors_path.stat().st_size
+        rows = size // (self.dimension * 4)
+        if rows < min_rows:
+            return False
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+',
+                                  shape=(rows, self.dimension))
+        return True
+
+    def _disk_get(self, key: bytes) -> Optional[np.ndarray]:
+        row = self._disk_index.get(key)
+        if row is None:
+            self._load_index()  # Un autre processus a pu l'écrire
+            row = self._disk_index.get(key)
+            if row is None:
+                return None
+        if not self._map_vectors(row + 1):
+            return None
+        return np.array(self._vectors[row])
+
+    def _disk_put(self, key: bytes, vector: np.ndarray):
+        with open(self._lock_path, 'a+b') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load_index()
+                if key in self._disk_index:
+                    return
+                index_size = self._index_path.stat().st_size
+                if index_size % _RECORD_SIZE:
+                    # Enregistrement partiel (écriture interrompue): on le supprime
+                    index_size -= index_size % _RECORD_SIZE
+                    with open(self._index_path, 'r+b') as f:
+                        f.truncate(index_size)
+                row = index_size // _RECORD_SIZE
+                if row >= self.max_disk_entries:
+                    return
+
+                # Agrandir le fichier par paliers (doublement) pour limiter les remappages
+                row_bytes = self.dimension * 4
+                size = self._vectors_path.stat().st_size
+                if (row + 1) * row_bytes > size:
+                    new_rows = max(1024, (size // row_bytes) * 2, row + 1)
+                    with open(self._vectors_path, 'r+b') as f:
+                        f.truncate(new_rows * row_bytes)
+                    self._vectors = None
+                self._map_vectors(row + 1)
+                self._vectors[row] = vector
+                self._vectors.flush()
+
+                # L'index est écrit APRÈS le vecteur: un enregistrement visible est toujours complet
+                with open(self._index_path, 'ab') as f:
+                    f.write(key + row.to_bytes(4, 'little'))
+                self._disk_index[key] = row
+                self._index_offset += _RECORD_SIZE
+                self.stats['disk_writes'] += 1
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def _memory_put(self, key: bytes, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """
+        Cherche l'embedding d'un texte
+
+        Returns:
+            Vecteur ou None si absent des deux niveaux
+        """
+        key = self._key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return vector.tolist()
+
+            if self._disk_dir is not None:
+                try:
+                    vector = self._disk_get(key)
+                except (OSError, ValueError):
+                    vector = None
+                if vector is not None:
+                    self._memory_put(key, vector)
+                    self.stats['disk_hits'] += 1
+                    return vector.tolist()
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, text: str, vector: List[float]):
+        """Stocke un embedding dans les deux niveaux"""
+        key = self._key(text)
+        array = np.asarray(vector, dtype=np.float32)
+        if array.shape != (self.dimension,):
+            return
+        with self._lock:
+            self._memory_put(key, array)
+            if self._disk_dir is not None:
+                try:
+                    self._disk_put(key, array)
+                except OSError:
+                    pass  # Le niveau mémoire suffit en cas d'erreur disque
+
+    def get_statistics(self) -> Dict:
+        """Statistiques (hits par niveau, taux de hit global)"""
+        with self._lock:
+            lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            return {
+                **self.stats,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(self._disk_index),
+                'disk_enabled': self._disk_dir is not None,
+                'hit_rate': hits / lookups if lookups else 0.0
+            }
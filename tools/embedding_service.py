@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Service d'embeddings dans un processus séparé
+Le modèle est chargé une fois dans un processus dédié; les agents (CLI, batch, démon)
+lui envoient leurs textes par une socket Unix et lisent les vecteurs dans un tampon
+de mémoire partagée. L'encodage (tokenisation + passe avant) ne dispute plus le GIL
+à la boucle de l'agent (flux SSE, affichage), et un seul modèle est chargé pour tous
+les processus de la machine.
+
+Les requêtes simultanées (plusieurs threads ou processus) sont regroupées en un seul
+appel au modèle.
+
+Usage:
+    python -m tools.embedding_service serve    # Démarre le service (aussi lancé à la demande)
+    python -m tools.embedding_service status   # Statistiques
+    python -m tools.embedding_service stop     # Arrête le service
+
+Protocole (multiprocessing.connection, objets picklés):
+    client  → ("info",) | ("encode", textes, batch_size, tampon, pid) | ("stats",) | ("stop",)
+    service → dict d'informations | ("ok", n) | ("error", message) | dict de statistiques
+Le client possède le tampon de mémoire partagée (créé, agrandi et supprimé par lui);
+le service y écrit les n vecteurs float32 du lot.
+
+Sécurité: socket créée en 0600, et chaque connexion est authentifiée (défi HMAC de
+multiprocessing) avec une clé aléatoire lue dans <socket>.key (0600) avant tout
+échange d'objets picklés.
+"""
+
+import os
+import sys
+import time
+import queue
+import atexit
+import socket
+import secrets
+import threading
+import subprocess
+from multiprocessing import shared_memory
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de socket Unix, service indisponible
+    fcntl = None
+
+
+DEFAULT_SOCKET = os.path.expanduser(os.getenv('DS_EMBEDDING_SOCKET', '~/.deepseek_embeddings.sock'))
+
+
+def service_authkey(socket_path: str) -> bytes:
+    """
+    Clé partagée par le service et ses clients (créée au premier appel)
+
+    Fichier <socket>.key en 0600, écrit sous un nom temporaire puis lié: un lecteur
+    concurrent ne voit jamais une clé partielle.
+
+    Args:
+        socket_path: Socket Unix du service
+
+    Returns:
+        Clé d'authentification des connexions
+    """
+    key_path = socket_path + '.key'
+    if not os.path.exists(key_path):
+        tmp_path = f"{key_path}.{os.getpid()}.{threading.get_ident()}"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(secrets.token_bytes(32))
+        try:
+            os.link(tmp_path, key_path)
+        except FileExistsError:
+            pass  # Créée entre-temps par un autre processus: sa clé fait foi
+        finally:
+            os.unlink(tmp_path)
+    with open(key_path, 'rb') as f:
+        return f.read()
+
+
+def _attach(name: str, owner_pid: int) -> shared_memory.SharedMemory:
+    """
+    Ouvre le tampon partagé d'un client sans en prendre la responsabilité
+
+    Le tampon appartient au client: il ne doit pas être supprimé par le
+    resource_tracker du service à son arrêt.
+    """
+    buffer = shared_memory.SharedMemory(name=name)
+    if owner_pid != os.getpid():
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(buffer._name, "shared_memory")
+    return buffer
+
+
+class EmbeddingService:
+    """Regroupe les demandes d'encodage simultanées en lots pour le modèle"""
+
+    def __init__(self, backend, max_batch: int = 256, max_delay: float = 0.002):
+        """
+        Args:
+            backend: Backend d'embeddings chargé (voir memory_tools.get_embedding_backend)
+            max_batch: Textes max par appel au modèle
+            max_delay: Attente max (secondes) de demandes concurrentes pour compléter un lot
+        """
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._pending: List[Dict] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {'requests': 0, 'batches': 0, 'texts': 0, 'errors': 0, 'encode_s': 0.0}
+
+    def info(self) -> Dict:
+        """Description du modèle servi (reprise par le backend client)"""
+        return {
+            'name': self.backend.name,
+            'model_name': self.backend.model_name,
+            'dimension': self.backend.dimension,
+            'vector_space': self.backend.vector_space,
+            'cache_key': self.backend.cache_key,
+            'pid': os.getpid()
+        }
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Encode des textes dans le prochain lot du modèle
+
+        Args:
+            texts: Textes à encoder
+            batch_size: Taille des lots passés au modèle
+
+        Returns:
+            Matrice (len(texts), dimension) float32
+        """
+        request = {'texts': texts, 'batch_size': batch_size, 'done': threading.Event(),
+                   'vectors': None, 'error': None}
+        with self._cond:
+            self._pending.append(request)
+            self.stats['requests'] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batches", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['vectors']
+
+    def _next_batch(self) -> List[Dict]:
+        """Attend des demandes, puis les demandes concurrentes jusqu'au lot complet ou à l'échéance"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_delay
+            while sum(len(request['texts']) for request in self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            # Au moins une demande, puis tant que le lot ne déborde pas
+            batch, size = [], 0
+            while self._pending and (not batch or size + len(self._pending[0]['texts']) <= self.max_batch):
+                request = self._pending.pop(0)
+                batch.append(request)
+                size += len(request['texts'])
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = [text for request in batch for text in request['texts']]
+            start = time.perf_counter()
+            try:
+                vectors = np.asarray(self.backend.encode(texts, batch_size=batch[0]['batch_size']),
+                                     dtype=np.float32)
+                offset = 0
+                for request in batch:
+                    request['vectors'] = vectors[offset:offset + len(request['texts'])]
+                    offset += len(request['texts'])
+                self.stats['batches'] += 1
+                self.stats['texts'] += len(texts)
+            except Exception as e:
+                self.stats['errors'] += 1
+                for request in batch:
+                    request['error'] = e
+            finally:
+                self.stats['encode_s'] += time.perf_counter() - start
+                for request in batch:
+                    request['done'].set()
+
+    def get_statistics(self) -> Dict:
+        """Statistiques (demandes, lots, taille moyenne des lots)"""
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'avg_batch': self.stats['texts'] / batches if batches else 0.0,
+            'pid': os.getpid()
+        }
+
+
+class EmbeddingServer:
+    """Socket Unix du service: une connexion = un thread client"""
+
+    def __init__(self, service: EmbeddingService, socket_path: str = DEFAULT_SOCKET):
+        self.service = service
+        self.socket_path = socket_path
+        self.authkey = service_authkey(socket_path)
+        self._stopping = threading.Event()
+        self.listener: Optional[Listener] = None
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+
+    def serve_forever(self):
+        """Accepte les connexions jusqu'à shutdown() ou une commande stop"""
+        # Socket créée directement en 0600 (service réservé à l'utilisateur courant),
+        # sans fenêtre entre bind et chmod
+        old_umask = os.umask(0o177)
+        try:
+            self.listener = Listener(self.socket_path, family='AF_UNIX')
+        finally:
+            os.umask(old_umask)
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn = self.listener.accept()
+                except OSError:
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.listener.close()
+            # Connexions coupées comme à l'arrêt du processus: les clients se reconnectent
+            with self._connections_lock:
+                connections, self._connections = self._connections, set()
+            for conn in connections:
+                try:
+                    # shutdown (pas close): débloque le recv du thread de la connexion
+                    with socket.fromfd(conn.fileno(), socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                        sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass  # Déjà fermée par son thread
+
+    def shutdown(self):
+        """Arrête la boucle d'acceptation (connexion factice pour débloquer accept)"""
+        self._stopping.set()
+        try:
+            Client(self.socket_path, family='AF_UNIX').close()
+        except OSError:
+            pass
+
+    def _handle(self, conn):
+        buffers: Dict[str, shared_memory.SharedMemory] = {}
+        try:
+            # Authentification sur le thread de la connexion (accept n'attend pas le client),
+            # avant de dépickler quoi que ce soit
+            try:
+                deliver_challenge(conn, self.authkey)
+                answer_challenge(conn, self.authkey)
+            except (AuthenticationError, EOFError, OSError):
+                return
+            with self._connections_lock:
+                if self._stopping.is_set():
+                    return
+                self._connections.add(conn)
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    break
+                command = message[0]
+                if command == 'encode':
+                    _, texts, batch_size, buffer_name, owner_pid = message
+                    try:
+                        vectors = self.service.encode(texts, batch_size)
+                        if buffer_name not in buffers:
+                            for old in buffers.values():
+                                old.close()  # Tampon remplacé par un plus grand
+                            buffers = {buffer_name: _attach(buffer_name, owner_pid)}
+                        target = np.ndarray(vectors.shape, dtype=np.float32, buffer=buffers[buffer_name].buf)
+                        target[:] = vectors
+                        del target  # Pas de vue restante sur le tampon (close() possible)
+                        reply = ('ok', len(texts))
+                    except Exception as e:
+                        reply = ('error', str(e))
+                    conn.send(reply)
+                elif command == 'info':
+                    conn.send(self.service.info())
+                elif command == 'stats':
+                    conn.send(self.service.get_statistics())
+                elif command == 'stop':
+                    conn.send(('ok', 0))
+                    self.shutdown()
+                    break
+        except OSError:
+            pass  # Client parti avant la réponse (connexion abandonnée de son côté)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(conn)
+            for buffer in buffers.values():
+                buffer.close()
+            conn.close()
+
+
+def service_running(socket_path: str = DEFAULT_SOCKET) -> bool:
+    """Vrai si un service répond sur la socket"""
+    try:
+        Client(socket_path, family='AF_UNIX').close()
+        return True
+    except OSError:
+        return False
+
+
+def serve(socket_path: str = DEFAULT_SOCKET, backend_name: Optional[str] = None):
+    """
+    Charge le modèle et sert les demandes d'encodage jusqu'à `stop`
+
+    Args:
+        socket_path: Socket Unix du service
+        backend_name: Backend servi (défaut: DS_EMBEDDING_SERVICE_BACKEND, sinon sentence-transformers)
+    """
+    if fcntl is None:
+        print("❌ Service d'embeddings indisponible sur cette plateforme (socket Unix)")
+        sys.exit(1)
+
+    # Un seul service par socket, même si plusieurs agents le lancent en même temps
+    lock = open(socket_path + '.lock', 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"ℹ️  Service d'embeddings déjà actif sur {socket_path}")
+        return
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # Socket orpheline d'un service arrêté brutalement
+
+    from tools.memory_tools import get_embedding_backend
+    backend_name = backend_name or os.getenv('DS_EMBEDDING_SERVICE_BACKEND') or 'sentence-transformers'
+    if backend_name == 'service':
+        raise ValueError("Le service ne peut pas servir le backend 'service'")
+    start = time.perf_counter()
+    service = EmbeddingService(get_embedding_backend(backend_name))
+    server = EmbeddingServer(service, socket_path)
+    print(f"🚀 Service d'embeddings ({service.backend.name}, {service.backend.vector_space}) "
+          f"prêt en {time.perf_counter() - start:.1f}s sur {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        lock.close()
+        print("👋 Service d'embeddings arrêté")
+
+
+class _Channel:
+    """Connexion au service et tampon partagé de résultats, propres à un thread appelant"""
+
+    def __init__(self, socket_path: str, authkey: bytes):
+        self.conn = Client(socket_path, family='AF_UNIX', authkey=authkey)
+        self.buffer: Optional[shared_memory.SharedMemory] = None
+
+    def reserve(self, nbytes: int) -> shared_memory.SharedMemory:
+        """Tampon d'au moins nbytes (agrandi par puissance de 2, 1 Mo minimum)"""
+        if self.buffer is None or self.buffer.size < nbytes:
+            self.release()
+            size = 1 << max(20, (nbytes - 1).bit_length())
+            self.buffer = shared_memory.SharedMemory(create=True, size=size)
+        return self.buffer
+
+    def release(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.unlink()
+            self.buffer = None
+
+    def close(self):
+        self.release()
+        self.conn.close()
+
+
+class EmbeddingServiceClient:
+    """Client du service d'embeddings (lancé à la demande s'il ne répond pas)"""
+
+    def __init__(self, socket_path: Optional[str] = None, autostart: bool = True,
+                 start_timeout: Optional[float] = None):
+        """
+        Args:
+            socket_path: Socket Unix du service (défaut: DS_EMBEDDING_SOCKET)
+            autostart: Lancer le service en arrière-plan s'il ne répond pas
+            start_timeout: Attente max du chargement du modèle (défaut: DS_EMBEDDING_SERVICE_START_S)
+        """
+        self.socket_path = socket_path or DEFAULT_SOCKET
+        self.autostart = autostart
+        self.start_timeout = start_timeout or float(os.getenv('DS_EMBEDDING_SERVICE_START_S', '120'))
+        self._start_lock = threading.Lock()
+        self._ensure_service()
+        self.authkey = service_authkey(self.socket_path)
+
+        self._channels: "queue.LifoQueue[_Channel]" = queue.LifoQueue()
+        self._all_channels: List[_Channel] = []
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'texts': 0, 'wait_s': 0.0}
+        self._info = self._call(('info',))
+        atexit.register(self.close)
+
+    def _ensure_service(self):
+        """Vérifie que le service répond, le lance (autostart) sinon"""
+        with self._start_lock:
+            if service_running(self.socket_path):
+                return
+            if not self.autostart:
+                raise RuntimeError(f"Aucun service d'embeddings sur {self.socket_path}")
+            self._start_service(self.start_timeout)
+
+    def _start_service(self, timeout: float):
+        """Lance `python -m tools.embedding_service serve` détaché et attend sa socket"""
+        print(f"🔄 Démarrage du service d'embeddings ({self.socket_path})...")
+        log = open(self.socket_path + '.log', 'ab')
+        subprocess.Popen(
+            [sys.executable, '-m', 'tools.embedding_service', 'serve', '--socket', self.socket_path],
+            cwd=str(Path(__file__).resolve().parent.parent),
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            start_new_session=True  # Survit à l'agent: partagé avec les processus suivants
+        )
+        log.close()
+        deadline = time.monotonic() + timeout
+        while not service_running(self.socket_path):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Service d'embeddings pas prêt après {timeout:.0f}s "
+                                   f"(journal: {self.socket_path}.log)")
+            time.sleep(0.1)
+
+    def _acquire(self) -> _Channel:
+        try:
+            return self._channels.get_nowait()
+        except queue.Empty:
+            channel = _Channel(self.socket_path, self.authkey)
+            with self._lock:
+                self._all_channels.append(channel)
+            return channel
+
+    def _discard(self, channel: _Channel):
+        """Ferme une connexion dans un état inconnu (réponse peut-être encore en attente)"""
+        with self._lock:
+            if channel in self._all_channels:
+                self._all_channels.remove(channel)
+        try:
+            channel.close()
+        except Exception:
+            pass
+
+    def _reconnect(self):
+        """Service arrêté ou redémarré: connexions au repos fermées, service relancé si besoin"""
+        while True:
+            try:
+                channel = self._channels.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(channel)
+        self._ensure_service()
+
+    def _request(self, exchange):
+        """
+        Exécute un échange sur une connexion du pool
+
+        Une connexion n'est rendue au pool qu'après un échange complet: après toute
+        erreur (interruption entre envoi et réception, timeout...), sa réponse pourrait
+        être lue par la demande suivante, elle est donc fermée. Une connexion coupée
+        (service arrêté ou planté) déclenche une reconnexion et un seul nouvel essai.
+
+        Args:
+            exchange: Fonction (connexion) → résultat
+
+        Returns:
+            Résultat de l'échange
+        """
+        for attempt in range(2):
+            try:
+                channel = self._acquire()
+            except OSError:
+                if attempt:
+                    raise
+                self._reconnect()
+                continue
+            try:
+                result = exchange(channel)
+            except BaseException as e:
+                self._discard(channel)
+                if attempt or not isinstance(e, (EOFError, OSError)):
+                    raise
+                self._reconnect()
+                continue
+            self._channels.put(channel)
+            return result
+
+    def _call(self, message):
+        def exchange(channel: _Channel):
+            channel.conn.send(message)
+            return channel.conn.recv()
+        return self._request(exchange)
+
+    def info(self) -> Dict:
+        """Modèle servi: name, model_name, dimension, vector_space, cache_key"""
+        return dict(self._info)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Encode des textes dans le processus du service
+
+        Args:
+            texts: Textes à encoder
+            batch_size: Taille des lots passés au modèle
+
+        Returns:
+            Matrice (len(texts), dimension) float32
+        """
+        dimension = self._info['dimension']
+        if not texts:
+            return np.zeros((0, dimension), dtype=np.float32)
+        start = time.perf_counter()
+
+        def exchange(channel: _Channel) -> np.ndarray:
+            buffer = channel.reserve(len(texts) * dimension * 4)
+            channel.conn.send(('encode', list(texts), batch_size, buffer.name, os.getpid()))
+            status, detail = channel.conn.recv()
+            if status != 'ok':
+                raise RuntimeError(f"Service d'embeddings: {detail}")
+            return np.ndarray((len(texts), dimension), dtype=np.float32, buffer=buffer.buf).copy()
+
+        vectors = self._request(exchange)
+        self.stats['requests'] += 1
+        self.stats['texts'] += len(texts)
+        self.stats['wait_s'] += time.perf_counter() - start
+        return vectors
+
+    def service_statistics(self) -> Dict:
+        """Statistiques du service (tous clients confondus)"""
+        return self._call(('stats',))
+
+    def close(self):
+        """Ferme les connexions et supprime les tampons partagés"""
+        with self._lock:
+            channels, self._all_channels = self._all_channels, []
+        for channel in channels:
+            try:
+                channel.close()
+            except Exception:
+                pass
+
+
+def stop(socket_path: str = DEFAULT_SOCKET) -> bool:
+    """Arrête le service (True s'il était actif)"""
+    try:
+        conn = Client(socket_path, family='AF_UNIX', authkey=service_authkey(socket_path))
+    except (OSError, AuthenticationError):
+        return False
+    with conn:
+        conn.send(('stop',))
+        conn.recv()
+    return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Service d'embeddings partagé")
+    parser.add_argument('command', choices=['serve', 'status', 'stop'])
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help="Socket Unix du service")
+    parser.add_argument('--backend', default=None, help="Backend servi (sentence-transformers, onnx, hashing)")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.socket, args.backend)
+    elif args.command == 'stop':
+        print("✅ Service arrêté" if stop(args.socket) else f"ℹ️  Aucun service sur {args.socket}")
+    else:
+        if not service_running(args.socket):
+            print(f"ℹ️  Aucun service sur {args.socket}")
+            return
+        client = EmbeddingServiceClient(args.socket, autostart=False)
+        info, stats = client.info(), client.service_statistics()
+        print(f"🧠 Service d'embeddings (pid {info['pid']}): {info['name']} {info['vector_space']}")
+        print(f"  Demandes: {stats['requests']}, lots: {stats['batches']} "
+              f"(~{stats['avg_batch']:.1f} textes/lot), erreurs: {stats['errors']}")
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
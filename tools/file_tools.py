@@ -5,6 +5,13 @@ Outils d'accès et manipulation de fichiers pour l'agent DeepSeek
 from pathlib import Path
 from typing import List, Optional
 
+from .working_dir import resolve_path
+
+
+def split_lines(content: str) -> List[str]:
+    """Découpage en lignes de read_file (start_line/end_line), partagé avec le préchargement"""
+    return content.splitlines(keepends=True)
+
 
 def read_file(file_path: str, start_line: int = None, end_line: int = None) -> str:
     """
@@ -18,7 +25,7 @@ def read_file(file_path: str, start_line: int = None, end_line: int = None) -> s
     Returns:
         Contenu du fichier (ou extrait si start_line/end_line spécifiés)
     """
-    path = Path(file_path)
+    path = Path(resolve_path(file_path))  # Relatif au répertoire de la session
     if not path.exists():
         raise FileNotFoundError(f"Fichier non trouvé: {file_path}")
     
@@ -29,7 +36,7 @@ def read_file(file_path: str, start_line: int = None, end_line: int = None) -> s
         return content
     
     # Sinon, extraire les lignes demandées
-    lines = content.splitlines(keepends=True)
+    lines = split_lines(content)
     total_lines = len(lines)
     
     # Gérer les indices (1-indexed → 0-indexed)
@@ -68,13 +75,13 @@ def write_file(file_path: str, content: str, max_size: int = 50000) -> dict:
             'size': content_size
         }
     
-    path = Path(file_path)
+    path = Path(resolve_path(file_path))  # Relatif au répertoire de la session
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(content, encoding='utf-8')
     
     return {
         'success': True,
-        'file': str(path),
+        'file': str(Path(file_path)),
         'size': content_size,
         'lines': content.count('\n') + 1
     }
@@ -91,7 +98,7 @@ def append_file(file_path: str, content: str) -> dict:
     Returns:
         Dict avec success et info
     """
-    path = Path(file_path)
+    path = Path(resolve_path(file_path))  # Relatif au répertoire de la session
     path.parent.mkdir(parents=True, exist_ok=True)
     
     # Lire contenu existant si fichier existe
@@ -104,7 +111,7 @@ def append_file(file_path: str, content: str) -> dict:
     
     return {
         'success': True,
-        'file': str(path),
+        'file': str(Path(file_path)),
         'original_size': original_size,
         'added': len(content),
         'new_size': new_size
@@ -123,7 +130,7 @@ def list_files(directory: str, pattern: str = "*", max_results: int = 100) -> di
     Returns:
         Dict avec liste des fichiers + info truncation
     """
-    path = Path(directory)
+    path = Path(resolve_path(directory))
     if not path.exists():
         raise FileNotFoundError(f"Répertoire non trouvé: {directory}")
     
@@ -147,7 +154,7 @@ def list_files(directory: str, pattern: str = "*", max_results: int = 100) -> di
             continue
             
         if f.is_file():
-            files.append(str(f))
+            files.append(str(Path(directory) / f.relative_to(path)))  # Chemins affichés comme demandés
             if len(files) > max_results:
                 break
     
@@ -180,7 +187,7 @@ def file_exists(file_path: str) -> bool:
     Returns:
         True si le fichier existe
     """
-    return Path(file_path).exists()
+    return Path(resolve_path(file_path)).exists()
 
 
 def replace_in_file(file_path: str, old_text: str, new_text: str) -> dict:
@@ -195,7 +202,7 @@ def replace_in_file(file_path: str, old_text: str, new_text: str) -> dict:
     Returns:
         Dict avec success, message, replacements count
     """
-    path = Path(file_path)
+    path = Path(resolve_path(file_path))  # Relatif au répertoire de la session
     if not path.exists():
         raise FileNotFoundError(f"Fichier non trouvé: {file_path}")
     
@@ -221,7 +228,7 @@ def replace_in_file(file_path: str, old_text: str, new_text: str) -> dict:
     
     return {
         'success': True,
-        'file': str(path),
+        'file': str(Path(file_path)),
         'replacements': count,
         'old_length': len(old_text),
         'new_length': len(new_text),
@@ -5,6 +5,8 @@ import subprocess
 from pathlib import Path
 from typing import Dict, Any
 
+from .working_dir import resolve_path
+
 
 def git_status(repository_path: str = ".") -> Dict[str, Any]:
     """
@@ -17,7 +19,7 @@ def git_status(repository_path: str = ".") -> Dict[str, Any]:
         Dict contenant les fichiers modifiés, ajoutés, supprimés
     """
     try:
-        repo_path = Path(repository_path).resolve()
+        repo_path = Path(resolve_path(repository_path)).resolve()
         
         # Vérifier si c'est un dépôt Git
         if not (repo_path / ".git").exists():
@@ -98,7 +100,7 @@ def git_diff(file_path: str = "", repository_path: str = ".", staged: bool = Fal
         Dict contenant le diff
     """
     try:
-        repo_path = Path(repository_path).resolve()
+        repo_path = Path(resolve_path(repository_path)).resolve()
         
         if not (repo_path / ".git").exists():
             return {"error": f"Pas de dépôt Git trouvé dans {repo_path}"}
@@ -155,7 +157,7 @@ def git_commit(message: str, repository_path: str = ".", add_all: bool = False)
         Dict avec le résultat du commit
     """
     try:
-        repo_path = Path(repository_path).resolve()
+        repo_path = Path(resolve_path(repository_path)).resolve()
         
         if not (repo_path / ".git").exists():
             return {"error": f"Pas de dépôt Git trouvé dans {repo_path}"}
@@ -240,7 +242,7 @@ def git_log(max_count: int = 10, repository_path: str = ".") -> Dict[str, Any]:
         Dict contenant la liste des commits
     """
     try:
-        repo_path = Path(repository_path).resolve()
+        repo_path = Path(resolve_path(repository_path)).resolve()
         
         if not (repo_path / ".git").exists():
             return {"error": f"Pas de dépôt Git trouvé dans {repo_path}"}
@@ -294,7 +296,7 @@ def git_branch_list(repository_path: str = ".") -> Dict[str, Any]:
         Dict contenant la liste des branches
     """
     try:
-        repo_path = Path(repository_path).resolve()
+        repo_path = Path(resolve_path(repository_path)).resolve()
         
         if not (repo_path / ".git").exists():
             return {"error": f"Pas de dépôt Git trouvé dans {repo_path}"}
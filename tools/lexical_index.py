@@ -0,0 +1,224 @@
+"""
+Index lexical BM25 (inversé, en processus) sur le texte des faits
+Complète la recherche dense: identifiants exacts (fichiers, fonctions, codes d'erreur)
+que l'embedding sémantique rapproche mal
+
+Les deux classements sont combinés par Reciprocal Rank Fusion (RRF).
+"""
+
+import math
+import re
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .local_index import payload_matches
+
+
+# Jetons: mots et identifiants (main.py, _get_relevant_memory, E501, tools/memory_tools.py)
+_TOKEN_RE = re.compile(r"[\w][\w.\-/]*[\w]|\w")
+_SPLIT_RE = re.compile(r"[._\-/]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en termes indexés
+
+    Un identifiant composé est indexé entier et par morceaux:
+    "tools/memory_tools.py" → tools/memory_tools.py, tools, memory, py...
+
+    Args:
+        text: Texte à découper
+
+    Returns:
+        Termes en minuscules (avec répétitions)
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text):
+        terms.append(token.lower())
+        parts = [p for part in _SPLIT_RE.split(token) for p in _CAMEL_RE.split(part) if p]
+        if len(parts) > 1:
+            terms.extend(p.lower() for p in parts)
+    return terms
+
+
+# Identifiants: fichier avec extension (main.py), chemin (tools/x), snake_case, camelCase,
+# code d'erreur (E501, HTTP404, CVE-2024-1234); pas les dates, versions ou nombres (2024, v2, 3.5)
+_FILE_RE = re.compile(r"[A-Za-z_][\w\-]+\.[A-Za-z][A-Za-z0-9]{0,4}$")
+_ERROR_CODE_RE = re.compile(r"[A-Z]+-?\d{2,}(?:-\d+)*")
+
+
+def _is_identifier(token: str) -> bool:
+    if not re.search(r"[A-Za-z]", token):
+        return False
+    return bool(
+        _FILE_RE.search(token)
+        or "/" in token
+        or "_" in token
+        or re.search(r"[a-z][A-Z]", token)
+        or _ERROR_CODE_RE.fullmatch(token)
+    )
+
+
+def identifier_terms(text: str) -> Set[str]:
+    """Termes qui sont de vrais identifiants (fichiers, chemins, snake_case, camelCase, codes d'erreur)"""
+    return {token.lower() for token in _TOKEN_RE.findall(text) if _is_identifier(token)}
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fusionne des classements par Reciprocal Rank Fusion
+
+    score(d) = Σ 1 / (k + rang(d)), rang à partir de 1
+
+    Args:
+        rankings: Listes d'IDs, du meilleur au moins bon
+        k: Constante d'amortissement (60 dans l'article original)
+
+    Returns:
+        (id, score) par score décroissant
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class LexicalIndex:
+    """Index inversé BM25 des faits, tenu à jour par les écritures de QdrantMemory"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            k1: Saturation de la fréquence des termes
+            b: Normalisation par la longueur du document
+        """
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, Set[str]] = {}
+        self._payloads: Dict[str, Dict] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+        self.stats = {'searches': 0, 'load_time_s': 0.0}
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def _add(self, doc_id: str, text: str, payload: Dict):
+        self._remove(doc_id)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        length = sum(counts.values())
+        self._lengths[doc_id] = length
+        self._terms[doc_id] = set(counts)
+        self._payloads[doc_id] = payload
+        self._total_length += length
+
+    def _remove(self, doc_id: str):
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        self._payloads.pop(doc_id, None)
+
+    def load(self, points: Iterable, text_key: str = "fact"):
+        """
+        (Re)construit l'index
+
+        Args:
+            points: Points Qdrant (id + payload)
+            text_key: Clé du payload contenant le texte
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._postings, self._lengths, self._terms, self._payloads = {}, {}, {}, {}
+            self._total_length = 0
+            for point in points:
+                payload = point.payload or {}
+                self._add(str(point.id), payload.get(text_key, ""), payload)
+            self.ready = True
+        self.stats['load_time_s'] = time.perf_counter() - start
+
+    def add(self, doc_ids: List[str], texts: List[str], payloads: List[Dict]):
+        """Ajoute ou remplace des documents"""
+        with self._lock:
+            for doc_id, text, payload in zip(doc_ids, texts, payloads):
+                self._add(str(doc_id), text, payload)
+
+    def remove(self, doc_ids: List[str]):
+        """Supprime des documents"""
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(str(doc_id))
+
+    def clear(self):
+        """Vide l'index (la collection a été vidée)"""
+        self.load([])
+
+    def invalidate(self):
+        """Force une reconstruction au prochain accès (collection modifiée ailleurs)"""
+        self.ready = False
+
+    def payload(self, doc_id: str) -> Optional[Dict]:
+        return self._payloads.get(doc_id)
+
+    def search(self, query: str, limit: int = 20,
+               filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """
+        Recherche BM25
+
+        Args:
+            query: Requête
+            limit: Nombre de résultats
+            filters: Conditions sur les payloads (voir local_index.payload_matches)
+
+        Returns:
+            (id, score BM25) par score décroissant
+        """
+        self.stats['searches'] += 1
+        with self._lock:
+            count = len(self._lengths)
+            if count == 0:
+                return []
+            avg_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    if filters and not payload_matches(self._payloads[doc_id], filters):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:limit]
+
+    def matches_identifier(self, doc_id: str, identifiers: Set[str]) -> bool:
+        """Indique si le document contient l'un des identifiants exacts"""
+        return bool(identifiers and identifiers & self._terms.get(doc_id, set()))
+
+    def get_statistics(self) -> Dict:
+        """Statistiques (documents, termes, recherches)"""
+        return {
+            'ready': self.ready,
+            'documents': len(self._lengths),
+            'terms': len(self._postings),
+            'searches': self.stats['searches'],
+            'load_time_s': self.stats['load_time_s']
+        }
@@ -0,0 +1,262 @@
+"""
+Index vectoriel local (en processus) miroir de la collection Qdrant
+Matrice NumPy de vecteurs normalisés + payloads, chargée par scroll au démarrage
+et tenue à jour par les écritures de QdrantMemory
+
+La recherche est un produit scalaire vectorisé (similarité cosinus, comme la
+collection Qdrant); les filtres se limitent à l'égalité ou l'appartenance à un
+ensemble de valeurs sur des clés de payload.
+"""
+
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def payload_matches(payload: Dict, filters: Dict[str, Any]) -> bool:
+    """
+    Vérifie les conditions de filtre sur un payload
+    
+    Une valeur tuple est un ensemble de valeurs admises (None = clé absente),
+    toute autre valeur une égalité.
+    """
+    for key, value in filters.items():
+        actual = payload.get(key)
+        if isinstance(value, tuple):
+            if actual not in value:
+                return False
+        elif actual != value:
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    """Copie locale d'une collection Qdrant pour la recherche sans aller-retour réseau"""
+
+    def __init__(self, max_points: int = 50_000):
+        """
+        Args:
+            max_points: Taille max de la collection servie localement (au-delà: Qdrant)
+        """
+        self.max_points = max_points
+        self.dimension: Optional[int] = None
+        self.ready = False
+
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._payloads: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {'searches': 0, 'search_time_s': 0.0, 'load_time_s': 0.0}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ------------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------------
+    def load(self, client, collection_name: str, page_size: int = 1000) -> bool:
+        """
+        Charge tous les points de la collection (scroll avec vecteurs)
+
+        Args:
+            client: Client Qdrant
+            collection_name: Nom de la collection
+            page_size: Points par page de scroll
+
+        Returns:
+            True si l'index est utilisable, False si la collection est trop grande
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.ready = False
+            self._reset()
+
+            if client.count(collection_name, exact=True).count > self.max_points:
+                return False
+
+            offset = None
+            while True:
+                points, offset = client.scroll(
+                    collection_name=collection_name,
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                for point in points:
+                    if isinstance(point.vector, list):  # Vecteurs nommés non gérés
+                        self._add(str(point.id), point.vector, point.payload or {})
+                if offset is None:
+                    break
+
+            self.ready = len(self._ids) <= self.max_points
+            self.stats['load_time_s'] = time.perf_counter() - start
+            return self.ready
+
+    def _reset(self):
+        self._matrix = np.zeros((0, self.dimension or 0), dtype=np.float32)
+        self._ids, self._payloads, self._rows, self._masks = [], [], {}, {}
+
+    # ------------------------------------------------------------------
+    # Écritures (appelées après l'upsert/delete Qdrant)
+    # ------------------------------------------------------------------
+    def _add(self, point_id: str, vector: List[float], payload: Dict):
+        array = np.asarray(vector, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = array.shape[0]
+            self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+        norm = np.linalg.norm(array)
+        if norm > 0:
+            array = array / norm
+
+        row = self._rows.get(point_id)
+        if row is None:
+            row = len(self._ids)
+            if row >= self._matrix.shape[0]:
+                # Capacité doublée: ajout amorti en O(1)
+                grown = np.zeros((max(256, row * 2), self.dimension), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self._ids.append(point_id)
+            self._payloads.append(payload)
+            self._rows[point_id] = row
+        else:
+            self._payloads[row] = payload
+        self._matrix[row] = array
+        self._masks.clear()
+
+    def add(self, point_ids: List[str], vectors: List[List[float]], payloads: List[Dict]):
+        """Ajoute ou remplace des points"""
+        with self._lock:
+            for point_id, vector, payload in zip(point_ids, vectors, payloads):
+                self._add(str(point_id), vector, payload)
+            if len(self._ids) > self.max_points:
+                # Collection devenue trop grande: retour à Qdrant
+                self.ready = False
+
+    def remove(self, point_ids: List[str]):
+        """Supprime des points (la dernière ligne prend la place de la ligne supprimée)"""
+        with self._lock:
+            for point_id in map(str, point_ids):
+                row = self._rows.pop(point_id, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = self._ids[last]
+                    self._payloads[row] = self._payloads[last]
+                    self._rows[self._ids[row]] = row
+                self._ids.pop()
+                self._payloads.pop()
+            self._masks.clear()
+
+    def update_payloads(self, updates: Dict[str, Dict]):
+        """
+        Fusionne des champs dans les payloads de points existants (sans toucher aux vecteurs)
+
+        Args:
+            updates: Champs à écrire, par ID de point
+        """
+        with self._lock:
+            keys = set()
+            for point_id, fields in updates.items():
+                row = self._rows.get(str(point_id))
+                if row is None:
+                    continue
+                self._payloads[row] = {**self._payloads[row], **fields}
+                keys.update(fields)
+            # Masques périmés pour les clés modifiées seulement
+            for mask_key in [k for k in self._masks if k[0] in keys]:
+                del self._masks[mask_key]
+
+    def clear(self):
+        """Vide l'index (la collection a été vidée)"""
+        with self._lock:
+            self._reset()
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+    def _mask(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Masque booléen des lignes dont le payload vérifie toutes les conditions"""
+        mask = None
+        for key, value in filters.items():
+            cached = self._masks.get((key, value))
+            if cached is None:
+                cached = np.fromiter((payload_matches(p, {key: value}) for p in self._payloads),
+                                     dtype=bool, count=len(self._payloads))
+                self._masks[(key, value)] = cached
+            mask = cached if mask is None else mask & cached
+        return mask
+
+    def search_many(self, vectors: List[List[float]], limit: int = 5,
+                    filters: Optional[Dict[str, Any]] = None,
+                    score_threshold: Optional[float] = None) -> List[List[Tuple[str, float, Dict]]]:
+        """
+        Recherche les plus proches voisins de plusieurs vecteurs
+
+        Args:
+            vectors: Vecteurs de requête
+            limit: Nombre de résultats par requête
+            filters: Conditions sur les clés de payload (ex: {"type": "fact", "namespace": ("ds-cli", "global", None)})
+            score_threshold: Score minimal
+
+        Returns:
+            Pour chaque requête: liste de (id, score, payload) par score décroissant
+        """
+        start = time.perf_counter()
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or not vectors:
+                return [[] for _ in vectors]
+
+            queries = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries = queries / np.where(norms > 0, norms, 1.0)
+            scores = queries @ self._matrix[:count].T
+
+            if filters:
+                mask = self._mask(filters)
+                scores[:, ~mask] = -np.inf
+
+            k = min(limit, count)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+            results = []
+            for query_scores, candidates in zip(scores, top):
+                ranked = candidates[np.argsort(-query_scores[candidates])]
+                hits = []
+                for row in ranked:
+                    score = float(query_scores[row])
+                    if score == -np.inf or (score_threshold is not None and score < score_threshold):
+                        break
+                    hits.append((self._ids[row], score, self._payloads[row]))
+                results.append(hits)
+
+        self.stats['searches'] += len(vectors)
+        self.stats['search_time_s'] += time.perf_counter() - start
+        return results
+
+    def search(self, vector: List[float], limit: int = 5,
+               filters: Optional[Dict[str, Any]] = None,
+               score_threshold: Optional[float] = None) -> List[Tuple[str, float, Dict]]:
+        """Recherche les plus proches voisins d'un vecteur (voir search_many)"""
+        return self.search_many([vector], limit, filters, score_threshold)[0]
+
+    def get_statistics(self) -> Dict:
+        """Statistiques (points, recherches, temps moyen par recherche)"""
+        searches = self.stats['searches']
+        return {
+            'ready': self.ready,
+            'points': len(self._ids),
+            'max_points': self.max_points,
+            'searches': searches,
+            'avg_search_us': self.stats['search_time_s'] / searches * 1e6 if searches else 0.0,
+            'load_time_s': self.stats['load_time_s']
+        }
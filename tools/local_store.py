@@ -0,0 +1,279 @@
+"""
+Niveau local de la mémoire: base SQLite avec index plein texte FTS5
+Chaque point écrit par QdrantMemory (fait, décision, résumé de conversation) y est
+aussi enregistré. Les lectures exactes (ID de contenu), par mot-clé, par catégorie
+et la dernière conversation sont servies localement, en moins d'une milliseconde;
+Qdrant n'est interrogé que pour les recherches sémantiques.
+
+- Fichier partagé entre processus (CLI, batch, démon), en mode WAL
+- Qdrant embarqué en mémoire (tests): base SQLite en mémoire
+- Reconstruit depuis Qdrant si le nombre de points diverge (écritures hors QdrantMemory)
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    type TEXT,
+    namespace TEXT,
+    category TEXT,
+    timestamp TEXT,
+    text TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS points_scope ON points(type, namespace, timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS points_fts USING fts5(
+    text, content='points', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS points_ai AFTER INSERT ON points BEGIN
+    INSERT INTO points_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS points_ad AFTER DELETE ON points BEGIN
+    INSERT INTO points_fts(points_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS points_au AFTER UPDATE OF text ON points BEGIN
+    INSERT INTO points_fts(points_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    INSERT INTO points_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+"""
+
+_UPSERT = (
+    "INSERT INTO points(id, type, namespace, category, timestamp, text, payload) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET type=excluded.type, namespace=excluded.namespace, "
+    "category=excluded.category, timestamp=excluded.timestamp, text=excluded.text, "
+    "payload=excluded.payload"
+)
+
+
+def local_store_path(qdrant_url: str, collection_name: str) -> Optional[str]:
+    """
+    Emplacement de la base locale d'une collection
+
+    Args:
+        qdrant_url: Emplacement Qdrant (URL, path:<répertoire> ou :memory:)
+        collection_name: Nom de la collection
+
+    Returns:
+        Chemin du fichier, ":memory:" pour un Qdrant en mémoire, None si désactivé
+        (DS_MEMORY_LOCAL_STORE_DIR vide)
+    """
+    if qdrant_url == ":memory:":
+        return ":memory:"
+    directory = os.getenv("DS_MEMORY_LOCAL_STORE_DIR")
+    if directory is None:
+        directory = "~/.cache/ds-cli/memory"
+    if not directory:
+        return None
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{qdrant_url}-{collection_name}").strip("_")
+    return str(Path(os.path.expanduser(directory)) / f"{slug}.sqlite3")
+
+
+def fts_query(query: str) -> str:
+    """
+    Requête FTS5 tolérante: chaque mot de la requête est une alternative (OR),
+    un identifiant (memory_tools.py, E501) est cherché comme suite de morceaux
+    """
+    terms = []
+    for word in query.split():
+        parts = re.findall(r"[^\W_]+", word)
+        if parts:
+            terms.append('"' + " ".join(parts) + '"')
+    return " OR ".join(terms)
+
+
+class LocalStore:
+    """Points de la mémoire dans SQLite (payload JSON + index FTS5 sur le texte embeddé)"""
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Args:
+            path: Fichier SQLite (":memory:" = base du processus)
+        """
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")  # Lecteurs d'autres processus non bloqués
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        self.stats = {'reads': 0, 'read_time_s': 0.0, 'writes': 0, 'rebuilds': 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+
+    def _read(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        start = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        self.stats['reads'] += 1
+        self.stats['read_time_s'] += time.perf_counter() - start
+        return rows
+
+    @staticmethod
+    def _scope(point_type: Optional[str], namespaces: Optional[List[str]]) -> Tuple[str, list]:
+        """Clause WHERE: type et espaces de noms visibles (+ points sans espace de noms)"""
+        clauses, params = [], []
+        if point_type:
+            clauses.append("type = ?")
+            params.append(point_type)
+        if namespaces:
+            clauses.append(f"(namespace IN ({', '.join('?' * len(namespaces))}) OR namespace IS NULL)")
+            params.extend(namespaces)
+        return (" AND ".join(clauses) or "1"), params
+
+    # ------------------------------------------------------------------
+    # Écritures (miroir des écritures Qdrant de QdrantMemory)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _rows(records: Iterable[Tuple[str, str, Dict]]) -> List[tuple]:
+        """Lignes de la table points pour des (id, texte embeddé, payload)"""
+        return [
+            (str(point_id), payload.get("type"), payload.get("namespace"), payload.get("category"),
+             payload.get("timestamp"), text, json.dumps(payload, ensure_ascii=False, default=str))
+            for point_id, text, payload in records
+        ]
+
+    def upsert(self, ids: List[str], texts: List[str], payloads: List[Dict]):
+        """Ajoute ou remplace des points"""
+        rows = self._rows(zip(ids, texts, payloads))
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+        self.stats['writes'] += len(rows)
+
+    def update_payloads(self, updates: Dict[str, Dict]):
+        """Met à jour des champs du payload (ex: usage_count, timestamp), sans toucher au texte"""
+        with self._lock, self._conn:
+            for point_id, fields in updates.items():
+                row = self._conn.execute("SELECT payload FROM points WHERE id = ?", (str(point_id),)).fetchone()
+                if row is not None:
+                    payload = {**json.loads(row[0]), **fields}
+                    self._conn.execute(
+                        "UPDATE points SET type = ?, namespace = ?, category = ?, timestamp = ?, payload = ? "
+                        "WHERE id = ?",
+                        (payload.get("type"), payload.get("namespace"), payload.get("category"),
+                         payload.get("timestamp"), json.dumps(payload, ensure_ascii=False, default=str),
+                         str(point_id))
+                    )
+        self.stats['writes'] += len(updates)
+
+    def delete(self, ids: List[str]):
+        """Supprime des points"""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM points WHERE id = ?", [(str(point_id),) for point_id in ids])
+
+    def clear(self):
+        """Supprime tous les points"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM points")
+
+    def rebuild(self, records: Iterable[Tuple[str, str, Dict]]):
+        """
+        Remplace le contenu par celui de la collection Qdrant, en une seule transaction
+
+        Les lecteurs (autres processus compris) voient l'ancien contenu puis le nouveau,
+        jamais une base vide ou partielle. Les points écrits par un autre processus
+        pendant la lecture de Qdrant (ex: écritures différées pas encore dans la
+        collection) sont conservés.
+
+        Args:
+            records: (id, texte embeddé, payload) de chaque point
+        """
+        with self._lock:
+            snapshot = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM points").fetchone()[0]
+        # Lecture de Qdrant hors transaction: les écrivains ne sont pas bloqués pendant le réseau
+        rows = self._rows(records)
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS rebuild_ids (id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM rebuild_ids")
+            self._conn.executemany("INSERT OR IGNORE INTO rebuild_ids(id) VALUES (?)", [(row[0],) for row in rows])
+            self._conn.execute(
+                "DELETE FROM points WHERE rowid <= ? AND id NOT IN (SELECT id FROM rebuild_ids)", (snapshot,)
+            )
+            self._conn.executemany(_UPSERT, rows)
+            self._conn.execute("DELETE FROM rebuild_ids")
+        self.stats['writes'] += len(rows)
+        self.stats['rebuilds'] += 1
+
+    # ------------------------------------------------------------------
+    # Lectures
+    # ------------------------------------------------------------------
+    def get(self, ids: List[str]) -> List[Tuple[str, Dict]]:
+        """Points existants parmi des IDs, dans l'ordre des IDs"""
+        if not ids:
+            return []
+        rows = dict(self._read(
+            f"SELECT id, payload FROM points WHERE id IN ({', '.join('?' * len(ids))})", map(str, ids)
+        ))
+        return [(str(point_id), json.loads(rows[str(point_id)])) for point_id in ids if str(point_id) in rows]
+
+    def scroll(self, point_type: str, namespaces: Optional[List[str]] = None, limit: int = 100,
+               category: Optional[str] = None) -> List[Tuple[str, Dict]]:
+        """Points d'un type (et d'une catégorie), du plus récent au plus ancien"""
+        where, params = self._scope(point_type, namespaces)
+        if category:
+            where += " AND category = ?"
+            params.append(category)
+        rows = self._read(f"SELECT id, payload FROM points WHERE {where} ORDER BY timestamp DESC LIMIT ?",
+                          params + [limit])
+        return [(point_id, json.loads(payload)) for point_id, payload in rows]
+
+    def latest(self, point_type: str, namespaces: Optional[List[str]] = None) -> Optional[Tuple[str, Dict]]:
+        """Point le plus récent d'un type"""
+        rows = self.scroll(point_type, namespaces, limit=1)
+        return rows[0] if rows else None
+
+    def search(self, query: str, point_type: Optional[str] = None, namespaces: Optional[List[str]] = None,
+               limit: int = 10) -> List[Tuple[str, float, Dict]]:
+        """
+        Recherche par mots-clés (FTS5, classement BM25)
+
+        Returns:
+            (id, score, payload), score plus élevé = plus pertinent
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        where, params = self._scope(point_type, namespaces)
+        rows = self._read(
+            "SELECT points.id, -bm25(points_fts) AS score, points.payload FROM points_fts "
+            "JOIN points ON points.rowid = points_fts.rowid "
+            f"WHERE points_fts MATCH ? AND {where} ORDER BY score DESC LIMIT ?",
+            [match] + params + [limit]
+        )
+        return [(point_id, score, json.loads(payload)) for point_id, score, payload in rows]
+
+    def iter_points(self, point_type: Optional[str] = None) -> Iterator[SimpleNamespace]:
+        """Points (id + payload), pour charger un index (ex: LexicalIndex.load)"""
+        where, params = self._scope(point_type, None)
+        for point_id, payload in self._read(f"SELECT id, payload FROM points WHERE {where}", params):
+            yield SimpleNamespace(id=point_id, payload=json.loads(payload))
+
+    def get_statistics(self) -> Dict:
+        """Statistiques (points, lectures, temps moyen d'une lecture)"""
+        reads = self.stats['reads']
+        return {
+            **self.stats,
+            'points': len(self),
+            'path': self.path,
+            'avg_read_us': self.stats['read_time_s'] / reads * 1e6 if reads else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,263 @@
+"""
+Consolidation de la mémoire Qdrant
+- Fusion des faits quasi-identiques (similarité cosinus des vecteurs)
+- Score de rétention: utilisation × décroissance exponentielle avec l'âge
+- Plafond de faits par catégorie et de résumés de conversation, par espace de noms (projet)
+
+Exécutée à la demande (/consolidate) ou périodiquement en arrière-plan
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+# Seuil de similarité au-delà duquel deux faits sont considérés comme doublons
+SIMILARITY_THRESHOLD = 0.92
+# Faits conservés au plus par catégorie
+MAX_FACTS_PER_CATEGORY = 500
+# Résumés de conversation conservés au plus
+MAX_CONVERSATIONS = 200
+# Demi-vie du score de rétention (jours sans utilisation)
+HALF_LIFE_DAYS = 90.0
+
+
+def _age_days(payload: Dict, now: datetime) -> float:
+    """Âge depuis la dernière utilisation (ou la création)"""
+    stamp = payload.get("last_used") or payload.get("timestamp")
+    try:
+        return max((now - datetime.fromisoformat(stamp)).total_seconds() / 86400, 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def retention_score(payload: Dict, now: datetime, half_life_days: float = HALF_LIFE_DAYS) -> float:
+    """
+    Score de rétention d'un point
+
+    (1 + utilisations + fusions) × 0.5^(âge / demi-vie)
+
+    Args:
+        payload: Payload du point
+        now: Instant de référence
+        half_life_days: Demi-vie en jours
+
+    Returns:
+        Score (plus haut = à conserver)
+    """
+    weight = 1 + payload.get("usage_count", 0) + payload.get("merged_count", 0)
+    return weight * 0.5 ** (_age_days(payload, now) / half_life_days)
+
+
+def find_duplicate_clusters(vectors: np.ndarray, priority: List[int],
+                            threshold: float = SIMILARITY_THRESHOLD,
+                            block_size: int = 1024) -> List[List[int]]:
+    """
+    Regroupe les vecteurs quasi-identiques
+
+    Chaque groupe a pour représentant le point de plus haute priorité, et ne contient
+    que des points directement similaires à ce représentant (pas de chaînage A~B~C).
+
+    Args:
+        vectors: Matrice (n, d)
+        priority: Indices des lignes, du plus prioritaire au moins prioritaire
+        threshold: Similarité cosinus minimale
+        block_size: Lignes par bloc de produit matriciel
+
+    Returns:
+        Groupes de taille > 1, représentant en tête
+    """
+    count = vectors.shape[0]
+    if count < 2:
+        return []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    matrix = (vectors / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+    # Voisins au-dessus du seuil, calculés par blocs pour borner la mémoire
+    neighbors: List[np.ndarray] = []
+    for start in range(0, count, block_size):
+        scores = matrix[start:start + block_size] @ matrix.T
+        for offset, row in enumerate(scores):
+            row[start + offset] = -1.0
+            neighbors.append(np.flatnonzero(row >= threshold))
+
+    absorbed = np.zeros(count, dtype=bool)
+    clusters = []
+    for leader in priority:
+        if absorbed[leader]:
+            continue
+        members = [int(j) for j in neighbors[leader] if not absorbed[j]]
+        if members:
+            absorbed[leader] = True
+            absorbed[members] = True
+            clusters.append([leader] + members)
+    return clusters
+
+
+def _group_by(points: List, items, key: str) -> Dict[Optional[str], List]:
+    """Regroupe des éléments selon une clé du payload des points correspondants"""
+    groups: Dict[Optional[str], List] = {}
+    for point, item in zip(points, items):
+        groups.setdefault(point.payload.get(key), []).append(item)
+    return groups
+
+
+def consolidate_memory(memory=None,
+                       similarity_threshold: float = SIMILARITY_THRESHOLD,
+                       max_per_category: int = MAX_FACTS_PER_CATEGORY,
+                       max_conversations: int = MAX_CONVERSATIONS,
+                       half_life_days: float = HALF_LIFE_DAYS,
+                       dry_run: bool = False) -> Dict:
+    """
+    Consolide la mémoire: fusion des doublons, décroissance, plafonds
+
+    Args:
+        memory: Instance QdrantMemory (défaut: get_memory())
+        similarity_threshold: Similarité cosinus de fusion des faits
+        max_per_category: Faits conservés au plus par catégorie (et par espace de noms)
+        max_conversations: Résumés de conversation conservés au plus (par espace de noms)
+        half_life_days: Demi-vie du score de rétention
+        dry_run: Calculer sans rien modifier
+
+    Returns:
+        Dict avec tailles avant/après, faits fusionnés et points supprimés
+    """
+    from .memory_tools import get_memory
+
+    start = time.perf_counter()
+    try:
+        memory = memory or get_memory()
+        memory.flush_usage()
+        now = datetime.now()
+        before = memory.get_statistics(refresh=True)['total_points']
+
+        # 1. Doublons (au sein d'un même espace de noms): les plus utilisés/récents représentent leur groupe
+        facts = list(memory.iter_points("fact", with_vectors=True))
+        facts = [point for point in facts if isinstance(point.vector, list)]
+        scores = [retention_score(point.payload, now, half_life_days) for point in facts]
+        clusters = []
+        for indices in _group_by(facts, range(len(facts)), "namespace").values():
+            priority = sorted(range(len(indices)), key=lambda i: -scores[indices[i]])
+            local_clusters = find_duplicate_clusters(
+                np.asarray([facts[i].vector for i in indices], dtype=np.float32),
+                priority, similarity_threshold
+            )
+            clusters.extend([indices[i] for i in cluster] for cluster in local_clusters)
+
+        to_delete: List[str] = []
+        merged_payloads = []
+        for cluster in clusters:
+            leader, members = facts[cluster[0]], [facts[i] for i in cluster[1:]]
+            payload = dict(leader.payload)
+            payload["usage_count"] = sum(p.payload.get("usage_count", 0) for p in [leader] + members)
+            payload["merged_count"] = payload.get("merged_count", 0) + sum(
+                1 + p.payload.get("merged_count", 0) for p in members
+            )
+            last_used = [p.payload.get("last_used") for p in [leader] + members if p.payload.get("last_used")]
+            if last_used:
+                payload["last_used"] = max(last_used)
+            merged_payloads.append((leader.id, payload))
+            to_delete.extend(str(p.id) for p in members)
+            scores[cluster[0]] = retention_score(payload, now, half_life_days)
+
+        # 2. Plafond par espace de noms et catégorie sur les faits restants (score de rétention)
+        deleted = set(to_delete)
+        by_category: Dict[tuple, List[int]] = {}
+        for i, point in enumerate(facts):
+            if str(point.id) not in deleted:
+                key = (point.payload.get("namespace"), point.payload.get("category", "general"))
+                by_category.setdefault(key, []).append(i)
+        capped_facts = 0
+        for indices in by_category.values():
+            if len(indices) > max_per_category:
+                indices.sort(key=lambda i: -scores[i])
+                dropped = [str(facts[i].id) for i in indices[max_per_category:]]
+                to_delete.extend(dropped)
+                capped_facts += len(dropped)
+
+        # 3. Résumés de conversation: seuls les plus récents de chaque espace de noms sont conservés
+        conversations = list(memory.iter_points("conversation"))
+        capped_conversations = []
+        for group in _group_by(conversations, conversations, "namespace").values():
+            group.sort(key=lambda point: point.payload.get("timestamp", ""), reverse=True)
+            capped_conversations.extend(str(point.id) for point in group[max_conversations:])
+        to_delete.extend(capped_conversations)
+
+        if not dry_run:
+            if merged_payloads:
+                memory.update_payloads({
+                    point_id: {k: payload[k] for k in ("usage_count", "merged_count", "last_used") if k in payload}
+                    for point_id, payload in merged_payloads
+                })
+            if to_delete:
+                memory.delete_points(to_delete)
+
+        after = before - len(to_delete)
+        return {
+            "success": True,
+            "dry_run": dry_run,
+            "points_before": before,
+            "points_after": after,
+            "facts_merged": sum(len(cluster) - 1 for cluster in clusters),
+            "clusters": len(clusters),
+            "facts_capped": capped_facts,
+            "conversations_capped": len(capped_conversations),
+            "reduction_pct": round(100 * len(to_delete) / before, 1) if before else 0.0,
+            "duration_s": round(time.perf_counter() - start, 3)
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+_consolidation_stop: Optional[threading.Event] = None
+
+
+def start_consolidation_task(interval_hours: Optional[float] = None,
+                             on_result: Optional[Callable[[Dict], None]] = None) -> bool:
+    """
+    Lance la consolidation périodique sur un thread d'arrière-plan
+
+    Le thread n'affiche rien (il écrirait au milieu du prompt): chaque résultat
+    est transmis à on_result, l'appelant décide quand le montrer.
+
+    Args:
+        interval_hours: Intervalle entre deux passes (défaut: DS_MEMORY_CONSOLIDATE_HOURS, 0 = désactivé)
+        on_result: Appelé avec le résultat de chaque passe (depuis le thread d'arrière-plan)
+
+    Returns:
+        True si la tâche a été lancée
+    """
+    global _consolidation_stop
+    if interval_hours is None:
+        interval_hours = float(os.getenv("DS_MEMORY_CONSOLIDATE_HOURS", "0"))
+    if interval_hours <= 0 or _consolidation_stop is not None:
+        return False
+
+    stop = threading.Event()
+    _consolidation_stop = stop
+
+    def run():
+        # Première passe après un intervalle: ne pas concurrencer le démarrage
+        while not stop.wait(interval_hours * 3600):
+            result = consolidate_memory()
+            if on_result is not None:
+                on_result(result)
+
+    threading.Thread(target=run, name="memory-consolidation", daemon=True).start()
+    return True
+
+
+def stop_consolidation_task():
+    """Arrête la consolidation périodique"""
+    global _consolidation_stop
+    if _consolidation_stop is not None:
+        _consolidation_stop.set()
+        _consolidation_stop = None
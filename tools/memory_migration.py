@@ -0,0 +1,373 @@
+"""
+Migration de la mémoire vers un nouveau modèle d'embeddings
+Les vecteurs d'un autre modèle (ou d'une autre dimension) ne sont pas comparables:
+la collection est ré-embeddée à partir des textes stockés dans les payloads.
+
+- Lecture en flux (scroll par lots), encodage par lots dans quelques processus
+  (chacun charge le modèle: MIGRATION_MAX_WORKERS par défaut), écriture dans une nouvelle collection
+- Reprise après interruption grâce à un point de contrôle (dernier lot écrit)
+- Bascule par alias: QDRANT_COLLECTION_NAME devient un alias vers la nouvelle collection
+  (à la première bascule, l'ancienne collection est d'abord recopiée sous son nom physique)
+
+Usage:
+    python -m tools.memory_migration --backend onnx --model all-MiniLM-L12-v2
+"""
+
+import os
+import json
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from qdrant_client.models import (
+    PointStruct, CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+)
+
+from .memory_tools import (
+    EmbeddingBackend, HashingBackend, get_qdrant_client, get_embedding_backend,
+    ensure_collection, point_text, LEGACY_VECTOR_SPACE
+)
+
+
+# Points lus, encodés et écrits par lot
+MIGRATION_BATCH_SIZE = 512
+# Taille des lots passés au modèle dans chaque processus
+ENCODE_BATCH_SIZE = 64
+# Processus d'encodage par défaut (chacun charge son propre modèle en RAM)
+MIGRATION_MAX_WORKERS = 4
+
+
+def resolve_alias(client, name: str) -> Optional[str]:
+    """Collection désignée par un alias (None si `name` n'est pas un alias)"""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return None
+
+
+def target_collection_name(alias: str, backend: EmbeddingBackend) -> str:
+    """Collection physique d'un espace vectoriel: <alias>__<modèle>-<dimension>"""
+    return _space_collection_name(alias, backend.vector_space)
+
+
+def _space_collection_name(alias: str, vector_space: str) -> str:
+    slug = "".join(c if c.isalnum() or c in '-_' else '_' for c in vector_space)
+    return f"{alias}__{slug}"
+
+
+def _collection_vector_space(client, collection_name: str) -> str:
+    """Espace vectoriel des points d'une collection (défaut: celui des collections d'avant les backends)"""
+    points, _ = client.scroll(collection_name, limit=1, with_payload=["vector_space"])
+    return (points[0].payload or {}).get("vector_space", LEGACY_VECTOR_SPACE) if points else LEGACY_VECTOR_SPACE
+
+
+# Processus d'encodage: backend chargé une fois par processus
+_worker_backend: Optional[EmbeddingBackend] = None
+
+
+def _init_worker(name: str, model_name: str, dimension: int):
+    global _worker_backend
+    os.environ.setdefault('OMP_NUM_THREADS', '1')  # Un cœur par processus
+    if name == HashingBackend.name:
+        _worker_backend = HashingBackend(dimension)
+    else:
+        _worker_backend = get_embedding_backend(name, model_name)
+
+
+def _encode_in_worker(texts: List[str]) -> List[List[float]]:
+    return _worker_backend.encode(texts, batch_size=ENCODE_BATCH_SIZE).tolist()
+
+
+class _Checkpoint:
+    """Point de contrôle JSON: lot suivant à lire et points déjà écrits"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def load(self) -> Optional[Dict]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def save(self, state: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(state), encoding='utf-8')
+        os.replace(tmp, self.path)  # Remplacement atomique: jamais de checkpoint tronqué
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+def _copy_collection(client, source: str, destination: str, batch_size: int) -> int:
+    """Copie les points (vecteurs et payloads) d'une collection dans une autre"""
+    size = getattr(client.get_collection(source).config.params.vectors, 'size', None)
+    ensure_collection(client, destination, size)
+    offset = None
+    while True:
+        points, offset = client.scroll(source, limit=batch_size, offset=offset,
+                                       with_payload=True, with_vectors=True)
+        if points:
+            client.upsert(destination, wait=True, points=[
+                PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points
+            ])
+        if offset is None:
+            return client.count(destination, exact=True).count
+
+
+def _create_alias(client, alias: str, collection_name: str):
+    client.update_collection_aliases(change_aliases_operations=[
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias))
+    ])
+
+
+def _scroll_pages(client, collection_name: str, offset, batch_size: int) -> Iterator[Tuple[list, object]]:
+    """Lots de points (payloads sans vecteurs) et offset du lot suivant"""
+    while True:
+        points, next_offset = client.scroll(collection_name, limit=batch_size, offset=offset,
+                                            with_payload=True, with_vectors=False)
+        if points:
+            yield points, next_offset
+        if next_offset is None:
+            return
+        offset = next_offset
+
+
+def migrate_embeddings(backend: Optional[EmbeddingBackend] = None,
+                       qdrant_url: Optional[str] = None,
+                       collection_name: Optional[str] = None,
+                       batch_size: int = MIGRATION_BATCH_SIZE,
+                       workers: Optional[int] = None,
+                       checkpoint_dir: str = "./backups",
+                       switch: bool = True,
+                       drop_source: bool = False) -> Dict:
+    """
+    Ré-embedde la collection avec un nouveau backend et bascule l'alias
+
+    Args:
+        backend: Nouveau backend d'embeddings (défaut: DS_EMBEDDING_BACKEND / DS_EMBEDDING_MODEL)
+        qdrant_url: URL du serveur Qdrant
+        collection_name: Nom logique de la mémoire (alias, défaut: QDRANT_COLLECTION_NAME)
+        batch_size: Points par lot
+        workers: Processus d'encodage (défaut: min(MIGRATION_MAX_WORKERS, cœurs); 1 = dans ce processus)
+        checkpoint_dir: Répertoire des points de contrôle (et du backup avant la première bascule)
+        switch: Basculer l'alias une fois la copie complète
+        drop_source: Supprimer l'ancienne collection (ou sa copie) après la bascule
+
+    Returns:
+        Dict avec collections source/cible, points migrés, débit et état de la bascule
+    """
+    from .qdrant_backup import backup_qdrant
+
+    alias = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "deepseek_collection")
+    start = time.perf_counter()
+
+    try:
+        client = get_qdrant_client(qdrant_url)
+        backend = backend or get_embedding_backend()
+        _flush_loaded_memory(alias)
+        target = target_collection_name(alias, backend)
+        checkpoint = _Checkpoint(Path(checkpoint_dir) / f"migration_{target}.json")
+        state = checkpoint.load()
+
+        source = resolve_alias(client, alias) or alias
+        if not client.collection_exists(source):
+            if state and state.get("preserved") and client.collection_exists(target):
+                # Interrompue entre la suppression de l'ancienne collection et la création de l'alias
+                _create_alias(client, alias, target)
+                checkpoint.clear()
+                _use_backend(alias, backend)
+                migrated = client.count(target, exact=True).count
+                return {"success": True, "alias": alias, "source": state["source"], "target": target,
+                        "vector_space": backend.vector_space, "points_total": migrated,
+                        "points_migrated": migrated, "resumed": True, "workers": 0,
+                        "duration_s": time.perf_counter() - start, "points_per_s": 0.0,
+                        "switched": True, "atomic_switch": False, "backup_file": None,
+                        "preserved_source": state["preserved"]}
+            return {"success": False, "error": f"Collection {alias} introuvable"}
+        if target == source or (source == alias and _collection_vector_space(client, source) == backend.vector_space):
+            return {"success": False, "error": f"{alias} utilise déjà l'espace {backend.vector_space}"}
+
+        # Reprise: même source, même cible, même espace vectoriel
+        resumed = bool(state and state.get("source") == source and client.collection_exists(target))
+        if not resumed:
+            if client.collection_exists(target):
+                client.delete_collection(target)  # Copie partielle sans checkpoint: recommencer
+            state = {"source": source, "target": target, "vector_space": backend.vector_space,
+                     "offset": None, "migrated": 0}
+            checkpoint.save(state)
+        ensure_collection(client, target, backend.dimension)
+        total = client.count(source, exact=True).count
+
+        # Encodage: quelques processus (un modèle chacun) ou exécuteur local si un seul
+        if workers is None:
+            workers = 1 if backend.name == "service" else min(MIGRATION_MAX_WORKERS, os.cpu_count() or 1)
+        if workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(backend.name, backend.model_name, backend.dimension)
+            )
+            encode = lambda texts: executor.submit(_encode_in_worker, texts)
+        else:
+            executor = ThreadPoolExecutor(max_workers=1)
+            encode = lambda texts: executor.submit(
+                lambda: backend.encode(texts, batch_size=ENCODE_BATCH_SIZE).tolist()
+            )
+
+        def write(points, next_offset, vectors: Future):
+            payloads = [dict(point.payload or {}) for point in points]
+            for payload in payloads:
+                payload["vector_space"] = backend.vector_space
+                payload["embedding_backend"] = backend.name
+            client.upsert(target, wait=True, points=[
+                PointStruct(id=point.id, vector=vector, payload=payload)
+                for point, vector, payload in zip(points, vectors.result(), payloads)
+            ])
+            # Lot écrit: la reprise commence au suivant
+            state["offset"] = next_offset
+            state["migrated"] += len(points)
+            checkpoint.save(state)
+
+        # Pipeline: lecture et écriture pendant l'encodage des lots suivants
+        in_flight = deque()
+        try:
+            if not resumed or state["offset"] is not None or state["migrated"] == 0:
+                for points, next_offset in _scroll_pages(client, source, state["offset"], batch_size):
+                    in_flight.append((points, next_offset, encode([point_text(p.payload or {}) for p in points])))
+                    if len(in_flight) > workers:
+                        write(*in_flight.popleft())
+                while in_flight:
+                    write(*in_flight.popleft())
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+        migrated = client.count(target, exact=True).count
+        duration = time.perf_counter() - start
+        result = {
+            "success": True,
+            "alias": alias,
+            "source": source,
+            "target": target,
+            "vector_space": backend.vector_space,
+            "points_total": total,
+            "points_migrated": migrated,
+            "resumed": resumed,
+            "workers": workers,
+            "duration_s": duration,
+            "points_per_s": state["migrated"] / duration if duration > 0 else 0.0,
+            "switched": False,
+            "atomic_switch": None,
+            "backup_file": None,
+            "preserved_source": None
+        }
+        if migrated < total:
+            # Points écrits dans la source pendant la copie: relancer avant de basculer
+            result["success"] = False
+            result["error"] = f"Copie incomplète ({migrated}/{total} points): relancer la migration"
+            return result
+
+        if switch:
+            if source == alias:
+                # Première migration: le nom est une collection, pas un alias; il doit être libéré.
+                # L'ancienne collection est d'abord recopiée sous son nom physique (vérifiée),
+                # et le checkpoint permet de terminer la bascule si elle est interrompue.
+                backup = backup_qdrant(qdrant_url, source, checkpoint_dir)
+                if not backup.get("success"):
+                    return {**result, "success": False, "error": f"Backup avant bascule: {backup.get('error')}"}
+                result["backup_file"] = backup["backup_file"]
+                preserved = _space_collection_name(alias, _collection_vector_space(client, source))
+                copied = _copy_collection(client, source, preserved, batch_size)
+                if copied < client.count(source, exact=True).count:
+                    return {**result, "success": False,
+                            "error": f"Copie de {source} dans {preserved} incomplète: bascule annulée"}
+                state["preserved"] = preserved
+                checkpoint.save(state)
+                client.delete_collection(source)
+                _create_alias(client, alias, target)
+                result["atomic_switch"] = False
+                result["preserved_source"] = preserved
+                if drop_source:
+                    client.delete_collection(preserved)
+            else:
+                # Alias existant: suppression et création dans la même requête (bascule atomique)
+                client.update_collection_aliases(change_aliases_operations=[
+                    DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)),
+                    CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=alias))
+                ])
+                result["atomic_switch"] = True
+                if drop_source:
+                    client.delete_collection(source)
+            result["switched"] = True
+            checkpoint.clear()
+            _use_backend(alias, backend)
+
+        return result
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+def _flush_loaded_memory(alias: str):
+    """Écritures différées et utilisations en attente de ce processus écrites avant la copie"""
+    from . import memory_tools
+    memory = memory_tools._memory
+    if memory is not None and memory.collection_name == alias:
+        memory.flush_writes()
+        memory.flush_usage()
+
+
+def _use_backend(alias: str, backend: EmbeddingBackend):
+    """La mémoire chargée dans ce processus passe au nouveau backend"""
+    from . import memory_tools
+    memory = memory_tools._memory
+    if memory is not None and memory.collection_name == alias:
+        memory.set_backend(backend)
+        memory.refresh_lexical_index()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ré-embedde la mémoire avec un nouveau modèle")
+    parser.add_argument('--backend', default=None, help="sentence-transformers, onnx, hashing ou service")
+    parser.add_argument('--model', default=None, help="Modèle (défaut: DS_EMBEDDING_MODEL)")
+    parser.add_argument('--collection', default=None, help="Nom logique (défaut: QDRANT_COLLECTION_NAME)")
+    parser.add_argument('--batch-size', type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f"Processus d'encodage, un modèle chacun (défaut: min({MIGRATION_MAX_WORKERS}, cœurs))")
+    parser.add_argument('--no-switch', action='store_true', help="Copier sans basculer l'alias")
+    parser.add_argument('--drop-source', action='store_true',
+                        help="Supprimer l'ancienne collection (ou sa copie à la première bascule)")
+    args = parser.parse_args()
+
+    result = migrate_embeddings(
+        backend=get_embedding_backend(args.backend, args.model),
+        collection_name=args.collection,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        switch=not args.no_switch,
+        drop_source=args.drop_source
+    )
+    if not result.get("success"):
+        print(f"❌ Erreur: {result.get('error')}")
+        raise SystemExit(1)
+    print(f"✅ {result['points_migrated']} points ré-embeddés ({result['vector_space']}) "
+          f"en {result['duration_s']:.1f}s (~{result['points_per_s']:.0f} points/s, {result['workers']} processus)")
+    print(f"  {result['source']} → {result['target']}{' (reprise)' if result['resumed'] else ''}")
+    if result['switched']:
+        print(f"  Alias {result['alias']} → {result['target']}"
+              f"{'' if result['atomic_switch'] else ' (backup: ' + str(result['backup_file']) + ')'}")
+        if result.get('preserved_source') and not args.drop_source:
+            print(f"  Ancienne collection conservée: {result['preserved_source']} (--drop-source pour la supprimer)")
+        print(f"💡 Définir DS_EMBEDDING_BACKEND / DS_EMBEDDING_MODEL pour le nouveau modèle")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Reclassement des faits rappelés avant injection dans le contexte
+- Pertinence: similarité × fraîcheur (décroissance sur `timestamp`) + bonus d'utilisation
+- Diversité: Maximal Marginal Relevance (MMR) sur les vecteurs des faits
+- Sélection sous budget de tokens plutôt qu'en nombre fixe de faits
+- Injection différentielle: les faits déjà présents dans le contexte sont signalés, pas recomptés
+
+Une paraphrase d'un fait déjà retenu (ou déjà dans le contexte) est écartée; une
+correction récente passe devant le fait ancien qu'elle remplace.
+"""
+
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+
+# Demi-vie de la fraîcheur (jours depuis la création du fait)
+RECENCY_HALF_LIFE_DAYS = 30.0
+# Poids de la fraîcheur: un fait très ancien garde (1 - RECENCY_WEIGHT) de sa similarité
+RECENCY_WEIGHT = 0.3
+# Bonus d'utilisation maximal (atteint vers USAGE_SATURATION rappels)
+USAGE_WEIGHT = 0.1
+USAGE_SATURATION = 10
+# Similarité retenue pour un fait trouvé par identifiant exact (BM25) sans score dense
+LEXICAL_MATCH_SIMILARITY = 0.6
+# Compromis pertinence / diversité de la MMR (1 = pertinence seule)
+MMR_LAMBDA = 0.7
+# Au-delà de cette similarité avec un fait déjà retenu, un candidat est une paraphrase: écarté
+REDUNDANCY_THRESHOLD = 0.9
+
+
+def estimate_tokens(text: str) -> int:
+    """Estime le nombre de tokens (approximation: 1 token ≈ 4 chars)"""
+    return len(text) // 4
+
+
+def relevance(fact: Dict, now: datetime, half_life_days: float = RECENCY_HALF_LIFE_DAYS) -> float:
+    """
+    Pertinence d'un fait rappelé
+
+    similarité × (1 - w + w × 0.5^(âge / demi-vie)) + bonus d'utilisation
+
+    Args:
+        fact: Résultat de search_facts (score, lexical_match, timestamp, usage_count)
+        now: Instant de référence
+        half_life_days: Demi-vie de la fraîcheur
+
+    Returns:
+        Score de pertinence
+    """
+    similarity = fact.get("score", 0.0)
+    if fact.get("lexical_match"):
+        similarity = max(similarity, LEXICAL_MATCH_SIMILARITY)
+
+    try:
+        age_days = max((now - datetime.fromisoformat(fact.get("timestamp", ""))).total_seconds() / 86400, 0.0)
+    except (TypeError, ValueError):
+        age_days = 0.0
+    freshness = 1 - RECENCY_WEIGHT + RECENCY_WEIGHT * 0.5 ** (age_days / half_life_days)
+
+    usage = min(math.log1p(fact.get("usage_count", 0)) / math.log1p(USAGE_SATURATION), 1.0)
+    return similarity * freshness + USAGE_WEIGHT * usage
+
+
+def select_facts(facts: List[Dict], vectors: List[List[float]], token_budget: int,
+                 mmr_lambda: float = MMR_LAMBDA, now: Optional[datetime] = None,
+                 separator_tokens: int = 1, in_context: Optional[Set[str]] = None,
+                 redundancy_threshold: float = REDUNDANCY_THRESHOLD) -> List[Dict]:
+    """
+    Sélectionne les faits à injecter: MMR sur la pertinence, sous budget de tokens
+
+    À chaque étape, le fait retenu maximise
+    λ × pertinence - (1 - λ) × similarité max avec les faits déjà retenus;
+    un fait qui dépasse le budget restant est écarté au profit des suivants,
+    tout comme un fait dont la similarité avec un fait retenu dépasse
+    redundancy_threshold (paraphrase) ou dont le score MMR n'est pas positif.
+    Un fait déjà présent dans le contexte (in_context) ne consomme pas de budget
+    mais compte pour la diversité: ses paraphrases sont écartées aussi.
+
+    Args:
+        facts: Candidats (résultats de search_facts)
+        vectors: Vecteur de chaque candidat
+        token_budget: Tokens disponibles pour les textes des faits
+        mmr_lambda: Compromis pertinence / diversité
+        now: Instant de référence (défaut: maintenant)
+        separator_tokens: Coût du séparateur entre deux faits
+        in_context: IDs des faits déjà injectés dans le contexte courant
+        redundancy_threshold: Similarité au-delà de laquelle un candidat est redondant
+
+    Returns:
+        Faits retenus, dans l'ordre de sélection, avec leur "relevance"
+        et "in_context" (déjà présent: à ne pas réinjecter)
+    """
+    if not facts or token_budget <= 0:
+        return []
+    now = now or datetime.now()
+    in_context = in_context or set()
+
+    scores = np.array([relevance(fact, now) for fact in facts], dtype=np.float32)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms > 0, norms, 1.0)
+    similarity = matrix @ matrix.T
+
+    costs = [estimate_tokens(fact["fact"]) + separator_tokens for fact in facts]
+    remaining = token_budget
+    candidates = set(range(len(facts)))
+    redundancy = np.zeros(len(facts), dtype=np.float32)
+    selected: List[Dict] = []
+
+    def mmr(i):
+        return mmr_lambda * scores[i] - (1 - mmr_lambda) * redundancy[i]
+
+    while candidates:
+        best = max(candidates, key=mmr)
+        candidates.discard(best)
+        if redundancy[best] > redundancy_threshold or mmr(best) <= 0:
+            continue  # Paraphrase d'un fait retenu: n'apporte rien au contexte
+        present = facts[best]["id"] in in_context
+        if not present:
+            if costs[best] > remaining:
+                continue  # Trop long pour le budget restant: un fait plus court peut encore entrer
+            remaining -= costs[best]
+        selected.append({**facts[best], "relevance": float(scores[best]), "in_context": present})
+        redundancy = np.maximum(redundancy, similarity[best])
+
+    return selected
@@ -4,36 +4,323 @@ Utilise Qdrant pour la mémoire vectorielle sémantique
 """
 
 import os
+import re
+import time
 import uuid
-from typing import List, Dict, Optional
+import atexit
+import asyncio
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Optional, Set, Union
 from datetime import datetime
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, QueryRequest, OrderBy,
+    Direction, PointIdsList, SetPayloadOperation, SetPayload, IsEmptyCondition, PayloadField
+)
+from .embedding_cache import EmbeddingCache
+from .local_index import LocalVectorIndex
+from .lexical_index import LexicalIndex, identifier_terms, reciprocal_rank_fusion
+from .write_behind import WriteBehindQueue
+from .memory_rerank import select_facts
+from .search_cache import SearchResultCache
+from .local_store import LocalStore, local_store_path
+from .qdrant_schema import create_payload_indexes, collection_search_params
+from .working_dir import working_directory
 
 
-class QdrantMemory:
-    """Système de mémoire vectorielle basé sur Qdrant avec embeddings sémantiques"""
+# Clients Qdrant partagés par emplacement (un mode embarqué sur disque verrouille son répertoire)
+_clients: Dict[str, QdrantClient] = {}
+_clients_lock = threading.Lock()
+
+
+def qdrant_location(qdrant_url: Optional[str] = None) -> str:
+    """
+    Emplacement Qdrant configuré
     
-    def __init__(self, 
-                 qdrant_url: Optional[str] = None,
-                 collection_name: Optional[str] = None,
-                 model_name: str = 'all-MiniLM-L6-v2'):
+    Args:
+        qdrant_url: URL explicite (prioritaire)
+        
+    Returns:
+        URL du serveur, ':memory:' ou 'path:<répertoire>' pour le mode embarqué
+    """
+    if qdrant_url:
+        return qdrant_url
+    path = os.getenv("QDRANT_PATH")
+    if path:
+        return f"path:{os.path.abspath(os.path.expanduser(path))}"
+    return os.getenv("QDRANT_ENDPOINT", "http://172.16.20.90:6333")
+
+
+def get_qdrant_client(qdrant_url: Optional[str] = None) -> QdrantClient:
+    """
+    Obtient le client Qdrant de l'emplacement configuré (partagé dans le processus)
+    
+    - QDRANT_PATH=<répertoire>: mode embarqué persistant, sans serveur
+    - QDRANT_ENDPOINT=:memory: mode embarqué en mémoire (tests, CI)
+    - sinon: serveur distant QDRANT_ENDPOINT
+    
+    Args:
+        qdrant_url: URL explicite (prioritaire sur la configuration)
+        
+    Returns:
+        Client Qdrant
+    """
+    location = qdrant_location(qdrant_url)
+    client = _clients.get(location)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(location)
+            if client is None:
+                if location == ":memory:":
+                    client = QdrantClient(location=":memory:")
+                elif location.startswith("path:"):
+                    os.makedirs(location[5:], exist_ok=True)
+                    client = QdrantClient(path=location[5:])
+                else:
+                    client = QdrantClient(url=location)
+                _clients[location] = client
+    return client
+
+
+# Boucle asyncio des accès mémoire (thread démon) et clients asynchrones par emplacement
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_clients: Dict[str, AsyncQdrantClient] = {}
+
+
+def get_memory_loop() -> asyncio.AbstractEventLoop:
+    """Boucle asyncio partagée des accès mémoire (démarrée au premier appel)"""
+    global _loop
+    if _loop is None:
+        with _clients_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="memory-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def get_async_qdrant_client(qdrant_url: Optional[str] = None) -> Optional[AsyncQdrantClient]:
+    """
+    Obtient le client Qdrant asynchrone d'un serveur distant (partagé dans le processus)
+    
+    Args:
+        qdrant_url: URL explicite (prioritaire sur la configuration)
+        
+    Returns:
+        Client asynchrone, ou None en mode embarqué (données propres au client synchrone)
+    """
+    location = qdrant_location(qdrant_url)
+    if location == ":memory:" or location.startswith("path:"):
+        return None
+    client = _async_clients.get(location)
+    if client is None:
+        with _clients_lock:
+            client = _async_clients.get(location)
+            if client is None:
+                # Pas de vérification de version: elle ferait une requête bloquante ici
+                client = AsyncQdrantClient(url=location, check_compatibility=False)
+                _async_clients[location] = client
+    return client
+
+
+@atexit.register
+def _close_clients():
+    """Ferme les clients (libère le verrou du mode embarqué avant l'arrêt de l'interpréteur)"""
+    for client in _clients.values():
+        try:
+            client.close()
+        except Exception:
+            pass
+    _clients.clear()
+    if _loop is not None:
+        for client in _async_clients.values():
+            try:
+                asyncio.run_coroutine_threadsafe(client.close(), _loop).result(timeout=1.0)
+            except Exception:
+                pass
+    _async_clients.clear()
+
+
+# Espace de noms des IDs de points dérivés du contenu (uuid5)
+MEMORY_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://github.com/hmzoo/ds-cli/memory")
+
+
+def content_id(point_type: str, text: str, namespace: str = "") -> str:
+    """
+    ID de point déterministe: uuid5 de l'espace de noms, du type et du contenu normalisé
+    
+    Réécrire le même contenu produit le même ID (upsert idempotent, pas de doublon exact).
+    Normalisation: espaces regroupés; la casse est conservée (deux faits qui ne diffèrent
+    que par la casse restent distincts, chacun avec sa catégorie).
+    
+    Args:
+        point_type: Type du point (fact, decision, conversation)
+        text: Contenu embeddé
+        namespace: Espace de noms du point (projet ou global)
+        
+    Returns:
+        UUID sous forme de chaîne
+    """
+    normalized = " ".join(text.split())
+    return str(uuid.uuid5(MEMORY_ID_NAMESPACE, f"{namespace}\0{point_type}\0{normalized}"))
+
+
+def point_text(payload: Dict) -> str:
+    """
+    Texte embeddé d'un point selon son type (fait, décision, résumé de conversation)
+    
+    Args:
+        payload: Payload du point
+        
+    Returns:
+        Texte dont le vecteur du point est l'embedding
+    """
+    point_type = payload.get("type")
+    if point_type == "decision":
+        return f"{payload.get('decision', '')} {payload.get('reasoning', '')}"
+    if point_type == "conversation":
+        return payload.get("summary", "")
+    return payload.get("fact", "")
+
+
+# Niveau partagé par tous les projets (préférences, conventions générales)
+GLOBAL_NAMESPACE = "global"
+
+
+def _project_root(directory: str) -> str:
+    """Racine git contenant le répertoire (ou le répertoire lui-même hors dépôt git)"""
+    current = directory
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return directory
+        current = parent
+
+
+def _project_namespace(directory: str) -> str:
+    """
+    Espace de noms d'un projet: nom de sa racine + hash court du chemin complet
+    
+    Deux dépôts homonymes (api, backend) restent distincts, et aucun projet ne
+    peut prendre le nom réservé GLOBAL_NAMESPACE. Pas de cache: un `git init`
+    en cours de session est pris en compte au message suivant.
+    """
+    root = os.path.realpath(_project_root(directory))
+    digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.basename(root) or 'root'}-{digest}"
+
+
+def current_namespace(cwd: Optional[str] = None) -> str:
+    """
+    Espace de noms mémoire du projet courant
+    
+    DS_MEMORY_NAMESPACE est prioritaire (sauf GLOBAL_NAMESPACE, réservé au niveau
+    partagé); sinon nom et hash du chemin de la racine git du répertoire de travail
+    (ou du répertoire lui-même hors dépôt git).
+    
+    Args:
+        cwd: Répertoire de travail (défaut: répertoire de la session, voir working_dir)
+        
+    Returns:
+        Nom de l'espace de noms
+    """
+    override = os.getenv("DS_MEMORY_NAMESPACE")
+    if override and override != GLOBAL_NAMESPACE:
+        return override
+    return _project_namespace(os.path.abspath(os.path.expanduser(cwd or working_directory())))
+
+
+def ensure_collection(client: QdrantClient, collection_name: str, dimension: int) -> bool:
+    """
+    Crée la collection si elle n'existe pas (distance cosinus)
+    
+    Args:
+        client: Client Qdrant
+        collection_name: Nom de la collection
+        dimension: Taille des vecteurs
+        
+    Returns:
+        True si la collection a été créée
+    """
+    if client.collection_exists(collection_name):
+        vectors = client.get_collection(collection_name).config.params.vectors
+        size = getattr(vectors, 'size', None)
+        if size is not None and size != dimension:
+            raise RuntimeError(
+                f"Collection {collection_name}: vecteurs de dimension {size}, le modèle en produit {dimension}"
+            )
+        create_payload_indexes(client, collection_name)  # Champs indexés ajoutés depuis (namespace...)
+        return False
+    
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE)
+    )
+    create_payload_indexes(client, collection_name)
+    print(f"✅ Collection {collection_name} créée ({dimension} dimensions)")
+    return True
+
+
+# ============================================
+# Backends d'embeddings
+# ============================================
+
+class EmbeddingBackend(ABC):
+    """
+    Interface d'un backend d'embeddings (encode et dimension à implémenter)
+    
+    `vector_space` identifie l'espace vectoriel: deux backends de même
+    `vector_space` produisent des vecteurs comparables (même modèle).
+    Chaque point stocké est marqué avec l'espace et le backend qui l'ont produit.
+    """
+    
+    name = "base"
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+    
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Dimension des vecteurs produits"""
+    
+    @property
+    def vector_space(self) -> str:
+        return f"{self.model_name}-{self.dimension}"
+    
+    @property
+    def cache_key(self) -> str:
+        """Clé du cache d'embeddings (vecteurs int8 et float32 non interchangeables bit à bit)"""
+        return f"{self.name}:{self.model_name}"
+    
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
         """
-        Initialise le système de mémoire Qdrant
+        Encode une liste de textes
         
         Args:
-            qdrant_url: URL du serveur Qdrant
-            collection_name: Nom de la collection
-            model_name: Modèle sentence-transformers à utiliser
+            texts: Textes à encoder
+            batch_size: Taille des lots
+            
+        Returns:
+            Matrice (len(texts), dimension) de vecteurs normalisés
         """
-        self.qdrant_url = qdrant_url or os.getenv("QDRANT_ENDPOINT", "http://172.16.20.90:6333")
-        self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "deepseek_collection")
-        
-        # Client Qdrant
-        self.client = QdrantClient(url=self.qdrant_url)
-        
-        # Modèle d'embeddings sémantiques
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Modèle sentence-transformers sur torch (CPU ou GPU)"""
+    
+    name = "sentence-transformers"
+    
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+        super().__init__(model_name)
         print(f"🔄 Chargement du modèle {model_name}...")
         # Détecter le device disponible (CUDA si disponible, sinon CPU)
         # Utiliser une approche robuste pour éviter les blocages CUDA dans WSL
@@ -49,19 +336,419 @@ class QdrantMemory:
                     print(f"🚀 GPU: {torch.cuda.get_device_name(0)}")
             else:
                 # En WSL, utiliser CPU par défaut pour éviter les problèmes d'initialisation CUDA
-                print(f"💡 Astuce: Définir CUDA_VISIBLE_DEVICES=0 pour utiliser le GPU")
+                print(f"💡 Astuce: Définir CUDA_VISIBLE_DEVICES=0 pour utiliser le GPU (ou DS_EMBEDDING_BACKEND=onnx sur CPU)")
         except Exception as e:
             print(f"⚠️  CUDA non disponible: {e}")
         
         print(f"🎯 Device: {device}")
+        # Import tardif: sentence_transformers tire torch (plusieurs secondes)
+        from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer(model_name, device=device)
-        print(f"✅ Modèle chargé ({self.model.get_sentence_embedding_dimension()} dimensions)")
+        self._dimension = self.model.get_sentence_embedding_dimension()
+        print(f"✅ Modèle chargé ({self._dimension} dimensions)")
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=len(texts) > 1000
+        )
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    Export ONNX quantifié int8 du même modèle, exécuté par ONNX Runtime sur CPU
+    
+    Ni torch ni sentence-transformers: tokenizer Rust (`tokenizers`) + mean pooling
+    et normalisation en NumPy, comme le pipeline sentence-transformers du modèle.
+    Vecteurs dans le même espace que SentenceTransformerBackend (à l'erreur de
+    quantification près).
+    """
+    
+    name = "onnx"
+    MAX_SEQ_LENGTH = 256
+    
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', file_name: Optional[str] = None):
+        super().__init__(model_name)
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+            from huggingface_hub import hf_hub_download
+        except ImportError as e:
+            raise RuntimeError(f"Backend ONNX indisponible ({e}): pip install onnxruntime tokenizers huggingface_hub")
+        
+        repo_id = model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+        self.file_name = file_name or os.getenv('DS_ONNX_MODEL_FILE', 'onnx/model_quint8_avx2.onnx')
+        print(f"🔄 Chargement du modèle ONNX {repo_id}/{self.file_name}...")
+        
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(repo_id, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            hf_hub_download(repo_id, self.file_name),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = self.encode(["dimension"]).shape[1]
+        print(f"✅ Modèle ONNX chargé ({self._dimension} dimensions)")
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.model_name}:{self.file_name}"
+    
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            token_embeddings = self.session.run(None, feeds)[0]
+            
+            # Mean pooling sur les tokens réels, puis normalisation L2
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        return np.vstack(batches).astype(np.float32)
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    Vectoriseur par hachage (mots + bigrammes), sans modèle ni dépendance
+    
+    Instantané et déterministe: destiné aux tests et aux machines sans modèle.
+    Similarité lexicale seulement, espace vectoriel propre.
+    """
+    
+    name = "hashing"
+    
+    def __init__(self, dimension: int = 256):
+        super().__init__("hashing-v1")
+        self._dimension = dimension
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                vectors[row, value % self._dimension] += 1.0 if (value >> 63) else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class ServiceBackend(EmbeddingBackend):
+    """
+    Modèle chargé dans le service d'embeddings partagé (tools/embedding_service.py)
+    
+    L'encodage a lieu dans un autre processus: la boucle de l'agent ne garde pas le
+    GIL pendant la tokenisation et la passe avant, et les agents d'une même machine
+    partagent un seul modèle. Espace vectoriel et clé de cache du backend servi.
+    """
+    
+    name = "service"
+    
+    def __init__(self, socket_path: Optional[str] = None):
+        from .embedding_service import EmbeddingServiceClient
+        self.client = EmbeddingServiceClient(socket_path)
+        info = self.client.info()
+        super().__init__(info['model_name'])
+        self._dimension = info['dimension']
+        self._cache_key = info['cache_key']
+        self.served_backend = info['name']
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    @property
+    def cache_key(self) -> str:
+        return self._cache_key
+    
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        return self.client.encode(texts, batch_size=batch_size)
+
+
+# Espace des points écrits avant l'introduction des backends (sentence-transformers, sans marque)
+LEGACY_VECTOR_SPACE = "all-MiniLM-L6-v2-384"
+
+EMBEDDING_BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    OnnxBackend.name: OnnxBackend,
+    HashingBackend.name: HashingBackend,
+    ServiceBackend.name: ServiceBackend,
+}
+
+
+def get_embedding_backend(name: Optional[str] = None, model_name: Optional[str] = None) -> EmbeddingBackend:
+    """
+    Crée le backend d'embeddings configuré (DS_EMBEDDING_BACKEND)
+    
+    Args:
+        name: sentence-transformers (défaut), onnx, hashing ou service
+        model_name: Modèle à charger (défaut: DS_EMBEDDING_MODEL, ignoré par hashing et service)
+        
+    Returns:
+        Backend d'embeddings
+    """
+    name = (name or os.getenv('DS_EMBEDDING_BACKEND') or SentenceTransformerBackend.name).lower()
+    backend_class = EMBEDDING_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Backend d'embeddings inconnu: {name} (choix: {', '.join(EMBEDDING_BACKENDS)})")
+    if backend_class is HashingBackend:
+        return HashingBackend(int(os.getenv('DS_HASHING_DIMENSION', '256')))
+    if backend_class is ServiceBackend:
+        return ServiceBackend()  # Modèle choisi par le service (DS_EMBEDDING_SERVICE_BACKEND)
+    return backend_class(model_name or os.getenv('DS_EMBEDDING_MODEL', 'all-MiniLM-L6-v2'))
+
+
+class QdrantMemory:
+    """Système de mémoire vectorielle basé sur Qdrant avec embeddings sémantiques"""
+    
+    # Taille des lots pour l'encodage et des paquets de points envoyés à Qdrant
+    EMBEDDING_BATCH_SIZE = 64
+    UPSERT_CHUNK_SIZE = 256
+    
+    # Recherche hybride: candidats par classement (dense, BM25) et constante RRF
+    HYBRID_CANDIDATES = 20
+    RRF_K = 60
+    
+    # Échéances par opération (secondes), surchargeables par DS_MEMORY_DEADLINE_<OPÉRATION>_S
+    DEADLINES = {"search": 1.0, "read": 2.0, "write": 5.0}
+    
+    # Écriture différée: attente max pour grouper les points d'une rafale
+    WRITE_BEHIND_DELAY = 0.2
+    # Faits candidats reclassés avant injection dans le contexte
+    RECALL_CANDIDATES = 10
+    
+    def __init__(self, 
+                 qdrant_url: Optional[str] = None,
+                 collection_name: Optional[str] = None,
+                 model_name: Optional[str] = None,
+                 backend: Optional[EmbeddingBackend] = None):
+        """
+        Initialise le système de mémoire Qdrant
         
-        # Vérifier que la collection existe
+        Args:
+            qdrant_url: URL du serveur Qdrant
+            collection_name: Nom de la collection
+            model_name: Modèle d'embeddings à utiliser (défaut: DS_EMBEDDING_MODEL)
+            backend: Backend d'embeddings (défaut: DS_EMBEDDING_BACKEND)
+        """
+        self.qdrant_url = qdrant_location(qdrant_url)
+        self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "deepseek_collection")
+        
+        # Client Qdrant (serveur distant ou mode embarqué)
+        self.client = get_qdrant_client(qdrant_url)
+        
+        # Client asynchrone pour la boucle de l'agent (None en mode embarqué: exécuteur)
+        self.async_client = get_async_qdrant_client(qdrant_url)
+        self.deadline_stats: Counter = Counter()
+        
+        # Backend d'embeddings (sentence-transformers, ONNX int8 ou hachage)
+        self.backend = backend or get_embedding_backend(model_name=model_name)
+        self.model_name = self.backend.model_name
+        
+        # Cache d'embeddings (LRU mémoire + fichier mappé sur disque)
+        self.embedding_cache = EmbeddingCache(self.backend.cache_key, self.backend.dimension)
+        
+        # Créer la collection au premier lancement (taille des vecteurs donnée par le modèle)
         try:
-            self.client.get_collection(self.collection_name)
+            ensure_collection(self.client, self.collection_name, self.backend.dimension)
+        except RuntimeError:
+            raise
         except Exception as e:
-            raise RuntimeError(f"Collection {self.collection_name} n'existe pas: {e}")
+            raise RuntimeError(f"Qdrant inaccessible ({self.qdrant_url}): {e}")
+        self._check_vector_space()
+        
+        # Statistiques en cache: (instant, stats), invalidé par les écritures
+        self._stats_cache = None
+        
+        # Résultats des recherches de faits, invalidés par toute écriture (voir _invalidate_caches)
+        # et expirés après DS_MEMORY_SEARCH_CACHE_TTL (écritures des autres processus)
+        self.search_cache = SearchResultCache(int(os.getenv("DS_MEMORY_SEARCH_CACHE", "256")),
+                                              float(os.getenv("DS_MEMORY_SEARCH_CACHE_TTL", "30")))
+        
+        # Écritures différées (store_*(defer=True)), insérées par lots en arrière-plan
+        self.write_queue: Optional[WriteBehindQueue] = None
+        if os.getenv("DS_MEMORY_WRITE_BEHIND", "true").lower() == "true":
+            self.write_queue = WriteBehindQueue(self._upsert_points, max_batch=self.UPSERT_CHUNK_SIZE,
+                                                max_delay=self.WRITE_BEHIND_DELAY,
+                                                on_error=self._discard_unwritten)
+        
+        # Utilisations des faits rappelés, écrites par lots (voir flush_usage)
+        self._usage_pending: Counter = Counter()
+        self._usage_lock = threading.Lock()
+        
+        # Rescoring si la collection est quantifiée (voir /optimize)
+        self.search_params = collection_search_params(self.client, self.collection_name)
+        
+        # Index local optionnel (recherche sans aller-retour réseau)
+        self.local_index: Optional[LocalVectorIndex] = None
+        if os.getenv("QDRANT_LOCAL_INDEX", "false").lower() == "true":
+            self.refresh_local_index()
+        
+        # Niveau local SQLite/FTS5: lectures exactes, par mot-clé, par catégorie et dernière conversation
+        self.local_store: Optional[LocalStore] = None
+        self.refresh_local_store()
+        
+        # Index lexical BM25 des faits (recherche hybride, voir search_facts),
+        # chargé à la première recherche qui l'utilise plutôt qu'au démarrage
+        self.hybrid_search = os.getenv("DS_HYBRID_SEARCH", "true").lower() == "true"
+        self.lexical_index = LexicalIndex()
+    
+    def _check_vector_space(self):
+        """Signale une collection remplie par un backend d'un autre espace vectoriel"""
+        try:
+            points, _ = self.client.scroll(self.collection_name, limit=1, with_payload=["vector_space"])
+        except Exception:
+            return
+        stored_space = (points[0].payload or {}).get("vector_space", LEGACY_VECTOR_SPACE) if points else None
+        if stored_space and stored_space != self.backend.vector_space:
+            print(f"⚠️  La collection {self.collection_name} contient des vecteurs '{stored_space}', "
+                  f"le backend {self.backend.name} produit '{self.backend.vector_space}': "
+                  f"utilisez une autre collection (QDRANT_COLLECTION_NAME)")
+
+    def set_backend(self, backend: EmbeddingBackend):
+        """
+        Change de backend d'embeddings (collection migrée vers son espace, voir memory_migration)
+
+        Args:
+            backend: Nouveau backend
+        """
+        self.flush_writes()
+        self.backend = backend
+        self.model_name = backend.model_name
+        self.embedding_cache = EmbeddingCache(backend.cache_key, backend.dimension)
+        self.search_params = collection_search_params(self.client, self.collection_name)
+        if self.local_index is not None:
+            self.refresh_local_index()
+        if self.local_store is not None:
+            self.refresh_local_store(rebuild=True)  # Provenance (vector_space) des payloads
+        self._invalidate_caches()
+
+    def refresh_local_index(self) -> bool:
+        """
+        (Re)charge l'index local depuis la collection Qdrant
+        
+        Returns:
+            True si les recherches seront servies localement
+        """
+        max_points = int(os.getenv("QDRANT_LOCAL_INDEX_MAX_POINTS", "50000"))
+        index = self.local_index or LocalVectorIndex(max_points=max_points)
+        try:
+            if index.load(self.client, self.collection_name):
+                print(f"⚡ Index local: {len(index)} points chargés en {index.stats['load_time_s']*1000:.0f} ms")
+            else:
+                print(f"💡 Collection > {max_points} points: recherches servies par Qdrant")
+        except Exception as e:
+            print(f"⚠️  Index local indisponible: {e}")
+            index.ready = False
+        self.local_index = index
+        return index.ready
+    
+    def refresh_local_store(self, rebuild: bool = False) -> bool:
+        """
+        Ouvre le niveau local SQLite et le resynchronise avec la collection
+        
+        Reconstruit si le nombre de points diffère (écritures hors de QdrantMemory,
+        autre machine, restauration). DS_MEMORY_LOCAL_STORE_DIR vide: niveau désactivé.
+        
+        Args:
+            rebuild: Reconstruire même si les comptes concordent
+            
+        Returns:
+            True si les lectures seront servies localement
+        """
+        path = local_store_path(self.qdrant_url, self.collection_name)
+        if path is None:
+            self.local_store = None
+            return False
+        try:
+            if self.local_store is None:
+                self.local_store = LocalStore(path)
+            if rebuild or len(self.local_store) != self._count():
+                start = time.perf_counter()
+                self.local_store.rebuild(
+                    (str(point.id), point_text(point.payload or {}), point.payload or {})
+                    for point in self.iter_points()
+                )
+                if len(self.local_store):
+                    print(f"🗄️  Niveau local: {len(self.local_store)} points synchronisés "
+                          f"en {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"⚠️  Niveau local indisponible: {e}")
+            self.local_store = None
+        return self.local_store is not None
+    
+    def refresh_lexical_index(self) -> bool:
+        """
+        (Re)construit l'index lexical depuis les faits de la collection
+        
+        Returns:
+            True si l'index est utilisable
+        """
+        try:
+            points = self.local_store.iter_points("fact") if self.local_store is not None else self.iter_points("fact")
+            self.lexical_index.load(points)
+        except Exception as e:
+            print(f"⚠️  Index lexical indisponible: {e}")
+            self.lexical_index.invalidate()
+        return self.lexical_index.ready
+    
+    def _namespaces(self, namespace: Optional[str] = None) -> List[str]:
+        """Espaces de noms visibles: le projet et le niveau global"""
+        namespace = namespace or current_namespace()
+        return [namespace] if namespace == GLOBAL_NAMESPACE else [namespace, GLOBAL_NAMESPACE]
+    
+    def _scope_filter(self, point_type: str, namespace: Optional[str] = None, *conditions) -> Filter:
+        """
+        Filtre Qdrant d'un type de point dans les espaces de noms visibles
+        
+        Les points antérieurs aux espaces de noms (sans champ namespace) restent visibles partout.
+        """
+        return Filter(must=[
+            FieldCondition(key="type", match=MatchValue(value=point_type)),
+            *conditions,
+            Filter(should=[
+                FieldCondition(key="namespace", match=MatchAny(any=self._namespaces(namespace))),
+                IsEmptyCondition(is_empty=PayloadField(key="namespace"))
+            ])
+        ])
+    
+    def _scope_filters(self, point_type: str, namespace: Optional[str] = None) -> Dict:
+        """Équivalent de _scope_filter pour les index locaux"""
+        return {"type": point_type, "namespace": (*self._namespaces(namespace), None)}
+    
+    def _local_search(self, vectors: List[List[float]], limit: int, filters: Dict,
+                      score_threshold: Optional[float] = None) -> Optional[List]:
+        """Recherche dans l'index local, ou None s'il ne peut pas répondre"""
+        if self.local_index is None or not self.local_index.ready:
+            return None
+        return self.local_index.search_many(vectors, limit, filters, score_threshold)
     
     def _generate_embedding(self, text: str) -> List[float]:
         """
@@ -73,11 +760,140 @@ class QdrantMemory:
         Returns:
             Vecteur d'embedding (384 dimensions avec all-MiniLM-L6-v2)
         """
-        # Utiliser sentence-transformers pour un vrai embedding sémantique
-        embedding = self.model.encode(text, convert_to_tensor=False)
-        return embedding.tolist()
+        return self._generate_embeddings([text])[0]
     
-    def store_fact(self, fact: str, category: str = "general", metadata: Optional[Dict] = None) -> Dict:
+    def _generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Génère les embeddings d'une liste de textes en lots
+        
+        Args:
+            texts: Textes à embedder
+            batch_size: Taille des lots passés au modèle
+            
+        Returns:
+            Vecteurs dans l'ordre des textes
+        """
+        vectors: List[Optional[List[float]]] = [self.embedding_cache.get(text) for text in texts]
+        
+        # Seuls les textes absents du cache (et distincts) passent par le modèle
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            encoded = self.backend.encode(missing, batch_size=batch_size or self.EMBEDDING_BATCH_SIZE)
+            computed = {}
+            for text, embedding in zip(missing, encoded):
+                computed[text] = embedding.tolist()
+                self.embedding_cache.put(text, computed[text])
+            vectors = [vector if vector is not None else computed[text]
+                       for text, vector in zip(texts, vectors)]
+        
+        return vectors
+    
+    def _upsert_points(self, points: List[PointStruct], chunk_size: Optional[int] = None):
+        """
+        Insère des points dans Qdrant par paquets
+        
+        Args:
+            points: Points à insérer
+            chunk_size: Nombre de points par requête
+        """
+        chunk_size = chunk_size or self.UPSERT_CHUNK_SIZE
+        for start in range(0, len(points), chunk_size):
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=points[start:start + chunk_size],
+                # Seul le dernier paquet attend l'indexation: les précédents sont pipelinés
+                wait=start + chunk_size >= len(points)
+            )
+    
+    def flush_writes(self, timeout: Optional[float] = None) -> bool:
+        """
+        Insère immédiatement les écritures différées en attente
+        
+        Args:
+            timeout: Attente max en secondes (None = sans limite)
+            
+        Returns:
+            True si toutes les écritures sont dans Qdrant
+        """
+        if self.write_queue is None:
+            return True
+        return self.write_queue.flush(timeout)
+    
+    def _invalidate_caches(self):
+        """Écriture dans la collection: statistiques et résultats de recherche périmés"""
+        self._stats_cache = None
+        self.search_cache.invalidate()
+    
+    def _store_batch(self, payloads: List[Dict], texts: List[str], batch_size: Optional[int] = None,
+                     defer: bool = False, namespace: Optional[str] = None) -> List[str]:
+        """
+        Embedde et insère une liste de payloads
+        
+        Args:
+            payloads: Payloads des points
+            texts: Texte à embedder pour chaque payload
+            batch_size: Taille des lots d'encodage
+            defer: Passer par la file d'écriture différée (index locaux à jour immédiatement)
+            namespace: Espace de noms des points (défaut: projet courant)
+            
+        Returns:
+            IDs des points (dérivés du contenu, voir content_id)
+        """
+        vectors = self._generate_embeddings(texts, batch_size)
+        namespace = namespace or current_namespace()
+        for payload in payloads:
+            payload.setdefault("namespace", namespace)
+        point_ids = [content_id(payload["type"], text, payload["namespace"]) for payload, text in zip(payloads, texts)]
+        for payload in payloads:
+            # Marque de provenance: espace vectoriel et backend ayant produit le vecteur
+            payload["vector_space"] = self.backend.vector_space
+            payload["embedding_backend"] = self.backend.name
+        points = [
+            PointStruct(id=point_id, vector=vector, payload=payload)
+            for point_id, vector, payload in zip(point_ids, vectors, payloads)
+        ]
+        deferred = defer and self.write_queue is not None
+        if not deferred:
+            self._upsert_points(points)
+        if self.local_index is not None:
+            self.local_index.add(point_ids, vectors, payloads)
+        if self.local_store is not None:
+            self.local_store.upsert(point_ids, texts, payloads)
+        # Ajout même avant le premier chargement: un chargement en cours (sous le verrou
+        # de l'index) ne peut pas perdre un fait écrit pendant sa lecture du niveau local
+        facts = [(point_id, payload) for point_id, payload in zip(point_ids, payloads)
+                 if payload.get("type") == "fact"]
+        if facts:
+            self.lexical_index.add([point_id for point_id, _ in facts],
+                                   [payload["fact"] for _, payload in facts],
+                                   [payload for _, payload in facts])
+        if deferred:
+            # Mis en file après les index: un échec du lot les retire (voir _discard_unwritten)
+            self.write_queue.put(points)
+        self._invalidate_caches()
+        return point_ids
+    
+    def _discard_unwritten(self, points: List[PointStruct], error: Exception):
+        """
+        Lot d'écriture différée refusé par Qdrant: retire ses points des index locaux
+        
+        Un point qui existait déjà dans Qdrant (réécriture) est aussi retiré; le niveau
+        local, dont le compte diverge alors, est reconstruit au prochain démarrage.
+        
+        Args:
+            points: Points du lot échoué
+            error: Erreur de l'écriture
+        """
+        point_ids = [str(point.id) for point in points]
+        if self.local_index is not None:
+            self.local_index.remove(point_ids)
+        if self.local_store is not None:
+            self.local_store.delete(point_ids)
+        self.lexical_index.remove(point_ids)
+        self._invalidate_caches()
+    
+    def store_fact(self, fact: str, category: str = "general", metadata: Optional[Dict] = None,
+                   defer: bool = False, namespace: Optional[str] = None) -> Dict:
         """
         Stocke un fait en mémoire
         
@@ -85,78 +901,96 @@ class QdrantMemory:
             fact: Le fait à stocker
             category: Catégorie du fait
             metadata: Métadonnées supplémentaires
+            defer: Écriture différée (insérée par lots en arrière-plan)
+            namespace: Espace de noms (défaut: projet courant, GLOBAL_NAMESPACE = tous les projets)
             
         Returns:
             Le fait stocké avec son ID et timestamp
         """
-        point_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
-        
-        # Générer l'embedding
-        vector = self._generate_embedding(fact)
+        return self.store_facts([{"fact": fact, "category": category, "metadata": metadata}],
+                                defer=defer, namespace=namespace)[0]
+    
+    def store_facts(self, facts: List[Union[str, Dict]], category: str = "general",
+                    batch_size: Optional[int] = None, defer: bool = False,
+                    namespace: Optional[str] = None) -> List[Dict]:
+        """
+        Stocke plusieurs faits (encodage par lots, insertion par paquets)
         
-        # Préparer le payload
-        payload = {
-            "type": "fact",
-            "fact": fact,
-            "category": category,
-            "timestamp": timestamp,
-            "metadata": metadata or {}
-        }
+        Args:
+            facts: Faits (texte, ou dict avec fact/category/metadata)
+            category: Catégorie par défaut
+            batch_size: Taille des lots d'encodage
+            defer: Écriture différée (insérée par lots en arrière-plan)
+            namespace: Espace de noms (défaut: projet courant)
+            
+        Returns:
+            Les faits stockés avec leur ID et timestamp
+        """
+        timestamp = datetime.now().isoformat()
+        payloads = []
+        for item in facts:
+            if isinstance(item, str):
+                item = {"fact": item}
+            payloads.append({
+                "type": "fact",
+                "fact": item["fact"],
+                "category": item.get("category") or category,
+                "timestamp": timestamp,
+                "metadata": item.get("metadata") or {}
+            })
         
-        # Insérer dans Qdrant
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[PointStruct(
-                id=point_id,
-                vector=vector,
-                payload=payload
-            )]
-        )
+        point_ids = self._store_batch(payloads, [point_text(p) for p in payloads], batch_size, defer, namespace)
         
-        return {
-            "id": point_id,
-            "fact": fact,
-            "category": category,
-            "timestamp": timestamp,
-            "metadata": metadata or {}
-        }
+        return [
+            {
+                "id": point_id,
+                "fact": payload["fact"],
+                "category": payload["category"],
+                "timestamp": timestamp,
+                "metadata": payload["metadata"]
+            }
+            for point_id, payload in zip(point_ids, payloads)
+        ]
     
-    def get_facts(self, category: Optional[str] = None, limit: Optional[int] = 10) -> List[Dict]:
+    def get_facts(self, category: Optional[str] = None, limit: Optional[int] = 10,
+                  namespace: Optional[str] = None) -> List[Dict]:
         """
         Récupère les faits stockés
         
         Args:
             category: Filtrer par catégorie
             limit: Limiter le nombre de résultats
+            namespace: Espace de noms du projet (défaut: projet courant, + niveau global)
             
         Returns:
             Liste des faits
         """
         # Construire le filtre
-        filter_conditions = [
-            FieldCondition(key="type", match=MatchValue(value="fact"))
-        ]
-        
+        filter_conditions = []
         if category:
             filter_conditions.append(
                 FieldCondition(key="category", match=MatchValue(value=category))
             )
         
-        # Rechercher avec scroll (pas besoin de vecteur de requête)
-        results = self.client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=Filter(must=filter_conditions),
-            limit=limit or 100,
-            with_payload=True,
-            with_vectors=False
-        )
+        if self.local_store is not None:
+            # Niveau local: ni requête réseau ni écriture différée à attendre (plus récents d'abord)
+            points = self.local_store.scroll("fact", self._namespaces(namespace), limit or 100, category)
+        else:
+            # Rechercher avec scroll (pas besoin de vecteur de requête)
+            self.flush_writes()
+            results = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._scope_filter("fact", namespace, *filter_conditions),
+                limit=limit or 100,
+                with_payload=True,
+                with_vectors=False
+            )
+            points = [(str(point.id), point.payload) for point in results[0]]
         
         facts = []
-        for point in results[0]:  # results est un tuple (points, next_page_offset)
-            payload = point.payload
+        for point_id, payload in points:
             facts.append({
-                "id": str(point.id),
+                "id": point_id,
                 "fact": payload.get("fact", ""),
                 "category": payload.get("category", ""),
                 "timestamp": payload.get("timestamp", ""),
@@ -165,7 +999,8 @@ class QdrantMemory:
         
         return facts
     
-    def store_decision(self, decision: str, reasoning: str, context: Optional[str] = None) -> Dict:
+    def store_decision(self, decision: str, reasoning: str, context: Optional[str] = None,
+                       defer: bool = False, namespace: Optional[str] = None) -> Dict:
         """
         Stocke une décision importante
         
@@ -173,69 +1008,83 @@ class QdrantMemory:
             decision: La décision prise
             reasoning: Raisonnement derrière la décision
             context: Contexte de la décision
+            defer: Écriture différée (insérée par lots en arrière-plan)
+            namespace: Espace de noms (défaut: projet courant)
             
         Returns:
             La décision stockée
         """
-        point_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
+        return self.store_decisions([{"decision": decision, "reasoning": reasoning, "context": context}],
+                                    defer=defer, namespace=namespace)[0]
+    
+    def store_decisions(self, decisions: List[Dict], batch_size: Optional[int] = None,
+                        defer: bool = False, namespace: Optional[str] = None) -> List[Dict]:
+        """
+        Stocke plusieurs décisions (encodage par lots, insertion par paquets)
         
-        # Générer l'embedding basé sur la décision + raisonnement
-        text_for_embedding = f"{decision} {reasoning}"
-        vector = self._generate_embedding(text_for_embedding)
-        
-        # Préparer le payload
-        payload = {
-            "type": "decision",
-            "decision": decision,
-            "reasoning": reasoning,
-            "context": context,
-            "timestamp": timestamp
-        }
+        Args:
+            decisions: Dicts avec decision/reasoning/context
+            batch_size: Taille des lots d'encodage
+            defer: Écriture différée (insérée par lots en arrière-plan)
+            namespace: Espace de noms (défaut: projet courant)
+            
+        Returns:
+            Les décisions stockées
+        """
+        timestamp = datetime.now().isoformat()
+        payloads = [
+            {
+                "type": "decision",
+                "decision": item["decision"],
+                "reasoning": item.get("reasoning", ""),
+                "context": item.get("context"),
+                "timestamp": timestamp
+            }
+            for item in decisions
+        ]
         
-        # Insérer dans Qdrant
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[PointStruct(
-                id=point_id,
-                vector=vector,
-                payload=payload
-            )]
-        )
+        # Embedding basé sur la décision + raisonnement
+        point_ids = self._store_batch(payloads, [point_text(p) for p in payloads], batch_size, defer, namespace)
         
-        return {
-            "id": point_id,
-            "decision": decision,
-            "reasoning": reasoning,
-            "context": context,
-            "timestamp": timestamp
-        }
+        return [
+            {
+                "id": point_id,
+                "decision": payload["decision"],
+                "reasoning": payload["reasoning"],
+                "context": payload["context"],
+                "timestamp": timestamp
+            }
+            for point_id, payload in zip(point_ids, payloads)
+        ]
     
-    def get_decisions(self, limit: Optional[int] = 10) -> List[Dict]:
+    def get_decisions(self, limit: Optional[int] = 10, namespace: Optional[str] = None) -> List[Dict]:
         """
         Récupère les décisions stockées
         
         Args:
             limit: Limiter le nombre de résultats
+            namespace: Espace de noms du projet (défaut: projet courant, + niveau global)
             
         Returns:
             Liste des décisions
         """
-        results = self.client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=Filter(must=[
-                FieldCondition(key="type", match=MatchValue(value="decision"))
-            ]),
-            limit=limit or 100,
-            with_payload=True,
-            with_vectors=False
-        )
+        if self.local_store is not None:
+            points = self.local_store.scroll("decision", self._namespaces(namespace), limit or 100)
+        else:
+            self.flush_writes()
+            results = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._scope_filter("decision", namespace),
+                limit=limit or 100,
+                with_payload=True,
+                with_vectors=False
+            )
+            points = [(str(point.id), point.payload) for point in results[0]]
         
         decisions = []
-        for point in results[0]:
-            payload = point.payload
+        for point_id, payload in points:
             decisions.append({
-                "id": str(point.id),
+                "id": point_id,
                 "decision": payload.get("decision", ""),
                 "reasoning": payload.get("reasoning", ""),
                 "context": payload.get("context"),
@@ -244,7 +1093,8 @@ class QdrantMemory:
         
         return decisions
     
-    def store_conversation_summary(self, summary: str, topics: List[str], outcomes: List[str]) -> Dict:
+    def store_conversation_summary(self, summary: str, topics: List[str], outcomes: List[str],
+                                   namespace: Optional[str] = None) -> Dict:
         """
         Stocke un résumé de conversation
         
@@ -252,153 +1102,665 @@ class QdrantMemory:
             summary: Résumé de la conversation
             topics: Sujets abordés
             outcomes: Résultats/actions
+            namespace: Espace de noms (défaut: projet courant)
             
         Returns:
             Le résumé stocké
         """
-        point_id = str(uuid.uuid4())
+        return self.store_conversation_summaries([{"summary": summary, "topics": topics, "outcomes": outcomes}],
+                                                 namespace=namespace)[0]
+    
+    def store_conversation_summaries(self, summaries: List[Dict], batch_size: Optional[int] = None,
+                                     namespace: Optional[str] = None) -> List[Dict]:
+        """
+        Stocke plusieurs résumés de conversation (encodage par lots, insertion par paquets)
+        
+        Args:
+            summaries: Dicts avec summary/topics/outcomes
+            batch_size: Taille des lots d'encodage
+            namespace: Espace de noms (défaut: projet courant)
+            
+        Returns:
+            Les résumés stockés
+        """
         timestamp = datetime.now().isoformat()
+        payloads = [
+            {
+                "type": "conversation",
+                "summary": item["summary"],
+                "topics": item.get("topics", []),
+                "outcomes": item.get("outcomes", []),
+                "timestamp": timestamp
+            }
+            for item in summaries
+        ]
         
-        # Générer l'embedding
-        vector = self._generate_embedding(summary)
+        point_ids = self._store_batch(payloads, [point_text(p) for p in payloads], batch_size, namespace=namespace)
         
-        # Préparer le payload
-        payload = {
-            "type": "conversation",
-            "summary": summary,
-            "topics": topics,
-            "outcomes": outcomes,
-            "timestamp": timestamp
-        }
+        return [
+            {
+                "id": point_id,
+                "summary": payload["summary"],
+                "topics": payload["topics"],
+                "outcomes": payload["outcomes"],
+                "timestamp": timestamp
+            }
+            for point_id, payload in zip(point_ids, payloads)
+        ]
+    
+    def get_last_conversation(self, namespace: Optional[str] = None) -> Optional[Dict]:
+        """
+        Récupère le résumé de conversation le plus récent du projet
         
-        # Insérer dans Qdrant
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[PointStruct(
-                id=point_id,
-                vector=vector,
-                payload=payload
-            )]
-        )
+        Niveau local si disponible, sinon une seule requête: scroll trié côté serveur
+        sur l'index datetime de `timestamp`
+        
+        Args:
+            namespace: Espace de noms du projet (défaut: projet courant, + niveau global)
         
+        Returns:
+            Payload de la dernière conversation, ou None
+        """
+        if self.local_store is not None:
+            point = self.local_store.latest("conversation", self._namespaces(namespace))
+            return point[1] if point else None
+        self.flush_writes()
+        conversation_filter = self._scope_filter("conversation", namespace)
+        
+        def latest():
+            points, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=conversation_filter,
+                limit=1,
+                order_by=OrderBy(key="timestamp", direction=Direction.DESC),
+                with_payload=True,
+                with_vectors=False
+            )
+            return points[0].payload if points else None
+        
+        try:
+            return latest()
+        except Exception:
+            # Collection créée avant les index de payload: le tri serveur exige l'index sur timestamp
+            pass
+        try:
+            create_payload_indexes(self.client, self.collection_name)
+            return latest()
+        except Exception:
+            pass
+        
+        # Dernier recours: parcours paginé complet (exact, mais proportionnel à l'historique)
+        last, offset = None, None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=conversation_filter,
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            for point in points:
+                if last is None or point.payload.get("timestamp", "") > last.get("timestamp", ""):
+                    last = point.payload
+            if offset is None:
+                return last
+    
+    @staticmethod
+    def _fact_result(point_id: str, score: float, payload: Dict) -> Dict:
+        """Fait renvoyé par les recherches"""
         return {
             "id": point_id,
-            "summary": summary,
-            "topics": topics,
-            "outcomes": outcomes,
-            "timestamp": timestamp
+            "fact": payload.get("fact", ""),
+            "category": payload.get("category", ""),
+            "timestamp": payload.get("timestamp", ""),
+            "metadata": payload.get("metadata", {}),
+            "usage_count": payload.get("usage_count", 0),
+            "score": score
         }
     
-    def search_facts(self, query: str, limit: int = 5) -> List[Dict]:
+    def _dense_search(self, query_vector: List[float], limit: int, namespace: str) -> List[Dict]:
+        """Recherche vectorielle dans les faits visibles (index local ou Qdrant)"""
+        local = self._local_search([query_vector], limit, self._scope_filters("fact", namespace))
+        if local is not None:
+            return [self._fact_result(point_id, score, payload) for point_id, score, payload in local[0]]
+        
+        self.flush_writes()
+        results = self.client.query_points(
+            collection_name=self.collection_name,
+            query=query_vector,
+            query_filter=self._scope_filter("fact", namespace),
+            limit=limit,
+            search_params=self.search_params,
+            with_payload=True
+        )
+        return [self._fact_result(str(result.id), result.score, result.payload) for result in results.points]
+    
+    def _fuse_lexical(self, query: str, dense: List[Dict], limit: int, namespace: str) -> List[Dict]:
+        """Fusionne le classement dense avec le classement BM25 (Reciprocal Rank Fusion)"""
+        dense_by_id = {fact["id"]: fact for fact in dense}
+        lexical = self.lexical_index.search(query, max(limit, self.HYBRID_CANDIDATES),
+                                            self._scope_filters("fact", namespace))
+        fused = reciprocal_rank_fusion([list(dense_by_id), [doc_id for doc_id, _ in lexical]], k=self.RRF_K)
+        
+        identifiers = identifier_terms(query)
+        facts = []
+        for point_id, rrf_score in fused[:limit]:
+            fact = dense_by_id.get(point_id)
+            if fact is None:
+                # Trouvé par BM25 seulement: pas de similarité cosinus calculée
+                fact = self._fact_result(point_id, 0.0, self.lexical_index.payload(point_id) or {})
+            fact["rrf_score"] = rrf_score
+            fact["lexical_match"] = self.lexical_index.matches_identifier(point_id, identifiers)
+            facts.append(fact)
+        return facts
+
+    def search_keywords(self, query: str, limit: int = 5, namespace: Optional[str] = None) -> List[Dict]:
+        """
+        Recherche par mots-clés dans les faits, sans embedding (FTS5 du niveau local, sinon BM25 en mémoire)
+
+        Args:
+            query: Mots-clés ou identifiants (fichier, fonction, code d'erreur)
+            limit: Nombre de résultats
+            namespace: Espace de noms du projet (défaut: projet courant, + niveau global)
+
+        Returns:
+            Faits correspondants, "score" = score BM25
+        """
+        if self.local_store is not None:
+            return [self._fact_result(point_id, score, payload) for point_id, score, payload
+                    in self.local_store.search(query, "fact", self._namespaces(namespace), limit)]
+        if not self.lexical_index.ready and not self.refresh_lexical_index():
+            return []
+        return [self._fact_result(point_id, score, self.lexical_index.payload(point_id) or {})
+                for point_id, score in self.lexical_index.search(query, limit, self._scope_filters("fact", namespace))]
+
+    def search_facts(self, query: str, limit: int = 5, hybrid: Optional[bool] = None,
+                     namespace: Optional[str] = None) -> List[Dict]:
         """
-        Recherche sémantique dans les faits
+        Recherche dans les faits: sémantique, ou hybride dense + BM25 fusionnée par RRF
+        
+        En mode hybride, "score" reste la similarité cosinus (0 si le fait n'est
+        trouvé que par BM25); "lexical_match" indique un identifiant exact de la
+        requête (fichier, fonction, code d'erreur) présent dans le fait.
         
         Args:
             query: Requête de recherche
             limit: Nombre de résultats
+            hybrid: Forcer/désactiver la recherche hybride (défaut: DS_HYBRID_SEARCH)
+            namespace: Espace de noms du projet (défaut: projet courant, + niveau global)
             
         Returns:
             Faits correspondants avec score de similarité
         """
+        namespace = namespace or current_namespace()
+        hybrid = self.hybrid_search if hybrid is None else hybrid
+        
+        # Même recherche depuis la dernière écriture: ni embedding ni requête Qdrant
+        key = self.search_cache.key(query, limit, hybrid, namespace)
+        cached, generation = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        
         # Générer l'embedding de la requête
         query_vector = self._generate_embedding(query)
         
-        # Recherche vectorielle avec query_points
-        results = self.client.query_points(
-            collection_name=self.collection_name,
-            query=query_vector,
-            query_filter=Filter(must=[
-                FieldCondition(key="type", match=MatchValue(value="fact"))
-            ]),
-            limit=limit,
-            with_payload=True
+        if hybrid and not self.lexical_index.ready:
+            hybrid = self.refresh_lexical_index()
+        if not hybrid:
+            results = self._dense_search(query_vector, limit, namespace)
+        else:
+            dense = self._dense_search(query_vector, max(limit, self.HYBRID_CANDIDATES), namespace)
+            results = self._fuse_lexical(query, dense, limit, namespace)
+        
+        self.search_cache.put(key, results, generation)
+        return results
+    
+    async def asearch_facts(self, query: str, limit: int = 5, hybrid: Optional[bool] = None,
+                            namespace: Optional[str] = None) -> List[Dict]:
+        """
+        Variante asynchrone de search_facts (client Qdrant asynchrone)
+        
+        L'embedding, l'index local et le mode embarqué passent par l'exécuteur de la boucle.
+        """
+        namespace = namespace or current_namespace()
+        hybrid = self.hybrid_search if hybrid is None else hybrid
+        key = self.search_cache.key(query, limit, hybrid, namespace)
+        cached, generation = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        query_vector = await loop.run_in_executor(None, self._generate_embedding, query)
+        
+        if hybrid and not self.lexical_index.ready:
+            hybrid = await loop.run_in_executor(None, self.refresh_lexical_index)
+        candidates = max(limit, self.HYBRID_CANDIDATES) if hybrid else limit
+        
+        if self.async_client is None or (self.local_index is not None and self.local_index.ready):
+            dense = await loop.run_in_executor(None, self._dense_search, query_vector, candidates, namespace)
+        else:
+            if self.write_queue is not None and len(self.write_queue):
+                await loop.run_in_executor(None, self.flush_writes)
+            results = await self.async_client.query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                query_filter=self._scope_filter("fact", namespace),
+                limit=candidates,
+                search_params=self.search_params,
+                with_payload=True
+            )
+            dense = [self._fact_result(str(result.id), result.score, result.payload) for result in results.points]
+        
+        results = self._fuse_lexical(query, dense, limit, namespace) if hybrid else dense
+        self.search_cache.put(key, results, generation)
+        return results
+    
+    async def arecall(self, query: str, token_budget: int, candidates: int = RECALL_CANDIDATES,
+                      min_score: float = 0.4, namespace: Optional[str] = None,
+                      in_context: Optional[Set[str]] = None) -> List[Dict]:
+        """
+        Faits à injecter dans le contexte pour une requête
+        
+        Les candidats de la recherche (similarité suffisante ou identifiant exact)
+        sont reclassés par similarité, fraîcheur et utilisation, puis sélectionnés
+        par MMR dans la limite du budget de tokens (voir memory_rerank).
+        
+        Args:
+            query: Message de l'utilisateur
+            token_budget: Tokens disponibles pour les textes des faits
+            candidates: Nombre de faits candidats à reclasser
+            min_score: Similarité minimale (sauf identifiant exact)
+            namespace: Espace de noms du projet
+            in_context: IDs des faits déjà présents dans le contexte (hors budget)
+            
+        Returns:
+            Faits retenus, dans l'ordre de sélection ("in_context": déjà injecté)
+        """
+        facts = await self.asearch_facts(query, candidates, namespace=namespace)
+        facts = [fact for fact in facts if fact["score"] >= min_score or fact.get("lexical_match")]
+        if len(facts) < 2:
+            return select_facts(facts, [[1.0]] * len(facts), token_budget, in_context=in_context)
+        
+        # Vecteurs des faits pour la diversité (cache d'embeddings: pas de recalcul en régime établi)
+        vectors = await asyncio.get_running_loop().run_in_executor(
+            None, self._generate_embeddings, [fact["fact"] for fact in facts]
+        )
+        return select_facts(facts, vectors, token_budget, in_context=in_context)
+    
+    # ------------------------------------------------------------------
+    # Accès avec échéance (boucle de l'agent)
+    # ------------------------------------------------------------------
+    def deadline(self, operation: str) -> float:
+        """Échéance d'une opération en secondes (DS_MEMORY_DEADLINE_<OPÉRATION>_S)"""
+        value = os.getenv(f"DS_MEMORY_DEADLINE_{operation.upper()}_S")
+        return float(value) if value else self.DEADLINES.get(operation, self.DEADLINES["read"])
+    
+    def submit_search(self, query: str, limit: int = 5, hybrid: Optional[bool] = None,
+                      namespace: Optional[str] = None) -> Future:
+        """Lance search_facts sur la boucle mémoire sans attendre le résultat"""
+        # Espace de noms résolu ici: le répertoire courant du thread de la boucle n'est pas celui de l'appelant
+        namespace = namespace or current_namespace()
+        return asyncio.run_coroutine_threadsafe(self.asearch_facts(query, limit, hybrid, namespace),
+                                                get_memory_loop())
+    
+    def submit_recall(self, query: str, token_budget: int, min_score: float = 0.4,
+                      namespace: Optional[str] = None, in_context: Optional[Set[str]] = None) -> Future:
+        """Lance arecall sur la boucle mémoire sans attendre le résultat"""
+        namespace = namespace or current_namespace()
+        return asyncio.run_coroutine_threadsafe(
+            self.arecall(query, token_budget, min_score=min_score, namespace=namespace, in_context=in_context),
+            get_memory_loop()
         )
+    
+    def submit(self, func, *args, **kwargs) -> Future:
+        """Lance une opération synchrone de la mémoire sur l'exécuteur de la boucle mémoire"""
+        async def run():
+            return await asyncio.get_running_loop().run_in_executor(None, lambda: func(*args, **kwargs))
+        return asyncio.run_coroutine_threadsafe(run(), get_memory_loop())
+    
+    def result_within(self, future: Future, operation: str, started: Optional[float] = None, default=None):
+        """
+        Attend le résultat d'une opération lancée au plus jusqu'à son échéance
         
-        facts = []
-        for result in results.points:
-            payload = result.payload
-            facts.append({
-                "id": str(result.id),
-                "fact": payload.get("fact", ""),
-                "category": payload.get("category", ""),
-                "timestamp": payload.get("timestamp", ""),
-                "metadata": payload.get("metadata", {}),
-                "score": result.score
-            })
+        Un résultat en retard est abandonné (l'opération se termine en arrière-plan).
         
-        return facts
+        Args:
+            future: Opération lancée (submit, submit_search)
+            operation: Nom de l'opération (search, read, write)
+            started: Instant de lancement (time.monotonic), défaut: maintenant
+            default: Valeur renvoyée si l'échéance est dépassée
+            
+        Returns:
+            Résultat de l'opération ou default
+        """
+        elapsed = time.monotonic() - started if started is not None else 0.0
+        try:
+            return future.result(timeout=max(self.deadline(operation) - elapsed, 0.0))
+        except FutureTimeoutError:
+            future.cancel()
+            self.deadline_stats[operation] += 1
+            return default
+    
+    def call_with_deadline(self, operation: str, func, *args, default=None, **kwargs):
+        """Exécute une opération de la mémoire avec l'échéance de son type"""
+        return self.result_within(self.submit(func, *args, **kwargs), operation, default=default)
     
-    def get_statistics(self) -> Dict[str, int]:
+    def find_similar_facts(self, texts: List[str], threshold: float = 0.9,
+                           namespace: Optional[str] = None) -> List[Optional[Dict]]:
         """
-        Obtient des statistiques sur la mémoire
+        Cherche pour chaque texte un fait existant quasi-identique (requêtes groupées)
         
+        Args:
+            texts: Textes à comparer
+            threshold: Score de similarité minimal
+            namespace: Espace de noms du projet (défaut: projet courant, + niveau global)
+            
         Returns:
-            Dictionnaire avec les stats
+            Fait existant le plus proche (ou None) pour chaque texte
         """
-        collection_info = self.client.get_collection(self.collection_name)
+        vectors = self._generate_embeddings(texts)
         
-        # Compter par type
-        facts_count = len(self.client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=Filter(must=[FieldCondition(key="type", match=MatchValue(value="fact"))]),
-            limit=10000
-        )[0])
+        local = self._local_search(vectors, 1, self._scope_filters("fact", namespace), threshold)
+        if local is not None:
+            return [
+                {"id": hits[0][0], "fact": hits[0][2].get("fact", ""),
+                 "category": hits[0][2].get("category", ""), "score": hits[0][1]} if hits else None
+                for hits in local
+            ]
         
-        decisions_count = len(self.client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=Filter(must=[FieldCondition(key="type", match=MatchValue(value="decision"))]),
-            limit=10000
-        )[0])
+        fact_filter = self._scope_filter("fact", namespace)
+        self.flush_writes()
+        
+        matches: List[Optional[Dict]] = []
+        for start in range(0, len(vectors), self.UPSERT_CHUNK_SIZE):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    QueryRequest(query=vector, filter=fact_filter, limit=1, params=self.search_params,
+                                 score_threshold=threshold, with_payload=True)
+                    for vector in vectors[start:start + self.UPSERT_CHUNK_SIZE]
+                ]
+            )
+            for response in responses:
+                if response.points:
+                    point = response.points[0]
+                    matches.append({
+                        "id": str(point.id),
+                        "fact": point.payload.get("fact", ""),
+                        "category": point.payload.get("category", ""),
+                        "score": point.score
+                    })
+                else:
+                    matches.append(None)
+        
+        return matches
+    
+    def find_exact(self, point_type: str, text: str, namespace: Optional[str] = None) -> Optional[Dict]:
+        """
+        Cherche un point au contenu identique par son ID déterministe (sans embedding)
         
-        conversations_count = len(self.client.scroll(
+        Args:
+            point_type: Type du point (fact, decision, conversation)
+            text: Contenu embeddé
+            namespace: Espace de noms du projet (défaut: projet courant, + niveau global)
+            
+        Returns:
+            Payload du point existant avec son "id", ou None
+        """
+        point_ids = [content_id(point_type, text, visible) for visible in self._namespaces(namespace)]
+        if self.local_store is not None:
+            points = self.local_store.get(point_ids)
+            return {"id": points[0][0], **points[0][1]} if points else None
+        if point_type == "fact" and self.lexical_index.ready:
+            # Index lexical complet et à jour: aucune requête réseau
+            for point_id in point_ids:
+                payload = self.lexical_index.payload(point_id)
+                if payload is not None:
+                    return {"id": point_id, **payload}
+            return None
+        self.flush_writes()
+        points = self.client.retrieve(self.collection_name, ids=point_ids, with_payload=True)
+        return {"id": str(points[0].id), **(points[0].payload or {})} if points else None
+    
+    # Durée de validité des statistiques (secondes)
+    STATS_TTL = 30.0
+    
+    def _count(self, point_type: Optional[str] = None) -> int:
+        """Comptage exact côté serveur (tous les points ou un type)"""
+        count_filter = None
+        if point_type:
+            count_filter = Filter(must=[FieldCondition(key="type", match=MatchValue(value=point_type))])
+        return self.client.count(
             collection_name=self.collection_name,
-            scroll_filter=Filter(must=[FieldCondition(key="type", match=MatchValue(value="conversation"))]),
-            limit=10000
-        )[0])
+            count_filter=count_filter,
+            exact=True
+        ).count
+    
+    def _count_categories(self, limit: int = 100, key: str = "category") -> Dict[str, int]:
+        """Nombre de faits par valeur d'un champ (facet, index keyword sur category ou namespace)"""
+        try:
+            response = self.client.facet(
+                collection_name=self.collection_name,
+                key=key,
+                facet_filter=Filter(must=[FieldCondition(key="type", match=MatchValue(value="fact"))]),
+                limit=limit,
+                exact=True
+            )
+        except Exception:
+            return {}  # Serveur sans facet ou sans index sur category: pas de répartition
+        return {str(hit.value): hit.count for hit in response.hits}
+    
+    def get_statistics(self, refresh: bool = False) -> Dict:
+        """
+        Obtient des statistiques sur la mémoire
         
-        return {
-            "total_points": collection_info.points_count,
-            "total_facts": facts_count,
-            "total_decisions": decisions_count,
-            "total_conversations": conversations_count
+        Comptages exacts côté serveur, lancés en parallèle et mis en cache STATS_TTL secondes
+        
+        Args:
+            refresh: Ignorer le cache
+            
+        Returns:
+            Dictionnaire avec les stats
+        """
+        cached = self._stats_cache
+        if cached and not refresh and time.monotonic() - cached[0] < self.STATS_TTL:
+            return cached[1]
+        
+        self.flush_writes()
+        queries = {
+            "total_points": lambda: self._count(),
+            "total_facts": lambda: self._count("fact"),
+            "total_decisions": lambda: self._count("decision"),
+            "total_conversations": lambda: self._count("conversation"),
+            "categories": self._count_categories,
+            "namespaces": lambda: self._count_categories(key="namespace"),
         }
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = {key: executor.submit(query) for key, query in queries.items()}
+            stats = {key: future.result() for key, future in futures.items()}
+        
+        self._stats_cache = (time.monotonic(), stats)
+        return stats
+    
+    def iter_points(self, point_type: Optional[str] = None, with_vectors: bool = False, page_size: int = 256):
+        """
+        Parcourt tous les points (scroll paginé)
+        
+        Args:
+            point_type: Filtrer par type (fact, decision, conversation)
+            with_vectors: Inclure les vecteurs
+            page_size: Points par requête
+            
+        Yields:
+            Points Qdrant
+        """
+        self.flush_writes()
+        scroll_filter = None
+        if point_type:
+            scroll_filter = Filter(must=[FieldCondition(key="type", match=MatchValue(value=point_type))])
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+            yield from points
+            if offset is None:
+                return
+    
+    def delete_points(self, point_ids: List[str], chunk_size: Optional[int] = None) -> int:
+        """
+        Supprime des points par paquets (index local et statistiques tenus à jour)
+        
+        Args:
+            point_ids: IDs des points
+            chunk_size: IDs par requête
+            
+        Returns:
+            Nombre de points supprimés
+        """
+        self.flush_writes()  # Une écriture différée ne doit pas recréer un point supprimé
+        chunk_size = chunk_size or self.UPSERT_CHUNK_SIZE
+        for start in range(0, len(point_ids), chunk_size):
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=point_ids[start:start + chunk_size]),
+                wait=start + chunk_size >= len(point_ids)
+            )
+        if self.local_index is not None:
+            self.local_index.remove(point_ids)
+        if self.local_store is not None:
+            self.local_store.delete(point_ids)
+        self.lexical_index.remove(point_ids)
+        self._invalidate_caches()
+        return len(point_ids)
+    
+    def record_usage(self, point_ids: List[str]):
+        """Note l'utilisation de faits rappelés dans le contexte (écrite par flush_usage)"""
+        with self._usage_lock:
+            self._usage_pending.update(point_ids)
+    
+    def flush_usage(self) -> int:
+        """
+        Écrit les utilisations en attente (usage_count, last_used) en une requête groupée
+        
+        Returns:
+            Nombre de points mis à jour
+        """
+        with self._usage_lock:
+            pending, self._usage_pending = self._usage_pending, Counter()
+        if not pending:
+            return 0
+        
+        now = datetime.now().isoformat()
+        self.flush_writes()
+        points = self.client.retrieve(self.collection_name, ids=list(pending), with_payload=["usage_count"])
+        return self.update_payloads({
+            str(point.id): {
+                "usage_count": (point.payload or {}).get("usage_count", 0) + pending[str(point.id)],
+                "last_used": now
+            }
+            for point in points
+        })
+    
+    def update_payloads(self, updates: Dict[str, Dict]) -> int:
+        """
+        Écrit des champs de payload en une requête groupée (niveau local tenu à jour)
+        
+        Args:
+            updates: Champs à écrire, par ID de point
+            
+        Returns:
+            Nombre de points mis à jour
+        """
+        if not updates:
+            return 0
+        self.client.batch_update_points(self.collection_name, update_operations=[
+            SetPayloadOperation(set_payload=SetPayload(payload=fields, points=[point_id]))
+            for point_id, fields in updates.items()
+        ])
+        if self.local_index is not None:
+            self.local_index.update_payloads(updates)
+        if self.local_store is not None:
+            self.local_store.update_payloads(updates)
+        self.search_cache.invalidate()  # usage_count des résultats en cache périmé
+        return len(updates)
     
     def clear_all(self):
         """Efface toute la mémoire (ATTENTION !)"""
-        # Supprimer tous les points de la collection
+        # Supprimer tous les points de la collection (écritures en attente comprises)
+        self.flush_writes()
         self.client.delete(
             collection_name=self.collection_name,
             points_selector=Filter(must=[])  # Match all
         )
+        if self.local_index is not None:
+            self.local_index.clear()
+        if self.local_store is not None:
+            self.local_store.clear()
+        self.lexical_index.clear()
+        self._invalidate_caches()
 
 
 # Instance globale
 _memory = None
+_memory_lock = threading.Lock()
+
+
+@atexit.register
+def _flush_memory_writes():
+    """Insère les écritures différées avant l'arrêt (exécuté avant _close_clients)"""
+    if _memory is not None and not _memory.flush_writes(timeout=_memory.deadline("write")):
+        print("⚠️  Écritures mémoire en attente perdues à l'arrêt")
 
 def get_memory() -> QdrantMemory:
-    """Obtient l'instance de mémoire (singleton)"""
+    """Obtient l'instance de mémoire (singleton, sûr entre threads)"""
     global _memory
     if _memory is None:
-        _memory = QdrantMemory()
+        with _memory_lock:
+            if _memory is None:
+                _memory = QdrantMemory()
     return _memory
 
 
 # Fonctions utilitaires
-def remember(fact: str, category: str = "general") -> Dict:
+def _scope_namespace(scope: str) -> str:
+    """Espace de noms d'une portée: "project" (projet courant) ou "global" (tous les projets)"""
+    return GLOBAL_NAMESPACE if scope == "global" else current_namespace()
+
+
+def remember(fact: str, category: str = "general", scope: str = "project") -> Dict:
     """
     Stocke un fait en mémoire avec déduplication automatique
     
     Args:
         fact: Fait à mémoriser
         category: Catégorie
+        scope: "project" (projet courant) ou "global" (visible depuis tous les projets)
         
     Returns:
         Dict avec id du fait (nouveau ou existant)
     """
     memory = get_memory()
+    namespace = _scope_namespace(scope)
+    
+    # Doublon exact: retrouvé par son ID dérivé du contenu, sans embedding ni recherche
+    existing = memory.find_exact("fact", fact, namespace)
+    if existing is not None:
+        return {
+            "id": existing['id'],
+            "fact": existing.get('fact', fact),
+            "category": existing.get('category', category),
+            "status": "deduplicated"
+        }
     
-    # DÉDUPLICATION: Chercher des faits très similaires
-    similar = memory.search_facts(fact, limit=3)
+    # DÉDUPLICATION: Chercher des faits très similaires (similarité pure, sans fusion BM25)
+    similar = memory.search_facts(fact, limit=3, hybrid=False, namespace=namespace)
     
     # Si un fait quasi-identique existe (score > 0.9), ne pas dupliquer
     if similar and similar[0].get('score', 0) > 0.9:
@@ -410,8 +1772,56 @@ def remember(fact: str, category: str = "general") -> Dict:
             "status": "deduplicated"
         }
     
-    # Sinon stocker normalement
-    return memory.store_fact(fact, category)
+    # Sinon stocker (écriture différée, groupée avec les suivantes)
+    return memory.store_fact(fact, category, defer=True, namespace=namespace)
+
+
+def remember_many(facts: List[Union[str, Dict]], category: str = "general", deduplicate: bool = True,
+                  scope: str = "project") -> Dict:
+    """
+    Stocke un lot de faits en mémoire (encodage par lots, insertion par paquets)
+    
+    Args:
+        facts: Faits (texte, ou dict avec fact/category/metadata)
+        category: Catégorie par défaut
+        deduplicate: Ignorer les faits déjà en mémoire (score > 0.9) et les doublons du lot
+        scope: "project" (projet courant) ou "global" (visible depuis tous les projets)
+        
+    Returns:
+        Dict avec le nombre de faits stockés et ignorés
+    """
+    memory = get_memory()
+    namespace = _scope_namespace(scope)
+    items = [{"fact": item} if isinstance(item, str) else item for item in facts]
+    items = [item for item in items if item.get("fact", "").strip()]
+    if not items:
+        return {"error": "Aucun fait à mémoriser", "stored": 0, "deduplicated": 0}
+    
+    deduplicated = 0
+    if deduplicate:
+        # Doublons exacts à l'intérieur du lot (même ID dérivé du contenu normalisé)
+        seen = set()
+        unique = []
+        for item in items:
+            point_id = content_id("fact", item["fact"], namespace)
+            if point_id not in seen:
+                seen.add(point_id)
+                unique.append(item)
+        deduplicated += len(items) - len(unique)
+        
+        # Faits quasi-identiques déjà en mémoire (une requête groupée par paquet)
+        similar = memory.find_similar_facts([item["fact"] for item in unique], namespace=namespace)
+        items = [item for item, match in zip(unique, similar) if match is None]
+        deduplicated += len(unique) - len(items)
+    
+    stored = memory.store_facts(items, category, defer=True, namespace=namespace) if items else []
+    print(f"✅ {len(stored)} fait(s) mémorisé(s), {deduplicated} doublon(s) ignoré(s)")
+    
+    return {
+        "stored": len(stored),
+        "deduplicated": deduplicated,
+        "ids": [fact["id"] for fact in stored]
+    }
 
 
 def recall(category: Optional[str] = None, limit: int = 10) -> List[Dict]:
@@ -424,7 +1834,12 @@ def search_facts(query: str, limit: int = 5) -> List[Dict]:
     return get_memory().search_facts(query, limit)
 
 
+def search_keywords(query: str, limit: int = 5) -> List[Dict]:
+    """Recherche par mots-clés exacts dans les faits mémorisés (sans embedding)"""
+    return get_memory().search_keywords(query, limit)
+
+
 def decide(decision: str, reasoning: str) -> Dict:
     """Enregistre une décision"""
-    return get_memory().store_decision(decision, reasoning)
+    return get_memory().store_decision(decision, reasoning, defer=True)
 
@@ -0,0 +1,286 @@
+"""
+Suivi sémantique de la progression de l'agent
+Détecte les cycles sans progrès que la détection de boucles exacte laisse passer:
+lectures redondantes d'un fichier inchangé, éditions qui échouent à répétition,
+erreurs identiques
+"""
+
+import os
+import re
+import json
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_tools import split_lines
+
+
+def _normalize_error(text: str) -> str:
+    """Normalise un message d'erreur (chiffres, adresses, espaces) pour comparaison"""
+    text = re.sub(r'0x[0-9a-f]+', '0x?', text.lower())
+    text = re.sub(r'\d+', '#', text)
+    return ' '.join(text.split())[:500]
+
+
+def _extract_error(tool_name: str, result: Any) -> Optional[str]:
+    """Extrait le message d'erreur d'un résultat d'outil (None si succès)"""
+    if isinstance(result, dict):
+        if result.get('error'):
+            return str(result['error'])
+        if result.get('success') is False:
+            if tool_name == 'execute_command':
+                return str(result.get('stderr') or result.get('stdout') or result.get('returncode'))
+            return str(result.get('hint') or result)
+    return None
+
+
+class ProgressTracker:
+    """
+    Détecte les itérations qui ne font pas avancer la tâche
+
+    Chaque appel d'outil est classé "progrès" ou "sans progrès". Une itération
+    dont tous les appels sont sans progrès est gaspillée; après plusieurs
+    itérations gaspillées consécutives, l'agent est arrêté.
+    """
+
+    def __init__(self, max_stalled_iterations: int = 3, max_failed_edits: int = 3,
+                 max_identical_errors: int = 3, max_redundant_reads: int = 2,
+                 max_read_chars: int = 100000, cwd: Optional[str] = None):
+        """
+        Args:
+            max_stalled_iterations: Itérations sans progrès consécutives avant arrêt
+            max_failed_edits: Échecs d'édition sur un même fichier avant blocage
+            max_identical_errors: Occurrences d'une même erreur avant blocage
+            max_redundant_reads: Relectures d'une plage inchangée avant blocage
+            max_read_chars: Taille max d'un résultat read_file transmis au modèle (JSON, au-delà: tronqué)
+            cwd: Répertoire de base des chemins relatifs (None = répertoire courant du processus)
+        """
+        self.max_stalled_iterations = max_stalled_iterations
+        self.max_failed_edits = max_failed_edits
+        self.max_identical_errors = max_identical_errors
+        self.max_redundant_reads = max_redundant_reads
+        self.max_read_chars = max_read_chars
+        self.cwd = cwd
+
+        # chemin → empreinte, plages lues [(début, fin, extrait, tokens)], relectures redondantes
+        self.reads: Dict[str, Dict] = {}
+        self.failed_edits: Dict[str, int] = {}
+        self.error_counts: Dict[str, int] = {}
+
+        self.stalled_iterations = 0
+        self._iteration_calls: List[bool] = []
+
+        self.stats = {
+            'stalled_iterations': 0,
+            'blocked_calls': 0,
+            'early_stops': 0,
+            'tokens_saved': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Lectures
+    # ------------------------------------------------------------------
+    def _resolve(self, path: str) -> str:
+        """Chemin absolu, relatif au répertoire de la session (comme les outils)"""
+        return os.path.abspath(os.path.join(self.cwd or os.getcwd(), os.path.expanduser(path)))
+
+    @staticmethod
+    def _fingerprint(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _read_range(params: Dict) -> Tuple[int, float]:
+        start = params.get('start_line') or 1
+        end = params.get('end_line') or float('inf')
+        return start, end
+
+    def _is_covered(self, path: str, read_range: Tuple[int, float]) -> bool:
+        """La plage demandée a-t-elle déjà été lue sur le fichier inchangé ?"""
+        entry = self.reads.get(path)
+        if entry is None or entry['fingerprint'] != self._fingerprint(path):
+            return False
+        start, end = read_range
+        # Fusionner les plages lues et vérifier la couverture
+        cursor = start
+        for r_start, r_end, _, _ in sorted(entry['ranges'], key=lambda r: r[0]):
+            if r_start > cursor:
+                break
+            cursor = max(cursor, r_end + 1)
+        return cursor > end
+
+    def _delivered_lines(self, content: str) -> List[str]:
+        """Lignes complètes réellement transmises (résultat JSON tronqué à max_read_chars)"""
+        lines = split_lines(content)
+        budget = self.max_read_chars - 1  # Guillemet ouvrant du JSON
+        if len(json.dumps(content, ensure_ascii=False)) <= self.max_read_chars:
+            return lines
+        delivered = []
+        for line in lines:
+            budget -= len(json.dumps(line, ensure_ascii=False)) - 2
+            if budget < 0:
+                break
+            delivered.append(line)
+        return delivered
+
+    def _record_read(self, path: str, read_range: Tuple[int, float], content: str):
+        fingerprint = self._fingerprint(path)
+        entry = self.reads.get(path)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            entry = {'fingerprint': fingerprint, 'ranges': [], 'redundant': 0}
+            self.reads[path] = entry
+        # Seules les lignes transmises au modèle sont vues: la suite d'un résultat tronqué reste à lire
+        lines = self._delivered_lines(content)
+        if not lines:
+            return
+        start, end = read_range
+        if len(lines) < len(split_lines(content)):
+            end = start + len(lines) - 1
+        delivered = ''.join(lines)
+        # Extrait tel qu'il apparaît dans l'historique (résultat sérialisé en JSON)
+        probe = json.dumps(delivered, ensure_ascii=False)[1:121]
+        entry['ranges'].append((start, end, probe, len(delivered) // 4))
+
+    @staticmethod
+    def _covered_tokens(entry: Dict, read_range: Tuple[int, float]) -> int:
+        """Tokens d'une relecture évitée, estimés au prorata des plages déjà lues qui la couvrent"""
+        start, end = read_range
+        tokens = 0.0
+        covered_until = start - 1
+        for r_start, r_end, _, r_tokens in sorted(entry['ranges'], key=lambda r: r[0]):
+            overlap_start, overlap_end = max(r_start, covered_until + 1), min(r_end, end)
+            if overlap_end < overlap_start:
+                continue
+            if r_end == float('inf'):
+                tokens += r_tokens  # Fichier lu en entier: pas de nombre de lignes connu
+            else:
+                tokens += r_tokens * (overlap_end - overlap_start + 1) / (r_end - r_start + 1)
+            covered_until = overlap_end
+        return int(tokens)
+
+    def prune_reads(self, history_text: str):
+        """
+        Oublie les lectures sorties du contexte (troncature de l'historique):
+        les relire redevient légitime
+
+        Args:
+            history_text: Contenu concaténé de l'historique courant
+        """
+        for path in list(self.reads):
+            entry = self.reads[path]
+            entry['ranges'] = [r for r in entry['ranges'] if r[2] in history_text]
+            if not entry['ranges']:
+                del self.reads[path]
+
+    # ------------------------------------------------------------------
+    # API utilisée par la boucle de l'agent
+    # ------------------------------------------------------------------
+    def check(self, tool_name: str, params: Dict) -> Optional[Dict]:
+        """
+        Vérifie un appel AVANT exécution
+
+        Returns:
+            Résultat de substitution si l'appel doit être bloqué, sinon None
+        """
+        if tool_name == 'read_file' and params.get('file_path'):
+            path = self._resolve(params['file_path'])
+            read_range = self._read_range(params)
+            if self._is_covered(path, read_range):
+                entry = self.reads[path]
+                entry['redundant'] += 1
+                if entry['redundant'] >= self.max_redundant_reads:
+                    self._iteration_calls.append(False)
+                    self.stats['blocked_calls'] += 1
+                    self.stats['tokens_saved'] += self._covered_tokens(entry, read_range)
+                    return {
+                        'error': f"Lecture bloquée: {params['file_path']} n'a pas changé depuis votre dernière lecture de cette plage",
+                        'no_progress': True,
+                        'hint': "Utilisez le contenu déjà lu ou lisez une autre plage"
+                    }
+
+        if tool_name == 'replace_in_file' and params.get('file_path'):
+            path = self._resolve(params['file_path'])
+            if self.failed_edits.get(path, 0) >= self.max_failed_edits:
+                self._iteration_calls.append(False)
+                self.stats['blocked_calls'] += 1
+                return {
+                    'error': f"Édition bloquée: {self.failed_edits[path]} échecs consécutifs sur {params['file_path']}",
+                    'no_progress': True,
+                    'hint': "Relisez la zone exacte avec read_file() puis copiez old_text à l'identique, ou utilisez write_file()"
+                }
+        return None
+
+    def record(self, tool_name: str, params: Dict, result: Any) -> Optional[str]:
+        """
+        Enregistre le résultat d'un appel APRÈS exécution
+
+        Returns:
+            Conseil ciblé à injecter dans le contexte (ou None)
+        """
+        progress = True
+        guidance = None
+        error = _extract_error(tool_name, result)
+
+        if tool_name == 'read_file' and params.get('file_path') and error is None:
+            path = self._resolve(params['file_path'])
+            read_range = self._read_range(params)
+            if self._is_covered(path, read_range):
+                progress = False
+                guidance = (f"{params['file_path']} n'a pas changé depuis votre dernière lecture de "
+                            f"cette plage: utilisez le contenu déjà lu.")
+            elif isinstance(result, str):
+                self._record_read(path, read_range, result)
+
+        if tool_name == 'replace_in_file' and params.get('file_path'):
+            path = self._resolve(params['file_path'])
+            if error is not None:
+                self.failed_edits[path] = self.failed_edits.get(path, 0) + 1
+                if self.failed_edits[path] >= 2:
+                    progress = False
+                    guidance = (f"{self.failed_edits[path]} échecs de replace_in_file sur {params['file_path']}: "
+                                f"relisez la zone exacte avec read_file() avant de réessayer.")
+            else:
+                self.failed_edits.pop(path, None)
+
+        if error is not None:
+            key = hashlib.sha1(f"{tool_name}:{_normalize_error(error)}".encode('utf-8')).hexdigest()
+            self.error_counts[key] = self.error_counts.get(key, 0) + 1
+            if self.error_counts[key] >= 2:
+                progress = False
+                if self.error_counts[key] >= self.max_identical_errors:
+                    guidance = (f"Même erreur obtenue {self.error_counts[key]} fois avec {tool_name}: "
+                                f"changez d'approche au lieu de réessayer.")
+
+        self._iteration_calls.append(progress)
+        return guidance
+
+    def end_iteration(self) -> bool:
+        """
+        Clôt une itération
+
+        Returns:
+            True si l'agent doit s'arrêter (trop d'itérations sans progrès)
+        """
+        calls, self._iteration_calls = self._iteration_calls, []
+        if calls and not any(calls):
+            self.stalled_iterations += 1
+            self.stats['stalled_iterations'] += 1
+        else:
+            self.stalled_iterations = 0
+        return self.stalled_iterations >= self.max_stalled_iterations
+
+    def record_early_stop(self):
+        """
+        Comptabilise un arrêt anticipé (les itérations restantes n'auraient pas
+        forcément été faites: pas de tokens économisés comptés)
+        """
+        self.stats['early_stops'] += 1
+
+    def new_request(self):
+        """Nouvelle demande utilisateur: oublie les échecs (les lectures restent valides)"""
+        self.failed_edits.clear()
+        self.error_counts.clear()
+        self.stalled_iterations = 0
+        self._iteration_calls = []
@@ -8,7 +8,8 @@ import json
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
-from qdrant_client import QdrantClient
+from .memory_tools import get_qdrant_client, qdrant_location, ensure_collection
+from .working_dir import resolve_path
 
 
 def backup_qdrant(
@@ -27,16 +28,16 @@ def backup_qdrant(
     Returns:
         Dict avec succès, chemin du backup, statistiques
     """
-    qdrant_url = qdrant_url or os.getenv("QDRANT_ENDPOINT", "http://172.16.20.90:6333")
+    qdrant_url = qdrant_location(qdrant_url)
     collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "deepseek_collection")
     
     try:
         # Créer le répertoire de backup
-        backup_path = Path(backup_dir)
+        backup_path = Path(resolve_path(backup_dir))  # Relatif au répertoire de la session
         backup_path.mkdir(parents=True, exist_ok=True)
         
         # Connexion Qdrant
-        client = QdrantClient(url=qdrant_url)
+        client = get_qdrant_client(qdrant_url)
         
         # Récupérer tous les points
         all_points = []
@@ -125,11 +126,11 @@ def restore_qdrant(
     Returns:
         Dict avec succès et statistiques
     """
-    qdrant_url = qdrant_url or os.getenv("QDRANT_ENDPOINT", "http://172.16.20.90:6333")
+    qdrant_url = qdrant_location(qdrant_url)
     
     try:
         # Charger le backup
-        with open(backup_file, 'r', encoding='utf-8') as f:
+        with open(resolve_path(backup_file), 'r', encoding='utf-8') as f:
             backup_data = json.load(f)
         
         metadata = backup_data['metadata']
@@ -139,12 +140,12 @@ def restore_qdrant(
         target_collection = collection_name or metadata['collection_name']
         
         # Connexion Qdrant
-        client = QdrantClient(url=qdrant_url)
+        client = get_qdrant_client(qdrant_url)
         
-        # Vérifier que la collection existe
-        try:
-            client.get_collection(target_collection)
-        except Exception:
+        # Créer la collection si besoin (taille des vecteurs du backup)
+        if points and isinstance(points[0]['vector'], list):
+            ensure_collection(client, target_collection, len(points[0]['vector']))
+        elif not client.collection_exists(target_collection):
             return {
                 "success": False,
                 "error": f"Collection {target_collection} n'existe pas"
@@ -180,6 +181,17 @@ def restore_qdrant(
             )
             restored += len(point_structs)
         
+        # Resynchroniser les index locaux et les statistiques de la mémoire si elle est chargée
+        from . import memory_tools
+        memory = memory_tools._memory
+        if memory is not None and memory.collection_name == target_collection:
+            memory._invalidate_caches()
+            if memory.local_index is not None:
+                memory.refresh_local_index()
+            if memory.local_store is not None:
+                memory.refresh_local_store(rebuild=True)
+            memory.lexical_index.invalidate()
+        
         return {
             "success": True,
             "collection": target_collection,
@@ -205,7 +217,7 @@ def list_backups(backup_dir: str = "./backups") -> List[Dict]:
     Returns:
         Liste des backups avec métadonnées
     """
-    backup_path = Path(backup_dir)
+    backup_path = Path(resolve_path(backup_dir))  # Relatif au répertoire de la session
     
     if not backup_path.exists():
         return []
@@ -247,7 +259,7 @@ def get_backup_stats(backup_file: str) -> Dict:
         Statistiques détaillées
     """
     try:
-        with open(backup_file, 'r', encoding='utf-8') as f:
+        with open(resolve_path(backup_file), 'r', encoding='utf-8') as f:
             data = json.load(f)
         
         points = data.get('points', [])
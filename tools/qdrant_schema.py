@@ -0,0 +1,237 @@
+"""
+Schéma optimisé de la collection Qdrant
+- Index de payload: keyword sur type/category/namespace, datetime sur timestamp
+- Paramètres HNSW ajustés
+- Quantification scalaire int8 optionnelle (recherche avec rescoring)
+
+Migration en place d'une collection existante avec mesure de latence avant/après
+"""
+
+import os
+import time
+import statistics
+from typing import Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    PayloadSchemaType, HnswConfigDiff, ScalarQuantization, ScalarQuantizationConfig,
+    ScalarType, SearchParams, QuantizationSearchParams, CollectionStatus, Disabled,
+    Filter, FieldCondition, MatchValue
+)
+
+
+# Champs filtrés ou triés par QdrantMemory
+PAYLOAD_INDEXES = {
+    "type": PayloadSchemaType.KEYWORD,
+    "category": PayloadSchemaType.KEYWORD,
+    "namespace": PayloadSchemaType.KEYWORD,
+    "timestamp": PayloadSchemaType.DATETIME,
+}
+
+# HNSW: graphe plus dense que le défaut (m=16, ef_construct=100) pour un meilleur rappel
+HNSW_M = 32
+HNSW_EF_CONSTRUCT = 200
+SEARCH_HNSW_EF = 128
+
+# Rescoring avec les vecteurs originaux après une présélection sur les vecteurs int8
+QUANTIZATION_OVERSAMPLING = 2.0
+
+
+def is_embedded(client: QdrantClient) -> bool:
+    """Indique si le client utilise Qdrant embarqué (index et HNSW sans effet)"""
+    from qdrant_client.local.qdrant_local import QdrantLocal
+    return isinstance(getattr(client, '_client', None), QdrantLocal)
+
+
+def create_payload_indexes(client: QdrantClient, collection_name: str) -> List[str]:
+    """
+    Crée les index de payload manquants
+
+    Args:
+        client: Client Qdrant
+        collection_name: Nom de la collection
+
+    Returns:
+        Champs indexés par cet appel
+    """
+    if is_embedded(client):
+        return []
+
+    existing = client.get_collection(collection_name).payload_schema or {}
+    created = []
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field in existing:
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=schema,
+            wait=True
+        )
+        created.append(field)
+    return created
+
+
+def collection_search_params(client: QdrantClient, collection_name: str) -> Optional[SearchParams]:
+    """
+    Paramètres de recherche adaptés à la collection
+
+    Returns:
+        SearchParams (hnsw_ef, plus rescoring si la collection est quantifiée),
+        None en mode embarqué (recherche exacte)
+    """
+    if is_embedded(client):
+        return None
+    quantization = None
+    if _is_quantized(client, collection_name):
+        quantization = QuantizationSearchParams(
+            rescore=True,
+            oversampling=QUANTIZATION_OVERSAMPLING
+        )
+    return SearchParams(hnsw_ef=SEARCH_HNSW_EF, quantization=quantization)
+
+
+def _is_quantized(client: QdrantClient, collection_name: str) -> bool:
+    """Indique si la collection a une quantification configurée"""
+    return client.get_collection(collection_name).config.quantization_config is not None
+
+
+def _wait_until_indexed(client: QdrantClient, collection_name: str, timeout: float = 120.0) -> bool:
+    """Attend la fin de la reconstruction des index (statut vert)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get_collection(collection_name).status == CollectionStatus.GREEN:
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def _percentiles(durations: List[float]) -> Dict[str, float]:
+    durations = sorted(durations)
+    return {
+        "p50_ms": round(statistics.median(durations) * 1000, 3),
+        "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000, 3)
+    }
+
+
+def measure_latency(client: QdrantClient, collection_name: str, samples: int = 20, limit: int = 5,
+                    search_params: Optional[SearchParams] = None) -> Dict:
+    """
+    Mesure la latence des requêtes de QdrantMemory
+
+    Les vecteurs de requête sont ceux de points existants de la collection.
+
+    Args:
+        client: Client Qdrant
+        collection_name: Nom de la collection
+        samples: Nombre de requêtes par type
+        limit: Résultats par recherche
+        search_params: Paramètres de recherche (rescoring...)
+
+    Returns:
+        Latences p50/p95 de la recherche filtrée et du scroll filtré
+    """
+    points, _ = client.scroll(collection_name=collection_name, limit=samples,
+                              with_payload=False, with_vectors=True)
+    queries = [point.vector for point in points if isinstance(point.vector, list)]
+    if not queries:
+        return {"samples": 0}
+
+    fact_filter = Filter(must=[FieldCondition(key="type", match=MatchValue(value="fact"))])
+    search, scroll = [], []
+    for query in queries:
+        start = time.perf_counter()
+        client.query_points(collection_name=collection_name, query=query, query_filter=fact_filter,
+                            limit=limit, search_params=search_params)
+        search.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        client.scroll(collection_name=collection_name, scroll_filter=fact_filter, limit=10,
+                      with_payload=True, with_vectors=False)
+        scroll.append(time.perf_counter() - start)
+
+    return {
+        "samples": len(queries),
+        "search": _percentiles(search),
+        "scroll": _percentiles(scroll)
+    }
+
+
+def optimize_collection(qdrant_url: Optional[str] = None,
+                        collection_name: Optional[str] = None,
+                        quantization: Optional[bool] = None,
+                        hnsw_m: int = HNSW_M,
+                        hnsw_ef_construct: int = HNSW_EF_CONSTRUCT,
+                        samples: int = 20) -> Dict:
+    """
+    Applique le schéma optimisé à une collection existante (migration en place)
+
+    Args:
+        qdrant_url: URL du serveur Qdrant
+        collection_name: Nom de la collection
+        quantization: True = quantification scalaire int8, False = désactivée,
+            None = configuration actuelle inchangée
+        hnsw_m: Nombre de liens par nœud du graphe HNSW
+        hnsw_ef_construct: Taille de la liste de candidats à la construction
+        samples: Requêtes par mesure de latence
+
+    Returns:
+        Dict avec index créés, configuration appliquée et latences avant/après
+    """
+    from .memory_tools import get_qdrant_client
+
+    collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "deepseek_collection")
+
+    try:
+        client = get_qdrant_client(qdrant_url)
+        before = measure_latency(client, collection_name, samples,
+                                 search_params=collection_search_params(client, collection_name))
+
+        if is_embedded(client):
+            return {
+                "success": True,
+                "collection": collection_name,
+                "embedded": True,
+                "indexes_created": [],
+                "latency_before": before,
+                "latency_after": before,
+                "note": "Qdrant embarqué: index de payload, HNSW et quantification sans effet"
+            }
+
+        indexes_created = create_payload_indexes(client, collection_name)
+
+        if quantization is None:
+            quantization_config = None  # Inchangée
+        elif quantization:
+            quantization_config = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        else:
+            quantization_config = Disabled.DISABLED
+        client.update_collection(
+            collection_name=collection_name,
+            hnsw_config=HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+            quantization_config=quantization_config
+        )
+        indexed = _wait_until_indexed(client, collection_name)
+
+        after = measure_latency(client, collection_name, samples,
+                                search_params=collection_search_params(client, collection_name))
+
+        return {
+            "success": True,
+            "collection": collection_name,
+            "embedded": False,
+            "indexes_created": indexes_created,
+            "hnsw": {"m": hnsw_m, "ef_construct": hnsw_ef_construct},
+            "quantization": "int8" if _is_quantized(client, collection_name) else None,
+            "indexing_complete": indexed,
+            "latency_before": before,
+            "latency_after": after
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
@@ -0,0 +1,55 @@
+"""
+Registre paresseux des outils de l'agent
+Chaque outil est déclaré par son nom et son chemin d'import ("module:fonction")
+et n'est importé qu'au premier appel
+"""
+
+import importlib
+import threading
+import time
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator
+
+
+class LazyToolRegistry(Mapping):
+    """Mapping nom → fonction qui résout l'import au premier accès"""
+
+    def __init__(self, specs: Dict[str, str]):
+        """
+        Args:
+            specs: Nom de l'outil → chemin d'import ("tools.file_tools:read_file")
+        """
+        self.specs = dict(specs)
+        self._loaded: Dict[str, Callable] = {}
+        self._lock = threading.Lock()
+        # Temps d'import par module (affiché par --profile-startup et /stats)
+        self.load_times: Dict[str, float] = {}
+
+    def __getitem__(self, name: str) -> Callable:
+        func = self._loaded.get(name)
+        if func is not None:
+            return func
+
+        spec = self.specs[name]  # KeyError si outil inconnu
+        module_path, _, attr = spec.partition(':')
+        with self._lock:
+            if name not in self._loaded:
+                start = time.perf_counter()
+                module = importlib.import_module(module_path)
+                if module_path not in self.load_times:
+                    self.load_times[module_path] = time.perf_counter() - start
+                self._loaded[name] = getattr(module, attr)
+        return self._loaded[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.specs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.specs)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def is_loaded(self, name: str) -> bool:
+        """Indique si l'outil a déjà été importé"""
+        return name in self._loaded
@@ -0,0 +1,103 @@
+"""
+Cache des résultats de recherche sémantique de QdrantMemory
+Clé: requête normalisée (espaces regroupés; casse conservée, comme la recherche
+elle-même: identifiants camelCase, embeddings) + paramètres de la recherche.
+
+Toute écriture dans la collection via QdrantMemory invalide le cache entier
+(numéro de génération). Les écritures d'autres processus partageant la collection
+(démon, workers batch, autres CLI) ne sont pas vues: chaque entrée expire après
+une courte durée (ttl) pour les refléter.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Requête normalisée pour la clé du cache (espaces regroupés)"""
+    return " ".join(query.split())
+
+
+class SearchResultCache:
+    """LRU des résultats de recherche, invalidé à chaque écriture et expirant après ttl"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0):
+        """
+        Args:
+            max_entries: Nombre max de recherches en cache (0 = désactivé)
+            ttl: Durée de vie d'une entrée en secondes (écritures des autres processus)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'expired': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(query: str, *params: Hashable) -> Tuple:
+        """Clé d'une recherche: requête normalisée + paramètres (limite, mode, espace de noms)"""
+        return (normalize_query(query), *params)
+
+    def get(self, key: Tuple) -> Tuple[Optional[List[Dict]], int]:
+        """
+        Cherche une recherche en cache
+
+        Args:
+            key: Clé (SearchResultCache.key)
+
+        Returns:
+            (copie des résultats ou None, génération à passer à put)
+        """
+        with self._lock:
+            entry = self._entries.get(key) if self.max_entries > 0 else None
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]  # Expirée: la collection a pu changer dans un autre processus
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None, self.generation
+            results = entry[1]
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return [dict(result) for result in results], self.generation
+
+    def put(self, key: Tuple, results: List[Dict], generation: int):
+        """
+        Met en cache le résultat d'une recherche
+
+        Ignoré si une écriture a eu lieu depuis le début de la recherche (génération
+        différente): le résultat pourrait ne plus refléter la collection.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Écriture dans la collection: toutes les recherches en cache sont périmées"""
+        with self._lock:
+            self.generation += 1
+            if self._entries:
+                self._entries.clear()
+                self.stats['invalidations'] += 1
+
+    def get_statistics(self) -> Dict:
+        """Statistiques (entrées, succès, échecs, taux de succès)"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+        }
@@ -6,6 +6,8 @@ import subprocess
 import shlex
 from typing import Dict, Optional, List
 
+from .working_dir import working_directory
+
 
 def execute_command(
     command: str,
@@ -38,7 +40,8 @@ def execute_command(
             text=True,
             timeout=timeout,
             check=check,
-            shell=shell
+            shell=shell,
+            cwd=working_directory()  # Répertoire de la session (pas de chdir global)
         )
         
         return {
@@ -172,8 +175,7 @@ def get_system_info() -> Dict[str, str]:
         info["python"] = result["stdout"].strip()
     
     # Working directory
-    import os
-    info["cwd"] = os.getcwd()
+    info["cwd"] = working_directory()
     
     return info
 
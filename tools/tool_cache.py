@@ -0,0 +1,389 @@
+"""
+Cache des résultats d'outils et préchargement spéculatif
+Réchauffe le cache pendant l'appel API à partir de règles simples
+(lecture de la plage suivante, fichiers d'entrée après list_files)
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .file_tools import split_lines
+from .working_dir import resolve_path
+
+
+# Outils dont le résultat peut être mis en cache (lecture seule)
+CACHEABLE_TOOLS = {'read_file', 'list_files'}
+
+# Outils qui modifient des fichiers (invalidation ciblée)
+FILE_WRITE_TOOLS = {'write_file', 'append_file', 'replace_in_file'}
+
+# Outils aux effets de bord inconnus (invalidation complète)
+GLOBAL_INVALIDATION_TOOLS = {'execute_command', 'git_commit', 'restore_qdrant'}
+
+
+def _normalize_path(path: str) -> str:
+    """Chemin absolu normalisé, relatif au répertoire de la session (clé stable malgré './', '..', etc.)"""
+    return resolve_path(path)
+
+
+def _file_fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    """Empreinte (mtime_ns, taille) d'un fichier, None s'il n'existe pas"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ToolResultCache:
+    """Cache LRU borné en mémoire pour les résultats d'outils en lecture seule"""
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, max_entries: int = 256, list_ttl: float = 10.0):
+        """
+        Args:
+            max_bytes: Budget mémoire total du cache (octets estimés)
+            max_entries: Nombre max d'entrées
+            list_ttl: Durée de validité des résultats list_files (secondes)
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.list_ttl = list_ttl
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'prefetch_hits': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    @staticmethod
+    def make_key(tool_name: str, params: Dict) -> str:
+        """Construit une clé normalisée (chemins absolus, paramètres triés)"""
+        normalized = dict(params)
+        for path_param in ('file_path', 'directory'):
+            if isinstance(normalized.get(path_param), str):
+                normalized[path_param] = _normalize_path(normalized[path_param])
+        return f"{tool_name}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False)}"
+
+    @staticmethod
+    def _estimate_size(result: Any) -> int:
+        if isinstance(result, str):
+            return len(result)
+        return len(json.dumps(result, ensure_ascii=False, default=str))
+
+    @staticmethod
+    def fingerprint(tool_name: str, params: Dict) -> Optional[Tuple[int, int]]:
+        """Empreinte du fichier lu par un appel read_file (à relever AVANT l'exécution)"""
+        if tool_name != 'read_file':
+            return None
+        return _file_fingerprint(_normalize_path(params.get('file_path', '')))
+
+    def _is_valid(self, entry: Dict) -> bool:
+        """Vérifie qu'une entrée reflète encore l'état du disque"""
+        if entry['tool'] == 'read_file':
+            return _file_fingerprint(entry['path']) == entry['fingerprint']
+        return time.monotonic() - entry['created'] < self.list_ttl
+
+    def get(self, tool_name: str, params: Dict) -> Tuple[bool, Any]:
+        """
+        Cherche un résultat en cache
+
+        Returns:
+            (trouvé, résultat)
+        """
+        key = self.make_key(tool_name, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._is_valid(entry):
+                if entry is not None:
+                    self._remove(key)
+                self.stats['misses'] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            if entry['origin'] and not entry['credited']:
+                # Premier usage d'un résultat préchargé
+                entry['credited'] = True
+                self.stats['prefetch_hits'] += 1
+                if entry['on_hit']:
+                    entry['on_hit'](entry['origin'])
+            return True, entry['result']
+
+    def put(self, tool_name: str, params: Dict, result: Any, origin: Optional[str] = None,
+            fingerprint: Optional[Tuple[int, int]] = None,
+            on_hit: Optional[Callable[[str], None]] = None) -> bool:
+        """
+        Stocke un résultat (refusé s'il dépasse à lui seul le quart du budget)
+
+        Args:
+            origin: Règle de préchargement à l'origine du résultat (None = appel réel)
+            fingerprint: Empreinte du fichier relevée AVANT la lecture (voir fingerprint);
+                sans elle, une écriture entre la lecture et l'empreinte passerait inaperçue
+            on_hit: Appelé avec la règle au premier usage d'un résultat préchargé
+        """
+        if tool_name not in CACHEABLE_TOOLS:
+            return False
+        if isinstance(result, dict) and 'error' in result:
+            return False
+
+        size = self._estimate_size(result)
+        if size > self.max_bytes // 4:
+            return False
+
+        path = None
+        if tool_name == 'read_file':
+            path = _normalize_path(params.get('file_path', ''))
+            current = _file_fingerprint(path)
+            if fingerprint is None:
+                fingerprint = current
+            if fingerprint is None or current != fingerprint:
+                return False  # Fichier modifié pendant la lecture: résultat peut-être périmé
+
+        key = self.make_key(tool_name, params)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                'tool': tool_name,
+                'path': path,
+                'fingerprint': fingerprint,
+                'created': time.monotonic(),
+                'result': result,
+                'size': size,
+                'origin': origin,
+                'on_hit': on_hit,
+                'credited': False
+            }
+            self._size += size
+            self._evict()
+        return True
+
+    def contains(self, tool_name: str, params: Dict) -> bool:
+        """Présence d'une entrée valide (sans toucher aux statistiques)"""
+        key = self.make_key(tool_name, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and self._is_valid(entry)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= entry['size']
+
+    def _evict(self):
+        while self._entries and (self._size > self.max_bytes or len(self._entries) > self.max_entries):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.stats['evictions'] += 1
+
+    def invalidate_path(self, file_path: str):
+        """Invalide les lectures d'un fichier et tous les listings"""
+        path = _normalize_path(file_path)
+        with self._lock:
+            stale = [k for k, e in self._entries.items()
+                     if e['tool'] == 'list_files' or e['path'] == path]
+            for key in stale:
+                self._remove(key)
+            self.stats['invalidations'] += len(stale)
+
+    def clear(self):
+        """Vide complètement le cache"""
+        with self._lock:
+            self.stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._size = 0
+
+    def get_statistics(self) -> Dict:
+        """Statistiques du cache (hit rate inclus)"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+            }
+
+
+class Prefetcher:
+    """
+    Préchargement spéculatif des prochains résultats d'outils
+
+    Règles:
+    - read_file(x, a, b) → read_file(x, b+1, b+(b-a+1))
+    - list_files(dir) → lecture des *.py et README de premier niveau
+
+    Une règle dont le taux de hit reste trop bas est désactivée pour la session.
+    """
+
+    RULES = ('next_range', 'entry_points')
+
+    def __init__(self, cache: ToolResultCache, tools: Dict[str, Callable],
+                 max_bytes_per_round: int = 512 * 1024,
+                 max_calls_per_round: int = 4,
+                 max_file_size: int = 256 * 1024,
+                 min_hit_rate: float = 0.15,
+                 min_samples: int = 8):
+        """
+        Args:
+            cache: Cache à réchauffer
+            tools: Fonctions d'outils (nom → callable)
+            max_bytes_per_round: Budget I/O par tour (octets lus sur disque)
+            max_calls_per_round: Nombre max de préchargements par tour
+            max_file_size: Taille max d'un fichier préchargé
+            min_hit_rate: Taux de hit minimal pour garder une règle active
+            min_samples: Préchargements avant d'évaluer une règle
+        """
+        self.cache = cache
+        self.tools = tools
+        self.max_bytes_per_round = max_bytes_per_round
+        self.max_calls_per_round = max_calls_per_round
+        self.max_file_size = max_file_size
+        self.min_hit_rate = min_hit_rate
+        self.min_samples = min_samples
+        self.enabled = os.getenv('DS_PREFETCH', 'true').lower() != 'false'
+        self.rule_stats = {rule: {'issued': 0, 'hits': 0, 'bytes': 0} for rule in self.RULES}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._inflight: Dict[str, threading.Event] = {}
+        # Répertoire de base des chemins relatifs (None = répertoire courant)
+        self.cwd: Optional[str] = None
+
+    def _credit(self, rule: str):
+        with self._lock:
+            if rule in self.rule_stats:
+                self.rule_stats[rule]['hits'] += 1
+
+    def _rule_active(self, rule: str) -> bool:
+        stats = self.rule_stats[rule]
+        if stats['issued'] < self.min_samples:
+            return True
+        return stats['hits'] / stats['issued'] >= self.min_hit_rate
+
+    def predict(self, tool_calls: List[Dict]) -> List[Tuple[str, str, Dict]]:
+        """
+        Prédit les prochains appels probables
+
+        Args:
+            tool_calls: Appels d'outils du dernier tour
+
+        Returns:
+            Liste de (règle, outil, paramètres)
+        """
+        predictions = []
+        for call in tool_calls:
+            name = call.get('name')
+            params = dict(call.get('parameters', {}) or {})
+            for path_param in ('file_path', 'directory'):
+                if self.cwd and isinstance(params.get(path_param), str):
+                    params[path_param] = os.path.join(self.cwd, params[path_param])
+
+            if name == 'read_file' and self._rule_active('next_range'):
+                start, end = params.get('start_line'), params.get('end_line')
+                file_path = params.get('file_path')
+                if isinstance(start, int) and isinstance(end, int) and end >= start and file_path:
+                    span = end - start + 1
+                    predictions.append(('next_range', 'read_file', {
+                        'file_path': file_path, 'start_line': end + 1, 'end_line': end + span
+                    }))
+
+            elif name == 'list_files' and self._rule_active('entry_points'):
+                directory = params.get('directory')
+                if not directory or not os.path.isdir(directory):
+                    continue
+                try:
+                    entries = sorted(os.listdir(directory))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if entry.endswith('.py') or entry.lower().startswith('readme'):
+                        path = os.path.join(directory, entry)
+                        if os.path.isfile(path):
+                            predictions.append(('entry_points', 'read_file', {'file_path': path}))
+        return predictions
+
+    def schedule(self, tool_calls: List[Dict]):
+        """Lance le préchargement en arrière-plan (non bloquant)"""
+        if not self.enabled or not tool_calls:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return  # Un seul tour de préchargement à la fois
+        predictions = self.predict(tool_calls)
+        if not predictions:
+            return
+        self._thread = threading.Thread(target=self._run, args=(predictions,), daemon=True)
+        self._thread.start()
+
+    def _run(self, predictions: List[Tuple[str, str, Dict]]):
+        budget = self.max_bytes_per_round
+        issued = 0
+
+        for rule, tool_name, params in predictions:
+            if issued >= self.max_calls_per_round or budget <= 0:
+                break
+            if self.cache.contains(tool_name, params):
+                continue
+
+            path = _normalize_path(params['file_path'])
+            fingerprint = _file_fingerprint(path)
+            if fingerprint is None or fingerprint[1] > min(self.max_file_size, budget):
+                continue
+
+            # Plage au-delà de la fin du fichier: tronquer à la dernière ligne
+            # (lignes comptées comme read_file, sinon la clé préchargée ne correspond pas)
+            if 'end_line' in params:
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        total_lines = len(split_lines(f.read()))
+                except (OSError, UnicodeDecodeError):
+                    continue
+                if params['start_line'] > total_lines:
+                    continue
+                params = dict(params, end_line=min(params['end_line'], total_lines))
+
+            key = self.cache.make_key(tool_name, params)
+            event = threading.Event()
+            with self._lock:
+                self._inflight[key] = event
+            try:
+                result = self.tools[tool_name](**params)
+                if self.cache.put(tool_name, params, result, origin=rule,
+                                  fingerprint=fingerprint, on_hit=self._credit):
+                    issued += 1
+                    budget -= fingerprint[1]
+                    with self._lock:
+                        self.rule_stats[rule]['issued'] += 1
+                        self.rule_stats[rule]['bytes'] += fingerprint[1]
+            except Exception:
+                pass  # Un échec de préchargement n'a aucune conséquence
+            finally:
+                event.set()
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def wait_for(self, tool_name: str, params: Dict, timeout: float = 0.5):
+        """Attend un préchargement en cours pour cet appel (évite une double lecture)"""
+        key = self.cache.make_key(tool_name, params)
+        with self._lock:
+            event = self._inflight.get(key)
+        if event is not None:
+            event.wait(timeout)
+
+    def get_statistics(self) -> Dict:
+        """Statistiques par règle (préchargements émis, hits, octets lus)"""
+        with self._lock:
+            return {
+                rule: {
+                    **stats,
+                    'hit_rate': stats['hits'] / stats['issued'] if stats['issued'] else 0.0,
+                    'active': self._rule_active(rule)
+                }
+                for rule, stats in self.rule_stats.items()
+            }
@@ -0,0 +1,51 @@
+"""
+Répertoire de travail des outils, propre à chaque session
+Le répertoire courant du processus est partagé par toutes les sessions du démon:
+les outils résolvent leurs chemins et lancent leurs sous-processus dans le
+répertoire de la session appelante (ContextVar, propre à chaque thread),
+sans os.chdir ni verrou global.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+_working_dir: ContextVar[Optional[str]] = ContextVar('ds_working_dir', default=None)
+
+
+def working_directory() -> str:
+    """Répertoire de travail de la session courante (défaut: répertoire courant du processus)"""
+    return _working_dir.get() or os.getcwd()
+
+
+def resolve_path(path: str) -> str:
+    """
+    Chemin absolu normalisé, relatif au répertoire de la session
+
+    Args:
+        path: Chemin absolu, relatif ou avec ~
+
+    Returns:
+        Chemin absolu
+    """
+    return os.path.normpath(os.path.join(working_directory(), os.path.expanduser(path)))
+
+
+@contextmanager
+def use_working_directory(path: Optional[str]) -> Iterator[None]:
+    """
+    Exécute un bloc dans le répertoire d'une session (None = inchangé)
+
+    Args:
+        path: Répertoire de travail
+    """
+    if path is None:
+        yield
+        return
+    token = _working_dir.set(os.path.abspath(os.path.expanduser(path)))
+    try:
+        yield
+    finally:
+        _working_dir.reset(token)
@@ -0,0 +1,125 @@
+"""
+File d'écriture différée (write-behind) pour QdrantMemory
+Les points sont mis en file et insérés par lots sur un thread d'arrière-plan:
+une rafale d'écritures pilotées par les outils devient quelques requêtes groupées.
+
+La file est vidée avant toute lecture Qdrant de la mémoire (lecture de ses propres
+écritures), et à la sortie (/quit, fin du processus).
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+class WriteBehindQueue:
+    """File de points à insérer par lots sur un thread d'arrière-plan"""
+
+    def __init__(self, write: Callable[[List], None],
+                 max_batch: int = 256,
+                 max_delay: float = 0.2,
+                 name: str = "memory-writes",
+                 on_error: Optional[Callable[[List, Exception], None]] = None):
+        """
+        Args:
+            write: Fonction d'insertion d'un lot (ex: QdrantMemory._upsert_points)
+            max_batch: Points max par lot
+            max_delay: Attente max (secondes) pour compléter un lot
+            name: Nom du thread
+            on_error: Appelée avec le lot et l'erreur quand une insertion échoue
+                (ex: retirer des index locaux les points jamais écrits)
+        """
+        self.write = write
+        self.on_error = on_error
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.name = name
+
+        self._items: List = []
+        self._inflight = 0
+        self._flushing = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {'enqueued': 0, 'batches': 0, 'written': 0, 'errors': 0}
+
+    def __len__(self) -> int:
+        """Points pas encore confirmés par Qdrant (en file + en cours d'envoi)"""
+        with self._cond:
+            return len(self._items) + self._inflight
+
+    def put(self, items: List):
+        """Met des points en file (le thread d'écriture démarre au premier appel)"""
+        if not items:
+            return
+        with self._cond:
+            self._items.extend(items)
+            self.stats['enqueued'] += len(items)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _next_batch(self) -> List:
+        """Attend un lot complet, l'échéance du premier point ou une demande de vidage"""
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_delay
+            while len(self._items) < self.max_batch and not self._flushing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._items = self._items[:self.max_batch], self._items[self.max_batch:]
+            self._inflight += len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self.write(batch)
+                self.stats['batches'] += 1
+                self.stats['written'] += len(batch)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"⚠️  Écriture mémoire différée échouée ({len(batch)} points): {e}")
+                if self.on_error is not None:
+                    try:
+                        self.on_error(batch, e)
+                    except Exception as cleanup_error:
+                        print(f"⚠️  Nettoyage après l'échec impossible: {cleanup_error}")
+            finally:
+                with self._cond:
+                    self._inflight -= len(batch)
+                    self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Envoie immédiatement les points en file et attend leur insertion
+
+        Args:
+            timeout: Attente max en secondes (None = sans limite)
+
+        Returns:
+            True si la file est vide
+        """
+        with self._cond:
+            if not self._items and not self._inflight:
+                return True
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._items and not self._inflight, timeout)
+            finally:
+                self._flushing -= 1
+
+    def get_statistics(self) -> Dict:
+        """Statistiques (points en attente, lots envoyés, taille moyenne des lots)"""
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'pending': len(self),
+            'avg_batch': self.stats['written'] / batches if batches else 0.0
+        }